@@ -9,7 +9,7 @@ from pathlib import Path
 # Diretórios base
 BASE_DIR = Path(__file__).parent.parent
 DATA_DIR = BASE_DIR / "data"
-LOGS_DIR = BASE_DIR / "logs"
+LOGS_DIR = Path(os.environ.get("BARCODE_LOGS_DIR") or BASE_DIR / "logs")  # scripts de teste usam um diretório temporário
 CONFIG_DIR = BASE_DIR / "config"
 
 # Criar diretórios se não existirem
@@ -19,7 +19,11 @@ CONFIG_DIR.mkdir(exist_ok=True)
 
 # Arquivos de dados
 TOKEN_FILE = CONFIG_DIR / "token.json"
-PENDING_FILE = DATA_DIR / "pendentes.csv"
+PENDING_FILE = DATA_DIR / "pendentes.csv"  # Formato antigo, migrado para o journal
+PENDING_JOURNAL_FILE = DATA_DIR / "pendentes.journal"
+PENDING_DB_FILE = DATA_DIR / "pendentes.db"
+PENDING_SEGMENT_DIR = DATA_DIR / "pendentes"  # Segmentos do log de pendentes
+DAEMON_SOCKET_FILE = DATA_DIR / "scanner.sock"  # Socket do daemon de captura
 LOGS_FILE = LOGS_DIR / "scanner.log"
 SETTINGS_FILE = CONFIG_DIR / "settings.json"
 
@@ -34,7 +38,26 @@ API_BASE_URL = "https://sua-api.com"  # ⚠️ ALTERAR: URL da sua API
 API_ENDPOINTS = {
     "ativar": "/api/ativar_raspberry",      # ⚠️ ALTERAR: Endpoint de ativação
     "registrar": "/api/registrar_codigo",   # ⚠️ ALTERAR: Endpoint de registro
-    "status": "/api/status_raspberry"       # ⚠️ ALTERAR: Endpoint de status
+    "status": "/api/status_raspberry",      # ⚠️ ALTERAR: Endpoint de status
+    "registrar_lote": "/api/registrar_codigos_lote",  # ⚠️ ALTERAR: Endpoint de registro em lote
+    "refresh": "/api/refresh_token",        # ⚠️ ALTERAR: Endpoint de renovação do token
+    "desativar": "/api/desativar_dispositivo"  # ⚠️ ALTERAR: Endpoint de desativação
+}
+
+# Cliente HTTP compartilhado (pool de conexões keep-alive)
+HTTP_CONFIG = {
+    "pool_connections": 2,        # Hosts mantidos no pool
+    "pool_maxsize": 4,            # Conexões keep-alive por host
+    "max_retries": 3,             # Tentativas em erro de conexão ou 429/5xx
+    "backoff_factor": 0.5,        # Backoff exponencial entre tentativas (segundos)
+    "max_retry_after": 2,         # Retry-After maior não é esperado (segundos)
+    "connect_timeout": 5,         # Timeout de conexão (segundos)
+    "timeouts": {                 # Timeout de leitura por endpoint (segundos)
+        "default": 30,
+        "registrar": 10,
+        "registrar_lote": 30,
+        "status": 15
+    }
 }
 
 # =============================================================================
@@ -46,7 +69,13 @@ SCANNER_CONFIG = {
     "max_retries": 3,         # Número máximo de tentativas de envio
     "sync_interval": 3600,    # Intervalo de sincronização (segundos) - 1 hora
     "key_timeout": 0.1,       # Timeout entre teclas do scanner (segundos)
-    "max_buffer_size": 1000,  # Tamanho máximo do buffer de códigos
+    "raw_input": True,        # Leitura direta de struct input_event (False usa evdev.InputDevice.read)
+    "input_dir": "/dev/input",  # Diretório monitorado para conexão e desconexão de scanners
+    "keyboard_layout": "us",  # Layout configurado no scanner: "us" ou "abnt2"
+    "max_buffer_size": 1000,  # Códigos pendentes em memória; o excedente fica só em disco
+    "dedup_window": 1.0,      # Janela de leituras repetidas (segundos, 0 desativa)
+    "dedup_max_entries": 256, # Códigos recentes lembrados na janela
+    "dedup_mode": "drop",     # "drop" descarta repetidas, "tag" marca com repeated_scan
 }
 
 # =============================================================================
@@ -100,10 +129,38 @@ SYNC_CONFIG = {
     "auto_sync": True,            # Sincronização automática
     "sync_on_startup": True,      # Sincronizar ao iniciar
     "batch_size": 100,            # Tamanho do lote para sincronização
+    "max_in_flight": 4,           # Envios simultâneos (<= HTTP_CONFIG["pool_maxsize"])
     "retry_delay": 300,           # Delay entre tentativas (segundos)
     "max_retry_delay": 3600,      # Delay máximo entre tentativas (segundos)
     "offline_storage": True,      # Armazenar dados offline
-    "compression": False,         # Comprimir dados antes do envio
+    "compression": False,         # Comprimir lotes: False, "gzip" ou "zstd" (requer zstandard)
+    "compression_min_size": 1024, # Corpo mínimo (bytes) para comprimir
+    "recent_scans": 50,           # Leituras da sessão mantidas para a interface
+}
+
+STORAGE_CONFIG = {
+    "backend": "segments",        # Armazenamento: "segments", "journal" (arquivo único) ou "sqlite"
+    "segment_records": 1000,      # IDs por segmento (fixado na criação do diretório)
+    "history_segments": 20,       # Segmentos confirmados mantidos para exportação (0 apaga)
+    "compaction_threshold": 1000, # Entradas obsoletas no journal/segmento antes de compactar
+    "load_chunk_size": 1000,      # Códigos lidos por bloco do backlog ao iniciar
+    "durability": "flush",        # Journal: "none", "flush" ou "fsync" (resiste a queda de energia)
+    "flush_interval": 0.05,       # Janela de agrupamento das gravações do journal (segundos)
+}
+
+CONNECTIVITY_CONFIG = {
+    "probe_interval": 30,         # Intervalo entre verificações quando online (segundos)
+    "offline_probe_interval": 5,  # Intervalo entre verificações quando offline (segundos)
+    "probe_timeout": 3,           # Timeout da conexão de teste com a API (segundos)
+    "ttl": 90,                    # Validade do estado em cache (segundos)
+}
+
+DAEMON_CONFIG = {
+    "enabled": False,             # Interface como cliente do daemon de captura (src/daemon.py)
+    "request_timeout": 2.0,       # Espera por resposta a uma consulta (segundos)
+    "force_sync_timeout": 300,    # Espera pela sincronização forçada (segundos)
+    "reconnect_interval": 1.0,    # Intervalo entre tentativas de reconexão (segundos)
+    "client_queue_size": 1000,    # Mensagens aguardando envio antes de desconectar o cliente
 }
 
 # =============================================================================
@@ -236,6 +293,9 @@ def validate_config():
     if SCANNER_CONFIG["max_buffer_size"] <= 0:
         errors.append("SCANNER_CONFIG['max_buffer_size'] deve ser maior que 0")
     
+    if SCANNER_CONFIG["keyboard_layout"] not in ("us", "abnt2"):
+        errors.append("SCANNER_CONFIG['keyboard_layout'] deve ser 'us' ou 'abnt2'")
+    
     if LOG_CONFIG["max_size"] <= 0:
         errors.append("LOG_CONFIG['max_size'] deve ser maior que 0")
     
@@ -259,4 +319,4 @@ else:
         logger = logging.getLogger(__name__)
         logger.warning("Configurações inválidas detectadas:")
         for error in config_errors:
-            logger.warning(f"  - {error}") 
\ No newline at end of file
+            logger.warning(f"  - {error}")
\ No newline at end of file
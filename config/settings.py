@@ -8,7 +8,7 @@ from pathlib import Path
 # Diretórios base
 BASE_DIR = Path(__file__).parent.parent
 DATA_DIR = BASE_DIR / "data"
-LOGS_DIR = BASE_DIR / "logs"
+LOGS_DIR = Path(os.environ.get("BARCODE_LOGS_DIR") or BASE_DIR / "logs")  # scripts de teste usam um diretório temporário
 CONFIG_DIR = BASE_DIR / "config"
 
 # Criar diretórios se não existirem
@@ -18,7 +18,11 @@ CONFIG_DIR.mkdir(exist_ok=True)
 
 # Arquivos de dados
 TOKEN_FILE = CONFIG_DIR / "token.json"
-PENDING_FILE = DATA_DIR / "pendentes.csv"
+PENDING_FILE = DATA_DIR / "pendentes.csv"  # formato antigo, migrado para o journal
+PENDING_JOURNAL_FILE = DATA_DIR / "pendentes.journal"
+PENDING_DB_FILE = DATA_DIR / "pendentes.db"
+PENDING_SEGMENT_DIR = DATA_DIR / "pendentes"  # segmentos do log de pendentes
+DAEMON_SOCKET_FILE = DATA_DIR / "scanner.sock"  # socket do daemon de captura
 LOGS_FILE = LOGS_DIR / "scanner.log"
 SETTINGS_FILE = CONFIG_DIR / "settings.json"
 
@@ -27,7 +31,26 @@ API_BASE_URL = "https://api.exemplo.com"  # Alterar para URL real
 API_ENDPOINTS = {
     "ativar": "/ativar_raspberry",
     "registrar": "/registrar_codigo",
-    "status": "/status_raspberry"
+    "status": "/status_raspberry",
+    "registrar_lote": "/registrar_codigos_lote",
+    "refresh": "/refresh_token",
+    "desativar": "/desativar_dispositivo"
+}
+
+# Configurações do cliente HTTP
+HTTP_CONFIG = {
+    "pool_connections": 2,  # hosts mantidos no pool
+    "pool_maxsize": 4,  # conexões keep-alive por host
+    "max_retries": 3,  # tentativas em erro de conexão ou 429/5xx
+    "backoff_factor": 0.5,  # backoff exponencial entre tentativas (segundos)
+    "max_retry_after": 2,  # Retry-After maior que isso não é esperado (segundos)
+    "connect_timeout": 5,  # timeout de conexão (segundos)
+    "timeouts": {  # timeout de leitura por endpoint (segundos)
+        "default": 30,
+        "registrar": 10,
+        "registrar_lote": 30,
+        "status": 15
+    }
 }
 
 # Configurações do scanner
@@ -35,6 +58,52 @@ SCANNER_CONFIG = {
     "timeout": 5.0,  # timeout para leitura do scanner
     "max_retries": 3,  # tentativas de envio
     "sync_interval": 3600,  # sincronização a cada hora (segundos)
+    "raw_input": True,  # lê struct input_event direto do dispositivo (False usa InputDevice.read)
+    "input_dir": "/dev/input",  # diretório monitorado para conexão e desconexão de scanners
+    "keyboard_layout": "us",  # layout configurado no scanner: "us" ou "abnt2"
+    "max_buffer_size": 1000,  # códigos pendentes em memória; o excedente fica só no armazenamento
+    "dedup_window": 1.0,  # leituras iguais dentro da janela são repetidas (segundos, 0 desativa)
+    "dedup_max_entries": 256,  # códigos recentes lembrados
+    "dedup_mode": "drop",  # "drop" descarta repetidas, "tag" envia com metadata repeated_scan
+}
+
+# Configurações de sincronização
+SYNC_CONFIG = {
+    "batch_size": 100,  # códigos por requisição no envio em lote
+    "max_in_flight": 4,  # requisições de envio simultâneas (<= HTTP_CONFIG["pool_maxsize"])
+    "retry_delay": 300,  # delay entre tentativas (segundos)
+    "max_retry_delay": 3600,  # delay máximo entre tentativas (segundos)
+    "compression": False,  # comprimir lotes: False, "gzip" ou "zstd" (requer zstandard)
+    "compression_min_size": 1024,  # corpo mínimo (bytes) para comprimir
+    "recent_scans": 50,  # leituras da sessão mantidas para a interface
+}
+
+# Configurações do armazenamento de códigos pendentes
+STORAGE_CONFIG = {
+    "backend": "segments",  # "segments" (log segmentado), "journal" (arquivo único) ou "sqlite"
+    "segment_records": 1000,  # IDs por segmento (fixado na criação do diretório)
+    "history_segments": 20,  # segmentos confirmados mantidos como histórico para exportação (0 apaga)
+    "compaction_threshold": 1000,  # entradas obsoletas no journal (ou segmento) antes de compactar
+    "load_chunk_size": 1000,  # códigos lidos por bloco do backlog ao iniciar
+    "durability": "flush",  # journal: "none", "flush" (sobrevive a falha do processo) ou "fsync" (a queda de energia)
+    "flush_interval": 0.05,  # janela de agrupamento das gravações do journal (segundos)
+}
+
+# Configurações de verificação de conectividade com a API
+CONNECTIVITY_CONFIG = {
+    "probe_interval": 30,  # intervalo entre verificações quando online (segundos)
+    "offline_probe_interval": 5,  # intervalo entre verificações quando offline (segundos)
+    "probe_timeout": 3,  # timeout da conexão de teste (segundos)
+    "ttl": 90,  # validade do estado em cache (segundos)
+}
+
+# Configurações do daemon de captura/sincronização (processo separado da interface)
+DAEMON_CONFIG = {
+    "enabled": False,  # interface conecta ao daemon (src/daemon.py) em vez de capturar no próprio processo
+    "request_timeout": 2.0,  # espera por resposta a uma consulta (segundos)
+    "force_sync_timeout": 300,  # espera pela sincronização forçada (segundos)
+    "reconnect_interval": 1.0,  # intervalo entre tentativas de reconexão (segundos)
+    "client_queue_size": 1000,  # mensagens aguardando envio por cliente antes de desconectá-lo
 }
 
 # Configurações da interface
@@ -59,4 +128,4 @@ LOG_CONFIG = {
     "format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
     "max_size": 10 * 1024 * 1024,  # 10MB
     "backup_count": 5
-} 
\ No newline at end of file
+}
\ No newline at end of file
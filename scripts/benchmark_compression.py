@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark da compressão dos lotes de sincronização
+Execute com: python3 scripts/benchmark_compression.py --codes 5000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Adicionar diretório pai ao path
+sys.path.append(str(Path(__file__).parent.parent))
+# Logs das execuções ficam fora do repositório
+os.environ.setdefault("BARCODE_LOGS_DIR", os.path.join(tempfile.gettempdir(), "barcode-logs"))
+
+from config.settings import SYNC_CONFIG
+from src.http_client import HttpClient, compress_body, supported_encodings
+from src.pending_store import PendingJournal
+from src.utils import format_timestamp
+from scripts.benchmark_sync import BenchActivation, BenchDataSync
+from scripts.mock_api import MockAPIServer
+
+
+def make_batch_payloads(count: int, batch_size: int):
+    """Gera lotes no formato enviado ao endpoint registrar_lote"""
+    start = datetime.now()
+    codes = []
+    for i in range(count):
+        timestamp = start + timedelta(seconds=i * 0.7)
+        codes.append({
+            'code': f"7891234{i % 100000:05d}{i % 10}",
+            'timestamp': timestamp.isoformat(),
+            'device_id': BenchActivation.device_id,
+            'metadata': {'formatted_time': format_timestamp(timestamp)}
+        })
+    return [{'device_id': BenchActivation.device_id, 'codes': codes[i:i + batch_size]}
+            for i in range(0, count, batch_size)]
+
+
+def measure_encoding(payloads, encoding):
+    """Mede bytes e tempo de CPU para serializar (e comprimir) os lotes"""
+    total_bytes = 0
+    start = time.process_time()
+    for payload in payloads:
+        body = json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        if encoding:
+            body = compress_body(body, encoding)
+        total_bytes += len(body)
+    cpu = time.process_time() - start
+    return total_bytes, cpu
+
+
+def measure_wire(count: int, encoding, accept_encodings, data_dir: Path):
+    """Sincroniza códigos contra a API simulada e retorna bytes recebidos"""
+    SYNC_CONFIG["compression"] = encoding or False
+    server = MockAPIServer(accept_encodings=accept_encodings).start()
+    try:
+        store = PendingJournal(data_dir / f"wire_{encoding}_{len(accept_encodings)}.journal",
+                               data_dir / "pendentes.csv")
+        sync = BenchDataSync(BenchActivation(), HttpClient(server.url), store=store)
+        for i in range(count):
+            sync.add_code(f"7891234{i % 100000:05d}{i % 10}", datetime.now())
+        successful, _ = sync.force_sync()
+        return successful, server.received_bytes, sync.compression
+    finally:
+        server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da compressão dos lotes")
+    parser.add_argument('--codes', type=int, default=5000)
+    parser.add_argument('--batch-size', type=int, default=SYNC_CONFIG["batch_size"])
+    args = parser.parse_args()
+    
+    payloads = make_batch_payloads(args.codes, args.batch_size)
+    encodings = [None] + list(supported_encodings())
+    
+    print(f"📦 {args.codes} códigos em lotes de {args.batch_size}")
+    raw_bytes, _ = measure_encoding(payloads, None)
+    for encoding in encodings:
+        total_bytes, cpu = measure_encoding(payloads, encoding)
+        print(f"  {encoding or 'json':>5}: {total_bytes / 1024:8.1f} KiB "
+              f"({total_bytes / raw_bytes:6.1%}), CPU {cpu * 1000 / len(payloads):.2f} ms/lote")
+    
+    print("\n🌐 Bytes recebidos pela API simulada")
+    with tempfile.TemporaryDirectory() as tmp:
+        for encoding, accepted in ((None, ('gzip',)), ('gzip', ('gzip',)), ('gzip', ())):
+            successful, wire_bytes, negotiated = measure_wire(args.codes, encoding, accepted, Path(tmp))
+            print(f"  pedido {encoding or 'nenhuma'}, servidor aceita {list(accepted) or 'nenhuma'}: "
+                  f"{wire_bytes / 1024:.1f} KiB, {successful} códigos, final {negotiated or 'sem compressão'}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark da captura no processo da interface x daemon de captura separado
+Execute com: python3 scripts/benchmark_daemon.py --codes 300 --interval 0.01
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Adicionar diretório pai ao path
+sys.path.append(str(Path(__file__).parent.parent))
+# Logs das execuções ficam fora do repositório
+os.environ.setdefault("BARCODE_LOGS_DIR", os.path.join(tempfile.gettempdir(), "barcode-logs"))
+
+from src.daemon import CaptureDaemon
+from src.daemon_client import DaemonClient
+from src.http_client import HttpClient
+from src.pending_store import SegmentedPendingLog
+from src.persist_writer import LatencyStats
+from src.scanner import MockScanner
+from scripts.benchmark_sync import BenchActivation, BenchDataSync
+
+
+def build_sync(data_dir: Path) -> BenchDataSync:
+    """DataSync com log segmentado real e API inacessível (só mede a gravação)"""
+    store = SegmentedPendingLog(data_dir / "pendentes", data_dir / "nenhum.journal", data_dir / "nenhum.csv")
+    return BenchDataSync(BenchActivation(), HttpClient("http://127.0.0.1:1"), store=store)
+
+
+def ui_load(stop: threading.Event):
+    """Carga da interface: redesenho e serialização que seguram o GIL"""
+    rows = [{'code': f"789{i:010d}", 'formatted_time': "01/01/2026 00:00:00", 'status': 'pending'}
+            for i in range(5000)]
+    while not stop.is_set():
+        json.dumps(rows)
+
+
+def run_daemon(socket_path: Path, data_dir: Path):
+    """Processo do daemon com scanner simulado"""
+    daemon = CaptureDaemon(socket_path, scanner=MockScanner(), data_sync=build_sync(data_dir),
+                           activation_manager=BenchActivation(), enable_simulation=True)
+    signal.signal(signal.SIGTERM, lambda signum, frame: daemon.stop())
+    daemon.serve_forever()
+
+
+def stats_ms(samples_ms):
+    stats = LatencyStats(max_samples=len(samples_ms) or 1)
+    for value in samples_ms:
+        stats.record(value / 1000)
+    return stats.snapshot()
+
+
+def in_process(count: int, interval: float, data_dir: Path, loaded: bool):
+    """Captura, gravação e interface no mesmo processo (modo atual)"""
+    sync = build_sync(data_dir)
+    scanner = MockScanner()
+    delivery = LatencyStats()
+    
+    def on_scan(code, timestamp, metadata=None):
+        captured_at = time.monotonic()
+        sync.add_code(code, timestamp, metadata)
+        delivery.record(time.monotonic() - captured_at)
+    
+    scanner.set_callback(on_scan)
+    stop = threading.Event()
+    if loaded:
+        threading.Thread(target=ui_load, args=(stop,), daemon=True).start()
+    
+    result = {}
+    capture = threading.Thread(target=lambda: result.update(lateness=scanner.simulate_burst(count, interval)))
+    capture.start()
+    capture.join()
+    stop.set()
+    sync.stop_sync_thread()
+    return stats_ms([value * 1000 for value in result['lateness']]), delivery.snapshot()
+
+
+def split(count: int, interval: float, data_dir: Path, loaded: bool):
+    """Captura e gravação no daemon; interface como cliente pelo socket Unix"""
+    socket_path = data_dir / "scanner.sock"
+    process = multiprocessing.get_context('spawn').Process(target=run_daemon, args=(socket_path, data_dir))
+    process.start()
+    
+    client = DaemonClient(socket_path)
+    received = threading.Semaphore(0)
+    client.set_callback(lambda code, timestamp, metadata=None: received.release())
+    try:
+        if not client.wait_connected(timeout=30):
+            raise RuntimeError("daemon não iniciou")
+        
+        stop = threading.Event()
+        if loaded:
+            threading.Thread(target=ui_load, args=(stop,), daemon=True).start()
+        lateness = client.simulate_burst(count, interval)
+        for _ in range(count):
+            received.acquire(timeout=5)
+        stop.set()
+        return stats_ms(lateness), client.delivery_latency.snapshot()
+    finally:
+        client.close()
+        process.terminate()
+        process.join(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do daemon de captura")
+    parser.add_argument('--codes', type=int, default=300)
+    parser.add_argument('--interval', type=float, default=0.01, help="Intervalo entre leituras (segundos)")
+    args = parser.parse_args()
+    
+    print(f"⏱️  {args.codes} leituras a cada {args.interval * 1000:.0f} ms")
+    with tempfile.TemporaryDirectory() as tmp:
+        for loaded in (False, True):
+            for name, run in (("mesmo processo", in_process), ("daemon", split)):
+                data_dir = Path(tmp) / f"{name}_{loaded}".replace(' ', '_')
+                data_dir.mkdir()
+                lateness, delivery = run(args.codes, args.interval, data_dir, loaded)
+                label = f"{name} ({'interface ocupada' if loaded else 'interface ociosa'})"
+                print(f"  {label:>34}: atraso da captura p50 {lateness['p50_ms']} ms, "
+                      f"p99 {lateness['p99_ms']} ms, máx {lateness['max_ms']} ms | "
+                      f"leitura→interface p50 {delivery['p50_ms']} ms, p99 {delivery['p99_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
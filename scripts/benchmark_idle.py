@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark do loop de captura ocioso: select com timeout de 0,1 s x epoll sem timeout
+Execute com: python3 scripts/benchmark_idle.py --seconds 10
+"""
+
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Adicionar diretório pai ao path
+sys.path.append(str(Path(__file__).parent.parent))
+# Logs das execuções ficam fora do repositório
+os.environ.setdefault("BARCODE_LOGS_DIR", os.path.join(tempfile.gettempdir(), "barcode-logs"))
+
+from config.settings import SCANNER_CONFIG
+from src.input_reader import RawEventReader, pack_events
+from src.keymap import text_to_events
+from src.scanner import BarcodeScanner
+
+
+class FifoScanner(BarcodeScanner):
+    """Scanner real lendo de um FIFO no lugar de /dev/input/eventN"""
+    
+    fifo_path = None
+    
+    def _find_scanner_devices(self):
+        self.device_paths = [self.fifo_path]
+        self.device_manager.directory = os.path.dirname(self.fifo_path)
+        self.wakeups = 0
+    
+    def idle_wakeups(self) -> int:
+        return self._loop.wakeups
+
+
+class LegacyFifoScanner(FifoScanner):
+    """Loop anterior: select() com timeout de 0,1 s enquanto is_running"""
+    
+    def _capture_loop(self):
+        readers = {}
+        for device_path in self.device_paths:
+            fd = os.open(device_path, os.O_RDONLY | os.O_NONBLOCK)
+            readers[fd] = RawEventReader(fd)
+        try:
+            while self.is_running and readers:
+                import select
+                ready, _, _ = select.select(list(readers), [], [], 0.1)
+                self.wakeups += 1
+                for fd in ready:
+                    readers[fd].read_keys(self._process_key)
+        finally:
+            for fd in readers:
+                os.close(fd)
+    
+    def idle_wakeups(self) -> int:
+        return self.wakeups
+
+
+def measure(scanner_class, fifo: str, seconds: float) -> dict:
+    """Acordadas e CPU em repouso, latência de uma leitura e tempo de parada"""
+    scanner_class.fifo_path = fifo
+    scanner = scanner_class()
+    delivered = threading.Event()
+    scanner.key_timeout = float('inf')
+    scanner.set_callback(lambda code, timestamp, metadata=None: delivered.set())
+    
+    # Mantém um escritor aberto: sem ele o FIFO sinaliza fim de arquivo
+    writer = os.open(fifo, os.O_RDWR)
+    try:
+        scanner.start_capture()
+        time.sleep(0.2)
+        
+        before_wakeups = scanner.idle_wakeups()
+        before = resource.getrusage(resource.RUSAGE_SELF)
+        time.sleep(seconds)
+        after = resource.getrusage(resource.RUSAGE_SELF)
+        wakeups = scanner.idle_wakeups() - before_wakeups
+        
+        start = time.perf_counter()
+        os.write(writer, pack_events(text_to_events("7891234567895")))
+        delivered.wait(2)
+        scan_latency = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        scanner.stop_capture()
+        stop_latency = time.perf_counter() - start
+    finally:
+        os.close(writer)
+    
+    cpu = (after.ru_utime + after.ru_stime) - (before.ru_utime + before.ru_stime)
+    return {
+        'wakeups': wakeups,
+        'cpu_ms': cpu * 1000,
+        'switches': after.ru_nvcsw - before.ru_nvcsw,
+        'scan_ms': scan_latency * 1000,
+        'stop_ms': stop_latency * 1000,
+        'delivered': delivered.is_set(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do loop de captura ocioso")
+    parser.add_argument('--seconds', type=float, default=10.0, help="Tempo ocioso medido por loop")
+    args = parser.parse_args()
+    
+    SCANNER_CONFIG["raw_input"] = True
+    with tempfile.TemporaryDirectory() as tmp:
+        fifo = os.path.join(tmp, "event0")
+        os.mkfifo(fifo)
+        
+        print(f"💤 {args.seconds:.0f} s ociosos por loop (FIFO como dispositivo)")
+        for name, scanner_class in (("select 0,1 s", LegacyFifoScanner), ("epoll", FifoScanner)):
+            result = measure(scanner_class, fifo, args.seconds)
+            print(f"  {name:>12}: {result['wakeups']:>4} acordadas "
+                  f"({result['wakeups'] / args.seconds:.1f}/s), CPU {result['cpu_ms']:6.1f} ms, "
+                  f"{result['switches']:>4} trocas de contexto | leitura em {result['scan_ms']:.2f} ms "
+                  f"({'✅' if result['delivered'] else '❌'}) | parada em {result['stop_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
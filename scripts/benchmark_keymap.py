@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark da decodificação de teclas: dicionário montado por evento x tabela pré-compilada
+Execute com: python3 scripts/benchmark_keymap.py --repeat 2000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from pathlib import Path
+
+# Adicionar diretório pai ao path
+sys.path.append(str(Path(__file__).parent.parent))
+# Logs das execuções ficam fora do repositório
+os.environ.setdefault("BARCODE_LOGS_DIR", os.path.join(tempfile.gettempdir(), "barcode-logs"))
+
+import evdev
+
+from config.settings import SCANNER_CONFIG
+from src.keymap import KeyDecoder, text_to_events
+from src.scanner import MockScanner
+
+Event = namedtuple('Event', 'code value')
+
+# Conteúdos típicos: EAN-13, Code 128 com maiúsculas e símbolos, URL de QR code
+PAYLOADS = ["7891234567895", "PED-2026/000123_Lote#A7", "https://exemplo.com.br/nf?chave=35260112345678000199"]
+
+
+def legacy_keycode_to_char(keycode):
+    """Implementação anterior de BarcodeScanner._keycode_to_char (sem Shift)"""
+    key_mapping = {
+        evdev.ecodes.KEY_A: 'a', evdev.ecodes.KEY_B: 'b', evdev.ecodes.KEY_C: 'c',
+        evdev.ecodes.KEY_D: 'd', evdev.ecodes.KEY_E: 'e', evdev.ecodes.KEY_F: 'f',
+        evdev.ecodes.KEY_G: 'g', evdev.ecodes.KEY_H: 'h', evdev.ecodes.KEY_I: 'i',
+        evdev.ecodes.KEY_J: 'j', evdev.ecodes.KEY_K: 'k', evdev.ecodes.KEY_L: 'l',
+        evdev.ecodes.KEY_M: 'm', evdev.ecodes.KEY_N: 'n', evdev.ecodes.KEY_O: 'o',
+        evdev.ecodes.KEY_P: 'p', evdev.ecodes.KEY_Q: 'q', evdev.ecodes.KEY_R: 'r',
+        evdev.ecodes.KEY_S: 's', evdev.ecodes.KEY_T: 't', evdev.ecodes.KEY_U: 'u',
+        evdev.ecodes.KEY_V: 'v', evdev.ecodes.KEY_W: 'w', evdev.ecodes.KEY_X: 'x',
+        evdev.ecodes.KEY_Y: 'y', evdev.ecodes.KEY_Z: 'z',
+        evdev.ecodes.KEY_0: '0', evdev.ecodes.KEY_1: '1', evdev.ecodes.KEY_2: '2',
+        evdev.ecodes.KEY_3: '3', evdev.ecodes.KEY_4: '4', evdev.ecodes.KEY_5: '5',
+        evdev.ecodes.KEY_6: '6', evdev.ecodes.KEY_7: '7', evdev.ecodes.KEY_8: '8',
+        evdev.ecodes.KEY_9: '9',
+        evdev.ecodes.KEY_MINUS: '-', evdev.ecodes.KEY_EQUAL: '=',
+        evdev.ecodes.KEY_LEFTBRACE: '[', evdev.ecodes.KEY_RIGHTBRACE: ']',
+        evdev.ecodes.KEY_BACKSLASH: '\\', evdev.ecodes.KEY_SEMICOLON: ';',
+        evdev.ecodes.KEY_APOSTROPHE: "'", evdev.ecodes.KEY_GRAVE: '`',
+        evdev.ecodes.KEY_COMMA: ',', evdev.ecodes.KEY_DOT: '.',
+        evdev.ecodes.KEY_SLASH: '/', evdev.ecodes.KEY_SPACE: ' '
+    }
+    return key_mapping.get(keycode, '')
+
+
+def legacy_decode(events):
+    """Decodificação anterior: só teclas pressionadas, sem modificadores"""
+    return ''.join(legacy_keycode_to_char(code) for code, value in events if value == 1)
+
+
+def decode(decoder: KeyDecoder, events):
+    return ''.join(decoder.feed(code, value) for code, value in events)
+
+
+def per_event_ns(func, events, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(events)
+    return (time.perf_counter() - start) * 1e9 / (repeat * len(events))
+
+
+def scanner_events_per_second(layout: str, events, repeat: int) -> float:
+    """Caminho completo de BarcodeScanner._process_key_event até o callback"""
+    SCANNER_CONFIG["keyboard_layout"] = layout
+    scanner = MockScanner()
+    scanner.key_timeout = float('inf')
+    scanner.recent_codes.window = 0
+    scanner.set_callback(lambda code, timestamp, metadata=None: None)
+    wrapped = [Event(code, value) for code, value in events]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for event in wrapped:
+            scanner._process_key_event(event)
+    return repeat * len(wrapped) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do decodificador de teclas")
+    parser.add_argument('--repeat', type=int, default=2000, help="Repetições de cada conteúdo")
+    parser.add_argument('--layout', choices=['us', 'abnt2'], default='us')
+    args = parser.parse_args()
+    
+    print(f"⌨️  Layout {args.layout}, {args.repeat} repetições por conteúdo")
+    for payload in PAYLOADS:
+        events = text_to_events(payload, args.layout, enter=False)
+        decoder = KeyDecoder(args.layout)
+        before = per_event_ns(legacy_decode, events, args.repeat)
+        after = per_event_ns(lambda evs: decode(decoder, evs), events, args.repeat)
+        decoded = decode(KeyDecoder(args.layout), events)
+        print(f"  {payload[:32]:<32} {len(events):>4} eventos | anterior {before:7.0f} ns/evento "
+              f"({legacy_decode(events)[:24]!r}) | tabela {after:5.0f} ns/evento "
+              f"({'✅ correto' if decoded == payload else '❌ ' + repr(decoded)}) | {before / after:.0f}x")
+    
+    events = [event for payload in PAYLOADS for event in text_to_events(payload, args.layout)]
+    rate = scanner_events_per_second(args.layout, events, max(1, args.repeat // 10))
+    print(f"  Caminho completo do scanner: {rate:,.0f} eventos/s")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Suíte de carga da sincronização contra a API simulada (em processo separado)
+Execute com: python3 scripts/benchmark_load.py --codes 1000 10000 100000 --latency 0.005
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Adicionar diretório pai ao path
+sys.path.append(str(Path(__file__).parent.parent))
+# Logs das execuções ficam fora do repositório
+os.environ.setdefault("BARCODE_LOGS_DIR", os.path.join(tempfile.gettempdir(), "barcode-logs"))
+
+from config.settings import HTTP_CONFIG, SYNC_CONFIG
+from src.http_client import HttpClient
+from src.pending_store import PendingJournal, SegmentedPendingLog
+from src.persist_writer import LatencyStats
+from scripts.benchmark_sync import BenchActivation, BenchDataSync, make_codes
+
+MOCK_API = Path(__file__).parent / "mock_api.py"
+
+
+class LoadDataSync(BenchDataSync):
+    """BenchDataSync que mede envio→confirmação de cada código"""
+    
+    def __init__(self, *args, samples: int = 1000, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sent_at = {}
+        self.ack_latency = LatencyStats(max_samples=max(1, samples))
+    
+    def _sync_chunk(self, chunk):
+        now = time.monotonic()
+        for code_data in chunk:
+            self.sent_at.setdefault(code_data['id'], now)
+        return super()._sync_chunk(chunk)
+    
+    def _remove_synced_codes(self, synced_codes):
+        super()._remove_synced_codes(synced_codes)
+        now = time.monotonic()
+        for code_data in synced_codes:
+            sent = self.sent_at.pop(code_data['id'], None)
+            if sent is not None:
+                self.ack_latency.record(now - sent)
+
+
+def start_mock_api(args, batch: bool):
+    """Inicia scripts/mock_api.py em outro processo e retorna (processo, url)"""
+    command = [sys.executable, str(MOCK_API), '--port', '0', '--latency', str(args.latency),
+               '--error-rate', str(args.error_rate), '--rate-limit-rate', str(args.rate_limit_rate)]
+    if not batch:
+        command.append('--no-batch')
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    url = process.stdout.readline().split()[-1]
+    return process, url
+
+
+def open_store(backend: str, data_dir: Path):
+    if backend == "journal":
+        return PendingJournal(data_dir / "pendentes.journal", data_dir / "nenhum.csv")
+    return SegmentedPendingLog(data_dir / "pendentes", data_dir / "nenhum.journal", data_dir / "nenhum.csv")
+
+
+def run(mode: str, count: int, args, data_dir: Path):
+    """Sincroniza um backlog de `count` códigos e retorna métricas"""
+    process, url = start_mock_api(args, batch=(mode == "batch"))
+    try:
+        store = open_store(args.backend, data_dir)
+        make_codes(count, store)
+        store.flush()
+        client = HttpClient(url)
+        sync = LoadDataSync(BenchActivation(), client, store=store, samples=count)
+        sync.max_retries = args.max_rounds
+        bytes_before = store.get_write_stats()['bytes_written']
+        
+        usage_before = resource.getrusage(resource.RUSAGE_SELF)
+        start = time.perf_counter()
+        successful, rounds = 0, 0
+        while rounds < args.max_rounds:
+            done, failed = sync.force_sync()
+            successful += done
+            rounds += 1
+            if not failed:
+                break
+        store.flush()
+        elapsed = time.perf_counter() - start
+        usage_after = resource.getrusage(resource.RUSAGE_SELF)
+        
+        cpu = (usage_after.ru_utime - usage_before.ru_utime) + (usage_after.ru_stime - usage_before.ru_stime)
+        server_stats = client.get(f"{url}/_mock/stats").json()
+        written = store.get_write_stats()['bytes_written'] - bytes_before
+        sync.stop_sync_thread()
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    
+    latency = sync.ack_latency.snapshot()
+    return {
+        'mode': mode,
+        'codes': count,
+        'successful': successful,
+        'rounds': rounds,
+        'seconds': elapsed,
+        'rate': successful / elapsed if elapsed else 0.0,
+        'ack_p50_ms': latency['p50_ms'],
+        'ack_p99_ms': latency['p99_ms'],
+        'cpu_seconds': cpu,
+        'cpu_percent': 100 * cpu / elapsed if elapsed else 0.0,
+        'bytes_written': written,
+        'bytes_sent': server_stats['received_bytes'],
+        'requests': server_stats['requests'],
+        'injected': server_stats['injected']
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suíte de carga da sincronização")
+    parser.add_argument('--codes', type=int, nargs='+', default=[1000, 10000, 100000], help="Tamanhos de backlog")
+    parser.add_argument('--modes', nargs='+', default=['batch', 'single'], choices=['batch', 'single'])
+    parser.add_argument('--single-max', type=int, default=10000,
+                        help="Maior backlog executado no modo individual (uma requisição por código)")
+    parser.add_argument('--latency', type=float, default=0.005, help="Latência simulada por requisição (segundos)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fração de respostas 5xx injetadas")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="Fração de respostas 429 injetadas")
+    parser.add_argument('--batch-size', type=int, default=SYNC_CONFIG["batch_size"])
+    parser.add_argument('--in-flight', type=int, default=SYNC_CONFIG["max_in_flight"])
+    parser.add_argument('--backend', choices=['segments', 'journal'], default='segments')
+    parser.add_argument('--max-rounds', type=int, default=20, help="Sincronizações forçadas até esvaziar a fila")
+    parser.add_argument('--json', type=Path, help="Grava os resultados também em JSON")
+    args = parser.parse_args()
+    
+    SYNC_CONFIG["batch_size"] = args.batch_size
+    SYNC_CONFIG["max_in_flight"] = args.in_flight
+    HTTP_CONFIG["pool_maxsize"] = max(HTTP_CONFIG["pool_maxsize"], args.in_flight)
+    
+    print(f"📊 Latência {args.latency * 1000:.1f} ms, erros {args.error_rate:.0%}, 429 {args.rate_limit_rate:.0%}, "
+          f"lote {args.batch_size}, {args.in_flight} envios simultâneos, armazenamento {args.backend}")
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in args.codes:
+            for mode in args.modes:
+                if mode == "single" and count > args.single_max:
+                    continue
+                data_dir = Path(tmp) / f"{mode}_{count}"
+                data_dir.mkdir()
+                result = run(mode, count, args, data_dir)
+                results.append(result)
+                print(f"  {mode:>6} {count:>7}: {result['successful']}/{count} em {result['seconds']:.2f}s "
+                      f"({result['rate']:.0f} códigos/s) | confirmação p50 {result['ack_p50_ms']} ms, "
+                      f"p99 {result['ack_p99_ms']} ms | CPU {result['cpu_seconds']:.2f}s "
+                      f"({result['cpu_percent']:.0f}%) | gravados {result['bytes_written'] / 1024:.0f} KiB, "
+                      f"enviados {result['bytes_sent'] / 1024:.0f} KiB em {result['requests']} requisições"
+                      + (f" | falhas injetadas {result['injected']}" if result['injected'] else ""))
+    
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding='utf-8')
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
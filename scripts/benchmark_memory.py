@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark de memória dos códigos pendentes (dicts x PendingRecord)
+Execute com: python3 scripts/benchmark_memory.py --codes 200000
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Adicionar diretório pai ao path
+sys.path.append(str(Path(__file__).parent.parent))
+# Logs das execuções ficam fora do repositório
+os.environ.setdefault("BARCODE_LOGS_DIR", os.path.join(tempfile.gettempdir(), "barcode-logs"))
+
+from src.records import PendingRecord
+from src.utils import format_timestamp, make_idempotency_key
+
+DEVICE_ID = "RPI-00000000a1b2c3d4"
+
+
+def journal_lines(count: int):
+    """Gera linhas 'add' do journal como gravadas por DataSync.add_code"""
+    start = datetime.now()
+    lines = []
+    for i in range(count):
+        timestamp = start + timedelta(seconds=i)
+        code = f"7891234{i:06d}"
+        record = PendingRecord(i + 1, code, timestamp.isoformat(), DEVICE_ID,
+                               idempotency_key=make_idempotency_key(DEVICE_ID, i + 1, code, timestamp.isoformat()))
+        lines.append(json.dumps({'op': 'add', 'record': record.to_dict()}, separators=(',', ':')))
+    return lines
+
+
+def measure(build):
+    """Retorna bytes retidos pelo resultado de `build()`"""
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    result = build()
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return after - before
+
+
+def loaded_dicts(lines):
+    return [json.loads(line)['record'] for line in lines]
+
+
+def loaded_records(lines):
+    return [PendingRecord.from_dict(json.loads(line)['record']) for line in lines]
+
+
+def session_dicts(lines):
+    """Leituras da sessão no formato antigo: dict da fila + dict da tela"""
+    pending, scanned = [], []
+    for line in lines:
+        record = json.loads(line)['record']
+        timestamp = datetime.fromisoformat(record['timestamp'])
+        pending.append(record)
+        scanned.append({'code': record['code'], 'timestamp': timestamp,
+                        'formatted_time': format_timestamp(timestamp)})
+    return pending, scanned
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de memória dos códigos pendentes")
+    parser.add_argument('--codes', type=int, nargs='+', default=[10000, 200000])
+    args = parser.parse_args()
+    
+    for count in args.codes:
+        lines = journal_lines(count)
+        results = [
+            ("dicts carregados do journal", measure(lambda: loaded_dicts(lines))),
+            ("PendingRecord carregados", measure(lambda: loaded_records(lines))),
+            ("dicts da sessão (fila + tela)", measure(lambda: session_dicts(lines))),
+        ]
+        print(f"🧮 {count} códigos")
+        for label, size in results:
+            print(f"  {label:>30}: {size / 2**20:8.1f} MiB ({size / count:5.0f} bytes/código)")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark da persistência das leituras (append por código x commit em grupo)
+Execute com: python3 scripts/benchmark_persist.py --codes 500 --rate 20
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Adicionar diretório pai ao path
+sys.path.append(str(Path(__file__).parent.parent))
+# Logs das execuções ficam fora do repositório
+os.environ.setdefault("BARCODE_LOGS_DIR", os.path.join(tempfile.gettempdir(), "barcode-logs"))
+
+from config.settings import STORAGE_CONFIG
+from src.pending_store import PendingJournal
+from src.records import PendingRecord
+from src.utils import append_csv_row, make_idempotency_key
+
+FIELDNAMES = ['code', 'timestamp', 'formatted_time', 'device_id', 'retry_count', 'last_attempt', 'status']
+DEVICE_ID = "bench-device"
+
+
+def scan_interval(rate: float) -> float:
+    return 1.0 / rate if rate else 0.0
+
+
+def bench_csv(count: int, rate: float, path: Path):
+    """Caminho antigo: abre, acrescenta e fecha pendentes.csv a cada leitura"""
+    caller = 0.0
+    for i in range(count):
+        now = datetime.now()
+        row = {'code': f"789{i:010d}", 'timestamp': now.isoformat(),
+               'formatted_time': now.strftime("%d/%m/%Y %H:%M:%S"), 'device_id': DEVICE_ID,
+               'retry_count': 0, 'last_attempt': '', 'status': 'pending'}
+        start = time.perf_counter()
+        append_csv_row(row, path, FIELDNAMES)
+        caller += time.perf_counter() - start
+        time.sleep(scan_interval(rate))
+    return caller / count, None
+
+
+def bench_journal(count: int, rate: float, path: Path, durability: str, flush_interval: float):
+    """Journal com GroupCommitWriter"""
+    STORAGE_CONFIG["durability"] = durability
+    STORAGE_CONFIG["flush_interval"] = flush_interval
+    store = PendingJournal(path, path.with_suffix('.csv'))
+    
+    caller = 0.0
+    for i in range(count):
+        now = datetime.now().isoformat()
+        record_id = store.next_id()
+        code = f"789{i:010d}"
+        record = PendingRecord(record_id, code, now, DEVICE_ID,
+                               idempotency_key=make_idempotency_key(DEVICE_ID, record_id, code, now))
+        start = time.perf_counter()
+        store.append(record)
+        caller += time.perf_counter() - start
+        time.sleep(scan_interval(rate))
+    
+    store.flush()
+    stats = store.get_write_stats()
+    store.close()
+    return caller / count, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da persistência das leituras")
+    parser.add_argument('--codes', type=int, default=500)
+    parser.add_argument('--rate', type=float, default=20.0, help="Leituras por segundo (0 = sem pausa)")
+    args = parser.parse_args()
+    
+    print(f"💾 {args.codes} leituras a {args.rate or 'máx.'} leituras/s")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        caller, _ = bench_csv(args.codes, args.rate, tmp / "pendentes.csv")
+        print(f"  {'append_csv_row':>22}: {caller * 1e6:7.1f} µs/leitura na thread do scanner, "
+              f"{args.codes} aberturas/escritas")
+        
+        for durability in ('none', 'flush', 'fsync'):
+            for flush_interval in (0.0, 0.05):
+                path = tmp / f"{durability}_{flush_interval}.journal"
+                caller, stats = bench_journal(args.codes, args.rate, path, durability, flush_interval)
+                print(f"  {durability + ' / ' + str(int(flush_interval * 1000)) + 'ms':>22}: "
+                      f"{caller * 1e6:7.1f} µs/leitura na thread do scanner, {stats['commits']} commits, "
+                      f"leitura→durável p50 {stats['p50_ms']} ms, p99 {stats['p99_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
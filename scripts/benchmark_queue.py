@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark da fila de códigos pendentes (confirmações, tentativas e remoções)
+Execute com: python3 scripts/benchmark_queue.py --sizes 10000 100000 1000000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Adicionar diretório pai ao path
+sys.path.append(str(Path(__file__).parent.parent))
+# Logs das execuções ficam fora do repositório
+os.environ.setdefault("BARCODE_LOGS_DIR", os.path.join(tempfile.gettempdir(), "barcode-logs"))
+
+from src.pending_queue import PendingQueue
+
+
+def make_records(count: int):
+    """Gera registros mínimos (o custo medido é o da indexação)"""
+    return [{'id': i, 'code': f"789{i:010d}", 'retry_count': 0, 'status': 'pending'}
+            for i in range(1, count + 1)]
+
+
+def ack_order(records):
+    """Ordem embaralhada de confirmação (envios paralelos e retentativas)"""
+    order = list(records)
+    random.Random(0).shuffle(order)
+    return order
+
+
+def bench_queue(records, batch_size: int):
+    """Mede inclusão, tentativas e confirmação em lotes com PendingQueue"""
+    queue = PendingQueue()
+    
+    start = time.perf_counter()
+    for record in records:
+        queue.add(record)
+    add_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    for record in records:
+        code_data = queue.get(record['id'])
+        code_data['retry_count'] += 1
+    retry_time = time.perf_counter() - start
+    
+    acks = ack_order(records)
+    start = time.perf_counter()
+    for i in range(0, len(acks), batch_size):
+        queue.remove(r['id'] for r in acks[i:i + batch_size])
+    ack_time = time.perf_counter() - start
+    
+    return add_time, retry_time, ack_time
+
+
+def bench_list(records, batch_size: int):
+    """Mede confirmação com a lista de dicts usada antes (`in` + `remove`)"""
+    pending = list(records)
+    acks = ack_order(records)
+    
+    start = time.perf_counter()
+    for i in range(0, len(acks), batch_size):
+        for synced_code in acks[i:i + batch_size]:
+            if synced_code in pending:
+                pending.remove(synced_code)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da fila de pendentes")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--list-max', type=int, default=10000,
+                        help="Maior backlog medido com a lista antiga (custo O(n²))")
+    args = parser.parse_args()
+    
+    print(f"📊 Confirmações em lotes de {args.batch_size}")
+    for size in args.sizes:
+        records = make_records(size)
+        add_time, retry_time, ack_time = bench_queue(records, args.batch_size)
+        line = (f"  {size:>8}: inclusão {add_time * 1e9 / size:6.0f} ns/código, "
+                f"tentativa {retry_time * 1e9 / size:6.0f} ns/código, "
+                f"confirmação {ack_time * 1e9 / size:6.0f} ns/código")
+        if size <= args.list_max:
+            list_time = bench_list(records, args.batch_size)
+            line += f" (lista antiga: {list_time:.2f}s total)"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
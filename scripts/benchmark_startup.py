@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark da inicialização com backlog offline grande
+Execute com: python3 scripts/benchmark_startup.py --codes 10000 100000 200000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Adicionar diretório pai ao path
+sys.path.append(str(Path(__file__).parent.parent))
+# Logs das execuções ficam fora do repositório
+os.environ.setdefault("BARCODE_LOGS_DIR", os.path.join(tempfile.gettempdir(), "barcode-logs"))
+
+from src.http_client import HttpClient
+from src.pending_store import PendingJournal, SegmentedPendingLog, SQLitePendingStore
+from src.records import PendingRecord
+from src.utils import make_idempotency_key
+from scripts.benchmark_sync import BenchActivation, BenchDataSync
+
+
+def write_backlog(store, count: int):
+    """Grava backlog de `count` códigos no armazenamento"""
+    now = datetime.now().isoformat()
+    records = []
+    for i in range(count):
+        record_id = store.next_id()
+        code = f"789{i:010d}"
+        records.append(PendingRecord(record_id, code, now, BenchActivation.device_id,
+                                     idempotency_key=make_idempotency_key(BenchActivation.device_id, record_id, code, now)))
+    if isinstance(store, PendingJournal):
+        store.compact(records)
+    elif isinstance(store, SegmentedPendingLog):
+        for record in records:
+            store.append(record)
+    else:
+        store._insert(records)
+    store.close()
+
+
+def eager_load(store) -> float:
+    """Carga completa no construtor, como era feito antes"""
+    start = time.perf_counter()
+    records = [PendingRecord.from_dict(r) for r in store.load().values()]
+    elapsed = time.perf_counter() - start
+    store.close()
+    assert records
+    return elapsed
+
+
+def lazy_start(store):
+    """Construtor + varredura + primeiro bloco (o que a sincronização espera para começar)"""
+    start = time.perf_counter()
+    sync = BenchDataSync(BenchActivation(), HttpClient("http://127.0.0.1:1"), store=store)
+    constructed = time.perf_counter() - start
+    sync._open_store()
+    scanned = time.perf_counter() - start
+    sync._load_next_chunk()
+    first_chunk = time.perf_counter() - start
+    pending = sync.get_sync_status()['pending_count']
+    store.close()
+    return constructed, scanned, first_chunk, pending
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da inicialização com backlog")
+    parser.add_argument('--codes', type=int, nargs='+', default=[10000, 100000, 200000])
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        backends = (
+            ('journal', lambda path: PendingJournal(path.with_suffix('.journal'), tmp / 'pendentes.csv')),
+            ('segments', lambda path: SegmentedPendingLog(path, tmp / 'nenhum.journal', tmp / 'pendentes.csv')),
+            ('sqlite', lambda path: SQLitePendingStore(path.with_suffix('.db'), tmp / 'pendentes.csv',
+                                                       tmp / 'nenhum.journal')),
+        )
+        for count in args.codes:
+            print(f"🚀 Backlog de {count} códigos")
+            for name, open_store in backends:
+                path = tmp / f"{name}_{count}"
+                write_backlog(open_store(path), count)
+                eager = eager_load(open_store(path))
+                constructed, scanned, first_chunk, pending = lazy_start(open_store(path))
+                print(f"  {name:>8}: carga completa {eager * 1000:7.0f} ms | construtor {constructed * 1000:5.1f} ms, "
+                      f"varredura {scanned * 1000:6.0f} ms, primeiro bloco {first_chunk * 1000:6.0f} ms "
+                      f"({pending} pendentes)")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
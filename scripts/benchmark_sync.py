@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Benchmark da sincronização contra a API simulada local
+Execute com: python3 scripts/benchmark_sync.py --codes 2000 --latency 0.005
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Adicionar diretório pai ao path
+sys.path.append(str(Path(__file__).parent.parent))
+# Logs das execuções ficam fora do repositório
+os.environ.setdefault("BARCODE_LOGS_DIR", os.path.join(tempfile.gettempdir(), "barcode-logs"))
+
+from config.settings import HTTP_CONFIG, SYNC_CONFIG
+from src.sync import DataSync
+from src.http_client import HttpClient
+from src.connectivity import ConnectivityMonitor
+from src.pending_store import PendingJournal
+from src.records import PendingRecord
+from src.utils import make_idempotency_key
+from scripts.mock_api import MockAPIServer
+
+
+class BenchActivation:
+    """Ativação fixa para o benchmark"""
+    
+    token = "bench-token"
+    device_id = "bench-device"
+    
+    def is_activated(self) -> bool:
+        return True
+
+
+class BenchDataSync(DataSync):
+    """DataSync sem thread de fundo e sempre online"""
+    
+    def start_sync_thread(self):
+        pass
+    
+    def _is_online(self) -> bool:
+        return True
+
+
+def make_codes(count: int, store: PendingJournal):
+    """Gera códigos pendentes como DataSync.add_code e grava no journal"""
+    now = datetime.now()
+    codes = []
+    for i in range(count):
+        record_id = store.next_id()
+        code = f"789{i:010d}"
+        codes.append(PendingRecord(
+            record_id, code, now.isoformat(), BenchActivation.device_id,
+            idempotency_key=make_idempotency_key(BenchActivation.device_id, record_id, code, now.isoformat())
+        ))
+    for code_data in codes:
+        store.append(code_data)
+    return codes
+
+
+def run(mode: str, count: int, latency: float, batch_size: int, in_flight: int, data_dir: Path):
+    """Executa uma rodada e retorna métricas"""
+    SYNC_CONFIG["batch_size"] = batch_size
+    SYNC_CONFIG["max_in_flight"] = in_flight
+    HTTP_CONFIG["pool_maxsize"] = max(HTTP_CONFIG["pool_maxsize"], in_flight)
+    
+    server = MockAPIServer(latency=latency, batch_enabled=(mode == "batch")).start()
+    try:
+        store = PendingJournal(data_dir / f"{mode}_{in_flight}.journal", data_dir / "pendentes.csv")
+        make_codes(count, store)
+        sync = BenchDataSync(BenchActivation(), HttpClient(server.url), store=store)
+        sync._load_remaining()
+        
+        start = time.perf_counter()
+        successful, failed = sync.force_sync()
+        elapsed = time.perf_counter() - start
+    finally:
+        server.stop()
+    
+    return {
+        'mode': mode,
+        'in_flight': in_flight,
+        'codes': count,
+        'successful': successful,
+        'failed': failed,
+        'requests': server.request_count,
+        'seconds': elapsed,
+        'rate': successful / elapsed if elapsed else 0.0
+    }
+
+
+def measure_scan_latency(count: int, latency: float, data_dir: Path):
+    """Mede latência entre DataSync.add_code e a chegada do código no servidor"""
+    server = MockAPIServer(latency=latency).start()
+    try:
+        store = PendingJournal(data_dir / "latency.journal", data_dir / "pendentes.csv")
+        connectivity = ConnectivityMonitor(server.url)
+        sync = DataSync(BenchActivation(), HttpClient(server.url), connectivity, store)
+        
+        deadline = time.monotonic() + 10
+        while not connectivity.is_online() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        
+        samples = []
+        for i in range(count):
+            start = time.perf_counter()
+            sync.add_code(f"LAT{i:06d}", datetime.now())
+            if not server.wait_for_codes(i + 1):
+                break
+            samples.append(time.perf_counter() - start)
+            time.sleep(0.01)
+        
+        sync.stop_sync_thread()
+    finally:
+        server.stop()
+    
+    samples.sort()
+    if not samples:
+        return None
+    return {
+        'samples': len(samples),
+        'p50': samples[len(samples) // 2],
+        'p99': samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da sincronização")
+    parser.add_argument('--codes', type=int, default=2000)
+    parser.add_argument('--latency', type=float, default=0.005, help="Latência simulada por requisição (segundos)")
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--in-flight', type=int, nargs='+', default=[1, 4], help="Envios simultâneos a comparar")
+    parser.add_argument('--scans', type=int, default=100, help="Leituras para medir latência leitura→servidor")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"📊 {args.codes} códigos, latência {args.latency * 1000:.1f}ms, lote {args.batch_size}")
+        for mode in ("single", "batch"):
+            for in_flight in args.in_flight:
+                result = run(mode, args.codes, args.latency, args.batch_size, in_flight, Path(tmp))
+                print(f"  {result['mode']:>6} x{result['in_flight']}: {result['successful']}/{result['codes']} em {result['seconds']:.2f}s "
+                      f"({result['rate']:.0f} códigos/s, {result['requests']} requisições)")
+        
+        result = measure_scan_latency(args.scans, args.latency, Path(tmp))
+        if result:
+            print(f"  leitura→servidor: p50 {result['p50'] * 1000:.1f}ms, p99 {result['p99'] * 1000:.1f}ms "
+                  f"({result['samples']} leituras)")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Verifica o limite da fila em memória (SCANNER_CONFIG["max_buffer_size"]) num período offline longo
+Execute com: python3 scripts/check_buffer_limit.py --codes 20000 --max-buffer 1000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+# Adicionar diretório pai ao path
+sys.path.append(str(Path(__file__).parent.parent))
+# Logs das execuções ficam fora do repositório
+os.environ.setdefault("BARCODE_LOGS_DIR", os.path.join(tempfile.gettempdir(), "barcode-logs"))
+
+from config.settings import SCANNER_CONFIG
+from src.http_client import HttpClient
+from src.pending_store import PendingJournal, SegmentedPendingLog, SQLitePendingStore
+from scripts.benchmark_sync import BenchActivation, BenchDataSync
+from scripts.mock_api import MockAPIServer
+
+
+class OfflineDataSync(BenchDataSync):
+    """BenchDataSync com conexão controlada pelo teste"""
+    
+    online = False
+    
+    def _is_online(self) -> bool:
+        return self.online
+
+
+def open_store(backend: str, data_dir: Path):
+    if backend == "sqlite":
+        return SQLitePendingStore(data_dir / "pendentes.db", data_dir / "nenhum.csv", data_dir / "nenhum.journal")
+    if backend == "journal":
+        return PendingJournal(data_dir / "pendentes.journal", data_dir / "nenhum.csv")
+    return SegmentedPendingLog(data_dir / "pendentes", data_dir / "nenhum.journal", data_dir / "nenhum.csv")
+
+
+def check(backend: str, count: int, data_dir: Path, max_rounds: int = 1000) -> bool:
+    """Lê `count` códigos offline, reconecta e sincroniza tudo"""
+    server = MockAPIServer().start()
+    try:
+        store = open_store(backend, data_dir)
+        sync = OfflineDataSync(BenchActivation(), HttpClient(server.url), store=store)
+        
+        tracemalloc.start()
+        now = datetime.now()
+        for i in range(count):
+            sync.add_code(f"789{i:010d}", now)
+        store.flush()
+        offline_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        offline = sync.get_buffer_stats()
+        
+        # Reconectado: a thread de sincronização repete _sync_all_pending
+        # enquanto há códigos a ler (e espaço na fila)
+        sync.online = True
+        rounds = 0
+        while sync._pending_count() and rounds < max_rounds:
+            sync._sync_all_pending()
+            rounds += 1
+        stats = sync.get_buffer_stats()
+        store.close()
+    finally:
+        server.stop()
+    
+    ok = (server.received_codes == count and stats['peak_resident'] <= sync.max_resident
+          and not sync._pending_count())
+    print(f"  {'✅' if ok else '❌'} {backend:>8}: offline {offline['resident']} em memória, "
+          f"{offline['spilled']} só em disco (pico {offline_peak / 1024:.0f} KiB) | "
+          f"{server.received_codes}/{count} sincronizados em {rounds} rodadas, "
+          f"pico em memória {stats['peak_resident']}/{sync.max_resident}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verificação do limite da fila em memória")
+    parser.add_argument('--codes', type=int, default=20000)
+    parser.add_argument('--max-buffer', type=int, default=1000, help="SCANNER_CONFIG['max_buffer_size']")
+    parser.add_argument('--backends', nargs='+', default=['segments', 'journal', 'sqlite'],
+                        choices=['segments', 'journal', 'sqlite'])
+    args = parser.parse_args()
+    SCANNER_CONFIG["max_buffer_size"] = args.max_buffer
+    
+    print(f"📦 {args.codes} leituras offline, fila em memória de {args.max_buffer} códigos")
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in args.backends:
+            data_dir = Path(tmp) / backend
+            data_dir.mkdir()
+            results.append(check(backend, args.codes, data_dir))
+    
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Verifica a conexão e desconexão a quente de scanners com a captura rodando
+Execute com: python3 scripts/check_hotplug.py --cycles 20
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Adicionar diretório pai ao path
+sys.path.append(str(Path(__file__).parent.parent))
+# Logs das execuções ficam fora do repositório
+os.environ.setdefault("BARCODE_LOGS_DIR", os.path.join(tempfile.gettempdir(), "barcode-logs"))
+
+from config.settings import SCANNER_CONFIG
+from src.device_manager import InputDeviceManager
+from src.input_reader import pack_events
+from src.keymap import text_to_events
+from src.scanner import BarcodeScanner
+
+
+class FifoDeviceManager(InputDeviceManager):
+    """Reconhece FIFOs eventN como scanners (evdev não abre FIFOs)"""
+    
+    def probe(self, device_path):
+        return f"FIFO {os.path.basename(device_path)}" if os.path.exists(device_path) else None
+    
+    def discover(self):
+        return [path for path in self.list_event_nodes() if self.probe(path)]
+
+
+class HotplugScanner(BarcodeScanner):
+    """Scanner real com /dev/input trocado por um diretório temporário"""
+    
+    input_dir = None
+    
+    def _find_scanner_devices(self):
+        if not isinstance(self.device_manager, FifoDeviceManager):
+            self.device_manager = FifoDeviceManager(self.input_dir)
+        super()._find_scanner_devices()
+
+
+def wait_for(condition, timeout: float = 2.0) -> float:
+    """Espera condition() ficar verdadeira; retorna o tempo em ms (ou inf)"""
+    start = time.perf_counter()
+    while not condition():
+        if time.perf_counter() - start > timeout:
+            return float('inf')
+        time.sleep(0.0005)
+    return (time.perf_counter() - start) * 1000
+
+
+class Harness:
+    def __init__(self, input_dir: str):
+        self.input_dir = input_dir
+        self.writers = {}
+        self.received = []
+        self.lock = threading.Lock()
+        HotplugScanner.input_dir = input_dir
+        self.scanner = HotplugScanner()
+        self.scanner.set_callback(self.on_scan)
+    
+    def on_scan(self, code, timestamp, metadata=None):
+        with self.lock:
+            self.received.append(((metadata or {}).get('source_device'), code))
+    
+    def path(self, index: int) -> str:
+        return os.path.join(self.input_dir, f"event{index}")
+    
+    def is_open(self, path: str) -> bool:
+        return path in self.scanner.get_scanner_status()['devices']
+    
+    def plug(self, index: int) -> float:
+        """Cria o nó (com um escritor aberto) e mede até o scanner abri-lo"""
+        path = self.path(index)
+        os.mkfifo(path)
+        self.writers[path] = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+        return wait_for(lambda: self.is_open(path))
+    
+    def unplug(self, index: int) -> float:
+        path = self.path(index)
+        os.unlink(path)
+        elapsed = wait_for(lambda: not self.is_open(path))
+        os.close(self.writers.pop(path))
+        return elapsed
+    
+    def scan(self, index: int, code: str) -> bool:
+        path = self.path(index)
+        expected = (path, code)
+        os.write(self.writers[path], pack_events(text_to_events(code)))
+        return wait_for(lambda: expected in self.received) != float('inf')
+    
+    def close(self):
+        self.scanner.stop_capture()
+        for fd in self.writers.values():
+            os.close(fd)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verificação de conexão a quente de scanners")
+    parser.add_argument('--cycles', type=int, default=20, help="Ciclos de desconectar/reconectar")
+    args = parser.parse_args()
+    
+    SCANNER_CONFIG["raw_input"] = True
+    ok = True
+    
+    def report(passed: bool, message: str):
+        nonlocal ok
+        ok = ok and passed
+        print(f"  {'✅' if passed else '❌'} {message}")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        harness = Harness(tmp)
+        scanner = harness.scanner
+        try:
+            report(scanner.start_capture(), "captura iniciada sem nenhum dispositivo")
+            report(scanner.get_scanner_status()['hotplug'], "inotify ativo")
+            thread = scanner.scanner_thread
+            
+            elapsed = harness.plug(0)
+            report(elapsed < 1000 and harness.scan(0, "7891234567895"),
+                   f"scanner conectado com a captura rodando em {elapsed:.1f} ms, leitura entregue")
+            
+            plug_times, unplug_times = [], []
+            for cycle in range(args.cycles):
+                unplug_times.append(harness.unplug(0))
+                plug_times.append(harness.plug(0))
+                if not harness.scan(0, f"PED-{cycle:05d}"):
+                    report(False, f"leitura perdida após reconexão {cycle + 1}")
+                    break
+            report(max(plug_times + unplug_times) < 1000,
+                   f"{args.cycles} ciclos desconectar/reconectar: conexão em "
+                   f"{sum(plug_times) / len(plug_times):.2f} ms (máx. {max(plug_times):.2f}), "
+                   f"desconexão em {sum(unplug_times) / len(unplug_times):.2f} ms")
+            
+            # Segundo scanner entra sem afetar o primeiro
+            harness.plug(1)
+            report(harness.scan(1, "SEGUNDO-1") and harness.scan(0, "PRIMEIRO-1"),
+                   "segundo scanner conectado, os dois lendo")
+            
+            # Permissão alterada (IN_ATTRIB) em nó já aberto não duplica o dispositivo
+            os.chmod(harness.path(0), 0o600)
+            time.sleep(0.05)
+            paths = scanner.get_scanner_status()['device_paths']
+            report(sorted(paths) == [harness.path(0), harness.path(1)], f"IN_ATTRIB ignorado: {len(paths)} dispositivos")
+            
+            # refresh_devices() com a captura rodando não reinicia a thread
+            harness.plug(2)  # fica aberto pelo inotify; o refresh não deve reabrir nada
+            scanner.refresh_devices()
+            time.sleep(0.05)
+            report(scanner.scanner_thread is thread and scanner.is_running and harness.scan(2, "TERCEIRO-1"),
+                   "refresh_devices() sem parar a captura")
+            
+            missing = [code for code in ("7891234567895", "SEGUNDO-1", "PRIMEIRO-1", "TERCEIRO-1")
+                       if code not in [received for _, received in harness.received]]
+            report(not missing, f"{len(harness.received)} leituras recebidas, nenhuma perdida")
+            report(thread.is_alive(), f"mesma thread de captura do início ({scanner.get_scanner_status()['loop_wakeups']} acordadas)")
+        finally:
+            harness.close()
+    
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Verifica que reenvios não duplicam leituras na API simulada
+Execute com: python3 scripts/check_idempotency.py --codes 500 --lost-rate 0.3
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Adicionar diretório pai ao path
+sys.path.append(str(Path(__file__).parent.parent))
+# Logs das execuções ficam fora do repositório
+os.environ.setdefault("BARCODE_LOGS_DIR", os.path.join(tempfile.gettempdir(), "barcode-logs"))
+
+from src.http_client import HttpClient
+from config.settings import STORAGE_CONFIG
+from src.pending_store import SegmentedPendingLog
+from scripts.benchmark_sync import BenchActivation, BenchDataSync, make_codes
+from scripts.mock_api import MockAPIServer
+
+
+def check(mode: str, count: int, lost_rate: float, data_dir: Path, max_rounds: int = 20) -> bool:
+    """Sincroniza até esvaziar a fila e confere contagem única no servidor"""
+    server = MockAPIServer(batch_enabled=(mode == "batch"), lost_response_rate=lost_rate).start()
+    try:
+        store = SegmentedPendingLog(data_dir / mode, data_dir / "nenhum.journal", data_dir / "pendentes.csv")
+        make_codes(count, store)
+        sync = BenchDataSync(BenchActivation(), HttpClient(server.url), store=store)
+        sync.max_retries = max_rounds
+        sync._load_remaining()
+        
+        rounds = 0
+        while sync.pending_codes and rounds < max_rounds:
+            sync.force_sync()
+            rounds += 1
+    finally:
+        server.stop()
+    
+    store.flush()
+    left = sorted(p.name for p in (data_dir / mode).glob("seg-*.journal"))
+    ok = server.received_codes == count and not sync.pending_codes and len(left) <= 1
+    print(f"  {'✅' if ok else '❌'} {mode:>6}: {server.received_codes}/{count} códigos únicos, "
+          f"{server.duplicate_codes} reenvios descartados, {rounds} rodadas, "
+          f"{store.deleted_segments} segmentos apagados, restantes: {left}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verificação das chaves de idempotência")
+    parser.add_argument('--codes', type=int, default=500)
+    parser.add_argument('--lost-rate', type=float, default=0.3,
+                        help="Fração de respostas perdidas após o registro no servidor")
+    parser.add_argument('--segment-records', type=int, default=100)
+    args = parser.parse_args()
+    STORAGE_CONFIG["segment_records"] = args.segment_records
+    
+    print(f"🔁 {args.codes} códigos, {args.lost_rate:.0%} das respostas perdidas")
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [check(mode, args.codes, args.lost_rate, Path(tmp)) for mode in ("single", "batch")]
+    
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Teste de estresse com vários scanners lendo ao mesmo tempo
+Execute com: python3 scripts/check_multi_scanner.py --devices 4 --scans 500
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+# Adicionar diretório pai ao path
+sys.path.append(str(Path(__file__).parent.parent))
+# Logs das execuções ficam fora do repositório
+os.environ.setdefault("BARCODE_LOGS_DIR", os.path.join(tempfile.gettempdir(), "barcode-logs"))
+
+from config.settings import SCANNER_CONFIG
+from src.input_reader import pack_events
+from src.keymap import text_to_events
+from src.scanner import BarcodeScanner, MockScanner
+
+
+class FifoScanner(BarcodeScanner):
+    """Scanner real lendo de FIFOs no lugar de /dev/input/eventN"""
+    
+    fifo_paths = []
+    
+    def _find_scanner_devices(self):
+        self.device_paths = list(self.fifo_paths)
+        self.device_manager.directory = os.path.dirname(self.fifo_paths[0])
+
+
+def make_payloads(device: int, scans: int) -> list:
+    """Leituras de um scanner: maiúsculas e símbolos (Shift) e um EAN comum a todos"""
+    payloads = [f"PED-{device}{i:05d}/Lote#{i % 97}" if i % 2 else f"789{device}{i:09d}" for i in range(scans)]
+    payloads[scans // 2] = "7891234567895"  # mesmo produto em todas as bancadas
+    return payloads
+
+
+def interleave(streams: dict, seed: int) -> list:
+    """Mistura os eventos dos dispositivos em pedaços de 1 a 8 eventos"""
+    rng = random.Random(seed)
+    positions = {device: 0 for device in streams}
+    order = []
+    while positions:
+        device = rng.choice(list(positions))
+        start = positions[device]
+        end = min(start + rng.randint(1, 8), len(streams[device]))
+        order.append((device, streams[device][start:end]))
+        if end == len(streams[device]):
+            del positions[device]
+        else:
+            positions[device] = end
+    return order
+
+
+def check_shared_state(order: list, expected: dict) -> int:
+    """Um único buffer para todos os dispositivos (comportamento anterior)"""
+    codes = []
+    scanner = MockScanner()
+    scanner.key_timeout = float('inf')
+    scanner.recent_codes.window = 0
+    scanner.set_callback(lambda code, timestamp, metadata=None: codes.append(code))
+    for _, events in order:
+        for code, value in events:
+            scanner._process_key(code, value)
+    valid = {payload for payloads in expected.values() for payload in payloads}
+    return sum(1 for code in codes if code in valid)
+
+
+def check_per_device(order: list, expected: dict, fifos: list, timeout: float) -> bool:
+    """Scanner real com um FIFO por dispositivo, escritas intercaladas"""
+    received = defaultdict(list)
+    untagged = []
+    total = sum(len(payloads) for payloads in expected.values())
+    done = threading.Event()
+    lock = threading.Lock()
+    
+    def on_scan(code, timestamp, metadata=None):
+        with lock:
+            source = (metadata or {}).get('source_device')
+            if source is None:
+                untagged.append(code)
+            else:
+                received[source].append(code)
+            if sum(len(codes) for codes in received.values()) + len(untagged) >= total:
+                done.set()
+    
+    FifoScanner.fifo_paths = fifos
+    scanner = FifoScanner()
+    scanner.recent_codes.window = 1.0  # A leitura comum não pode ser descartada entre bancadas
+    scanner.set_callback(on_scan)
+    
+    # Escritores abertos antes da captura: sem eles o FIFO sinaliza fim de arquivo
+    writers = {path: os.open(path, os.O_RDWR) for path in fifos}
+    try:
+        scanner.start_capture()
+        start = time.perf_counter()
+        for device, events in order:
+            os.write(writers[device], pack_events(events))
+        done.wait(timeout)
+        elapsed = time.perf_counter() - start
+        status = scanner.get_scanner_status()
+        scanner.stop_capture()
+    finally:
+        for fd in writers.values():
+            os.close(fd)
+    
+    ok = not untagged
+    for device in fifos:
+        correct = received[device] == expected[device]
+        ok = ok and correct
+        scans = status['devices'].get(device, {}).get('scans', 0)
+        print(f"    {'✅' if correct else '❌'} {os.path.basename(device)}: "
+              f"{len(received[device])}/{len(expected[device])} leituras na ordem, {scans} no status")
+    if untagged:
+        print(f"    ❌ {len(untagged)} leituras sem source_device")
+    events = sum(len(events) for _, events in order)
+    print(f"    {events} eventos de tecla em {elapsed * 1000:.0f} ms ({events / elapsed:,.0f} eventos/s)")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estresse de vários scanners simultâneos")
+    parser.add_argument('--devices', type=int, default=4)
+    parser.add_argument('--scans', type=int, default=500, help="Leituras por scanner")
+    parser.add_argument('--layout', choices=['us', 'abnt2'], default='us')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--timeout', type=float, default=30.0)
+    args = parser.parse_args()
+    
+    SCANNER_CONFIG["keyboard_layout"] = args.layout
+    SCANNER_CONFIG["raw_input"] = True
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        fifos = []
+        for i in range(args.devices):
+            path = os.path.join(tmp, f"event{i}")
+            os.mkfifo(path)
+            fifos.append(path)
+        
+        expected = {path: make_payloads(i, args.scans) for i, path in enumerate(fifos)}
+        streams = {
+            path: [event for payload in payloads for event in text_to_events(payload, args.layout)]
+            for path, payloads in expected.items()
+        }
+        order = interleave(streams, args.seed)
+        total = args.devices * args.scans
+        print(f"🔀 {args.devices} scanners x {args.scans} leituras intercaladas em {len(order)} pedaços "
+              f"(layout {args.layout})")
+        
+        valid = check_shared_state(order, expected)
+        print(f"  Buffer único: {valid}/{total} leituras válidas")
+        
+        print("  Estado por dispositivo:")
+        ok = check_per_device(order, expected, fifos, args.timeout)
+    
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Verifica e mede o leitor direto de struct input_event (RawEventReader)
+Execute com: python3 scripts/check_raw_reader.py --scans 2000
+Gravar leituras reais: python3 scripts/check_raw_reader.py --record /dev/input/event3 --output leituras.bin --seconds 10
+Reproduzir gravação:   python3 scripts/check_raw_reader.py --replay leituras.bin
+"""
+
+import argparse
+import os
+import random
+import select
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Adicionar diretório pai ao path
+sys.path.append(str(Path(__file__).parent.parent))
+# Logs das execuções ficam fora do repositório
+os.environ.setdefault("BARCODE_LOGS_DIR", os.path.join(tempfile.gettempdir(), "barcode-logs"))
+
+import evdev
+from evdev import _input
+
+from config.settings import SCANNER_CONFIG
+from src.input_reader import RawEventReader, pack_events
+from src.keymap import text_to_events
+from src.scanner import MockScanner
+
+
+def make_scanner(layout: str, codes: list) -> MockScanner:
+    """Scanner simulado que só acumula os códigos decodificados"""
+    SCANNER_CONFIG["keyboard_layout"] = layout
+    scanner = MockScanner()
+    scanner.key_timeout = float('inf')
+    scanner.recent_codes.window = 0
+    scanner.set_callback(lambda code, timestamp, metadata=None: codes.append(code))
+    return scanner
+
+
+def read_until_eof(fd: int, scanner: MockScanner) -> RawEventReader:
+    reader = RawEventReader(fd)
+    while True:
+        select.select([fd], [], [])
+        try:
+            reader.read_keys(scanner._process_key)
+        except EOFError:
+            return reader
+
+
+def check_pipe(payloads: list, layout: str) -> bool:
+    """Envia as leituras por um pipe em pedaços aleatórios (eventos partidos)"""
+    data = b''.join(pack_events(text_to_events(payload, layout)) for payload in payloads)
+    read_fd, write_fd = os.pipe()
+    os.set_blocking(read_fd, False)
+    
+    def writer():
+        position = 0
+        while position < len(data):
+            size = random.randint(1, 4096)
+            position += os.write(write_fd, data[position:position + size])
+        os.close(write_fd)
+    
+    codes = []
+    thread = threading.Thread(target=writer)
+    thread.start()
+    reader = read_until_eof(read_fd, make_scanner(layout, codes))
+    thread.join()
+    os.close(read_fd)
+    
+    ok = codes == payloads
+    print(f"  {'✅' if ok else '❌'} pipe: {len(codes)}/{len(payloads)} leituras corretas, "
+          f"{reader.events_read} eventos lidos, {reader.key_events} de tecla")
+    return ok
+
+
+def benchmark(payloads: list, layout: str, data_dir: Path):
+    """Custo por evento: evdev (InputEvent por evento) x leitura direta"""
+    path = data_dir / "eventos.bin"
+    path.write_bytes(b''.join(pack_events(text_to_events(payload, layout)) for payload in payloads))
+    
+    def evdev_path(scanner):
+        fd = os.open(path, os.O_RDONLY)
+        count = 0
+        try:
+            while True:
+                events = _input.device_read_many(fd)
+                if not events:
+                    return count
+                for event in (evdev.InputEvent(*event) for event in events):
+                    count += 1
+                    if event.type == evdev.ecodes.EV_KEY and scanner:
+                        scanner._process_key_event(event)
+        finally:
+            os.close(fd)
+    
+    def raw_path(scanner):
+        fd = os.open(path, os.O_RDONLY)
+        reader = RawEventReader(fd)
+        handler = scanner._process_key if scanner else (lambda code, value: None)
+        try:
+            while True:
+                reader.read_keys(handler)
+        except EOFError:
+            return reader.events_read
+        finally:
+            os.close(fd)
+    
+    for decode in (False, True):
+        print(f"  {'leitura e decodificação' if decode else 'só leitura'}:")
+        for name, run in (("evdev InputEvent", evdev_path), ("leitura direta", raw_path)):
+            codes = []
+            scanner = make_scanner(layout, codes) if decode else None
+            start = time.perf_counter()
+            events = run(scanner)
+            elapsed = time.perf_counter() - start
+            print(f"    {name:>16}: {events} eventos em {elapsed * 1000:.1f} ms "
+                  f"({elapsed * 1e9 / events:.0f} ns/evento, {len(codes)} leituras)")
+
+
+def record(device: str, output: Path, seconds: float):
+    """Grava os bytes crus de um dispositivo para reprodução posterior"""
+    fd = os.open(device, os.O_RDONLY | os.O_NONBLOCK)
+    deadline = time.monotonic() + seconds
+    size = 0
+    with open(output, 'wb') as f:
+        while time.monotonic() < deadline:
+            ready, _, _ = select.select([fd], [], [], max(0.0, deadline - time.monotonic()))
+            if ready:
+                data = os.read(fd, 4096)
+                f.write(data)
+                size += len(data)
+    os.close(fd)
+    print(f"💾 {size} bytes gravados de {device} em {output}")
+
+
+def replay(path: Path, layout: str):
+    codes = []
+    fd = os.open(path, os.O_RDONLY)
+    read_until_eof(fd, make_scanner(layout, codes))
+    os.close(fd)
+    print(f"▶️  {len(codes)} leituras em {path}")
+    for code in codes:
+        print(f"  {code}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verificação do leitor direto de eventos")
+    parser.add_argument('--scans', type=int, default=2000)
+    parser.add_argument('--layout', choices=['us', 'abnt2'], default='us')
+    parser.add_argument('--record', metavar='DISPOSITIVO', help="Grava eventos de /dev/input/eventN")
+    parser.add_argument('--output', type=Path, default=Path("leituras.bin"))
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--replay', type=Path, help="Decodifica um arquivo gravado com --record")
+    args = parser.parse_args()
+    
+    if args.record:
+        record(args.record, args.output, args.seconds)
+        return
+    if args.replay:
+        replay(args.replay, args.layout)
+        return
+    
+    payloads = [f"789{i:010d}" if i % 2 else f"PED-{i:06d}/Lote#{i % 97}" for i in range(args.scans)]
+    print(f"📥 {args.scans} leituras sintéticas (layout {args.layout}, com EV_MSC/EV_SYN)")
+    ok = check_pipe(payloads, args.layout)
+    with tempfile.TemporaryDirectory() as tmp:
+        benchmark(payloads, args.layout, Path(tmp))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
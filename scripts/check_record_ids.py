@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Verifica que IDs de registro não são reutilizados depois de reabrir o armazenamento
+Execute com: python3 scripts/check_record_ids.py --codes 10
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Adicionar diretório pai ao path
+sys.path.append(str(Path(__file__).parent.parent))
+# Logs das execuções ficam fora do repositório
+os.environ.setdefault("BARCODE_LOGS_DIR", os.path.join(tempfile.gettempdir(), "barcode-logs"))
+
+from src.pending_store import PendingJournal, SQLitePendingStore, SegmentedPendingLog
+from scripts.benchmark_sync import make_codes
+
+
+def open_store(backend: str, data_dir: Path):
+    if backend == "sqlite":
+        return SQLitePendingStore(data_dir / "pendentes.db", data_dir / "nenhum.csv", data_dir / "nenhum.journal")
+    if backend == "journal":
+        return PendingJournal(data_dir / "pendentes.journal", data_dir / "nenhum.csv")
+    return SegmentedPendingLog(data_dir / "pendentes", data_dir / "nenhum.journal", data_dir / "nenhum.csv")
+
+
+def reopen(backend: str, data_dir: Path, store) -> int:
+    """Fecha, reabre e retorna o próximo ID reservado"""
+    store.close()
+    store = open_store(backend, data_dir)
+    store.scan()
+    record_id = store.next_id()
+    store.close()
+    return record_id
+
+
+def check(backend: str, count: int, data_dir: Path) -> bool:
+    """compactar → confirmar → reabrir e confirmar tudo → reabrir"""
+    ok = True
+    
+    # Compactação mantém só o primeiro registro, que é confirmado depois
+    store = open_store(backend, data_dir / "compactado")
+    store.scan()
+    codes = make_codes(count, store)
+    store.compact(codes[:1])
+    store.ack([codes[0]['id']])
+    record_id = reopen(backend, data_dir / "compactado", store)
+    passed = record_id > count
+    ok = ok and passed
+    print(f"  {'✅' if passed else '❌'} {backend:>8}: compactar → confirmar → reabrir: próximo ID {record_id} "
+          f"(últimos usados até {count})")
+    
+    # Tudo confirmado, sem compactação
+    store = open_store(backend, data_dir / "confirmado")
+    store.scan()
+    codes = make_codes(count, store)
+    store.ack(code_data['id'] for code_data in codes)
+    record_id = reopen(backend, data_dir / "confirmado", store)
+    passed = record_id > count
+    ok = ok and passed
+    print(f"  {'✅' if passed else '❌'} {backend:>8}: confirmar tudo → reabrir: próximo ID {record_id}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verificação de IDs de registro monotônicos")
+    parser.add_argument('--codes', type=int, default=10)
+    parser.add_argument('--backends', nargs='+', default=['segments', 'journal', 'sqlite'],
+                        choices=['segments', 'journal', 'sqlite'])
+    args = parser.parse_args()
+    
+    print(f"🔢 {args.codes} códigos por armazenamento")
+    with tempfile.TemporaryDirectory() as tmp:
+        results = []
+        for backend in args.backends:
+            data_dir = Path(tmp) / backend
+            (data_dir / "compactado").mkdir(parents=True)
+            (data_dir / "confirmado").mkdir(parents=True)
+            results.append(check(backend, args.codes, data_dir))
+    
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
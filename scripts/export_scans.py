@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Exporta leituras do armazenamento local para CSV ou JSONL (opcionalmente .gz)
+Execute com: python3 scripts/export_scans.py /media/pendrive/leituras.csv.gz --status pending failed
+"""
+
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Adicionar diretório pai ao path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.exporter import ScanExporter
+from src.pending_store import open_pending_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exportação das leituras locais")
+    parser.add_argument('output', type=Path, help="Arquivo de saída (.csv, .jsonl, com .gz opcional)")
+    parser.add_argument('--status', nargs='+', choices=['pending', 'failed', 'synced'],
+                        help="Exporta só leituras com estes status")
+    parser.add_argument('--since', type=datetime.fromisoformat, help="Leituras a partir de (ISO, ex.: 2026-01-31T08:00)")
+    parser.add_argument('--until', type=datetime.fromisoformat, help="Leituras antes de (ISO)")
+    parser.add_argument('--history', action='store_true', help="Inclui leituras já sincronizadas ainda no histórico")
+    parser.add_argument('--chunk-size', type=int, help="Registros lidos por bloco")
+    args = parser.parse_args()
+    
+    store = open_pending_store()
+    exporter = ScanExporter(store, chunk_size=args.chunk_size)
+    
+    def progress(exported: int, scanned: int):
+        print(f"\r  {scanned} lidos, {exported} exportados", end='', flush=True)
+    
+    try:
+        success, count = exporter.export(args.output, statuses=args.status, start=args.since, end=args.until,
+                                         include_history=args.history, progress=progress)
+    finally:
+        store.close()
+    print()
+    
+    if not success:
+        print(f"❌ Falha ao exportar para {args.output}")
+        sys.exit(1)
+    print(f"✅ {count} leituras exportadas para {args.output}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Servidor local que simula a API do sistema de scanner
+Execute com: python3 scripts/mock_api.py --port 8080 --latency 0.02 --error-rate 0.05
+
+Implementa ativação, registro (individual e em lote), status, renovação e
+desativação, com latência, erros 5xx e 429 injetáveis. Contadores em
+GET /_mock/stats.
+"""
+
+import argparse
+import gzip
+import json
+import random
+import secrets
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional
+
+# Adicionar diretório pai ao path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config.settings import API_ENDPOINTS
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class MockAPIHandler(BaseHTTPRequestHandler):
+    """Handler HTTP com os endpoints da API do scanner"""
+    
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # Cabeçalho e corpo são enviados separadamente
+    
+    def log_message(self, format, *args):
+        """Silencia log de requisições"""
+        pass
+    
+    def do_GET(self):
+        if self.path == '/_mock/stats':
+            self._send_json(200, self.server.get_stats())
+        else:
+            self._send_json(404, {'success': False, 'message': 'Endpoint não encontrado'})
+    
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length)
+        server.record_bytes(length)
+        
+        delay = server.latency + (random.uniform(0, server.latency_jitter) if server.latency_jitter else 0)
+        if delay:
+            time.sleep(delay)
+        
+        # Falhas injetadas acontecem antes de o servidor processar a requisição
+        injected = server.injected_failure()
+        if injected == 429:
+            self._send_json(429, {'success': False, 'message': 'Muitas requisições'},
+                            {'Retry-After': str(server.retry_after)})
+            return
+        if injected:
+            self._send_json(injected, {'success': False, 'message': 'Erro simulado do servidor'})
+            return
+        
+        encoding = self.headers.get('Content-Encoding')
+        if encoding and encoding not in server.accept_encodings:
+            self._send_json(415, {'success': False, 'message': f'Codificação {encoding} não suportada'},
+                            {'Accept-Encoding': ', '.join(sorted(server.accept_encodings)) or 'identity'})
+            return
+        
+        try:
+            if encoding == 'gzip':
+                body = gzip.decompress(body)
+            elif encoding == 'zstd':
+                body = zstandard.ZstdDecompressor().decompress(body)
+            data = json.loads(body or b'{}')
+        except ValueError:
+            self._send_json(400, {'success': False, 'message': 'JSON inválido'})
+            return
+        
+        endpoint = server.paths.get(self.path)
+        if endpoint in ('ativar', 'status', 'refresh', 'desativar'):
+            self._send_json(*getattr(server, f"handle_{endpoint}")(data, self._bearer_token()))
+            return
+        
+        if server.require_auth and not server.is_valid_token(self._bearer_token()):
+            self._send_json(401, {'success': False, 'message': 'Token inválido'})
+            return
+        
+        if endpoint == 'registrar':
+            if not data.get('idempotency_key') and self.headers.get('Idempotency-Key'):
+                data['idempotency_key'] = self.headers['Idempotency-Key']
+            server.record_codes([data])
+            response = (200, {'success': True})
+        elif endpoint == 'registrar_lote' and server.batch_enabled:
+            codes = data.get('codes', [])
+            server.record_codes(codes)
+            results = [{'index': i, 'success': True} for i in range(len(codes))]
+            response = (200, {'success': True, 'results': results})
+        else:
+            self._send_json(404, {'success': False, 'message': 'Endpoint não encontrado'})
+            return
+        
+        # Simula resposta perdida depois de o servidor já ter registrado os códigos
+        if server.lost_response_rate and random.random() < server.lost_response_rate:
+            self._send_json(504, {'success': False, 'message': 'Gateway timeout'})
+        else:
+            self._send_json(*response)
+    
+    def _bearer_token(self) -> Optional[str]:
+        auth = self.headers.get('Authorization', '')
+        return auth[len('Bearer '):] if auth.startswith('Bearer ') else None
+    
+    def _send_json(self, status: int, data: Dict, headers: Dict = None):
+        payload = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class MockAPIServer(ThreadingHTTPServer):
+    """Servidor simulado executado em thread própria"""
+    
+    daemon_threads = True
+    
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 latency: float = 0.0, batch_enabled: bool = True,
+                 accept_encodings=('gzip',), lost_response_rate: float = 0.0,
+                 latency_jitter: float = 0.0, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, retry_after: int = 0,
+                 require_auth: bool = False, token_days: int = 365):
+        super().__init__((host, port), MockAPIHandler)
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.batch_enabled = batch_enabled
+        self.lost_response_rate = lost_response_rate
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.require_auth = require_auth
+        self.token_days = token_days
+        self.accept_encodings = set(accept_encodings)
+        if zstandard is None:
+            self.accept_encodings.discard('zstd')
+        self.paths = {path: name for name, path in API_ENDPOINTS.items()}
+        self.tokens: Dict[str, str] = {}  # token -> device_id
+        self.injected = {}  # status -> quantidade de falhas injetadas
+        self.received_codes = 0
+        self.duplicate_codes = 0
+        self.received_bytes = 0
+        self._seen_keys = set()
+        self.request_count = 0
+        self._received = threading.Condition()
+        self._thread = None
+    
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def record_codes(self, codes):
+        """Registra códigos, ignorando reenvios com chave de idempotência já vista"""
+        with self._received:
+            for code in codes:
+                key = code.get('idempotency_key')
+                if key and key in self._seen_keys:
+                    self.duplicate_codes += 1
+                    continue
+                if key:
+                    self._seen_keys.add(key)
+                self.received_codes += 1
+            self.request_count += 1
+            self._received.notify_all()
+    
+    def record_bytes(self, count: int):
+        with self._received:
+            self.received_bytes += count
+    
+    def injected_failure(self) -> Optional[int]:
+        """Sorteia falha injetada: 429 ou 5xx (None = processar normalmente)"""
+        draw = random.random()
+        if draw < self.rate_limit_rate:
+            status = 429
+        elif draw < self.rate_limit_rate + self.error_rate:
+            status = random.choice((500, 502, 503))
+        else:
+            return None
+        with self._received:
+            self.injected[status] = self.injected.get(status, 0) + 1
+        return status
+    
+    def is_valid_token(self, token: Optional[str]) -> bool:
+        return bool(token) and token in self.tokens
+    
+    def _issue_token(self, device_id: str) -> Dict:
+        token = secrets.token_hex(16)
+        with self._received:
+            self.tokens[token] = device_id
+        return {'token': token, 'expiration_date': (datetime.now() + timedelta(days=self.token_days)).isoformat()}
+    
+    def handle_ativar(self, data: Dict, token: Optional[str]):
+        if not data.get('activation_key'):
+            return 400, {'success': False, 'message': 'Chave de ativação ausente'}
+        device_id = f"MOCK-{str(data.get('device_serial') or 'dispositivo')[-8:]}"
+        issued = self._issue_token(device_id)
+        return 200, {'success': True, 'token': issued['token'], 'device_id': device_id,
+                     'activation_date': datetime.now().isoformat(),
+                     'expiration_date': issued['expiration_date']}
+    
+    def handle_status(self, data: Dict, token: Optional[str]):
+        if not self.is_valid_token(token):
+            return 401, {'valid': False, 'message': 'Token não autorizado'}
+        return 200, {'valid': True, 'device_id': self.tokens[token], 'received_codes': self.received_codes}
+    
+    def handle_refresh(self, data: Dict, token: Optional[str]):
+        if not self.is_valid_token(token):
+            return 401, {'success': False, 'message': 'Token não autorizado'}
+        with self._received:
+            device_id = self.tokens.pop(token)
+        issued = self._issue_token(device_id)
+        return 200, {'success': True, 'new_token': issued['token'],
+                     'new_expiration_date': issued['expiration_date']}
+    
+    def handle_desativar(self, data: Dict, token: Optional[str]):
+        with self._received:
+            self.tokens.pop(token, None)
+        return 200, {'success': True}
+    
+    def get_stats(self) -> Dict:
+        """Contadores expostos em GET /_mock/stats"""
+        with self._received:
+            return {
+                'received_codes': self.received_codes,
+                'duplicate_codes': self.duplicate_codes,
+                'received_bytes': self.received_bytes,
+                'requests': self.request_count,
+                'injected': {str(status): count for status, count in self.injected.items()},
+                'active_tokens': len(self.tokens)
+            }
+    
+    def wait_for_codes(self, count: int, timeout: float = 10.0) -> bool:
+        """Aguarda até o servidor ter recebido `count` códigos"""
+        with self._received:
+            return self._received.wait_for(lambda: self.received_codes >= count, timeout)
+    
+    def start(self):
+        """Inicia servidor em background"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        """Para servidor"""
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API simulada do sistema de scanner")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0, help="Latência por requisição (segundos)")
+    parser.add_argument('--no-batch', action='store_true', help="Desabilita endpoint de lote")
+    parser.add_argument('--accept-encoding', nargs='*', default=['gzip'],
+                        help="Codificações de corpo aceitas (vazio = nenhuma)")
+    parser.add_argument('--lost-response-rate', type=float, default=0.0,
+                        help="Fração de respostas trocadas por 504 após registrar os códigos")
+    parser.add_argument('--latency-jitter', type=float, default=0.0,
+                        help="Latência extra aleatória de até N segundos")
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help="Fração de requisições respondidas com 500/502/503 sem processar")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0,
+                        help="Fração de requisições respondidas com 429")
+    parser.add_argument('--retry-after', type=int, default=0, help="Retry-After das respostas 429 (segundos)")
+    parser.add_argument('--require-auth', action='store_true',
+                        help="Exige token emitido por /ativar_raspberry no registro de códigos")
+    args = parser.parse_args()
+    
+    server = MockAPIServer(args.host, args.port, args.latency, not args.no_batch,
+                           args.accept_encoding, args.lost_response_rate,
+                           latency_jitter=args.latency_jitter, error_rate=args.error_rate,
+                           rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after,
+                           require_auth=args.require_auth)
+    print(f"🚀 API simulada em {server.url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
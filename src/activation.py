@@ -9,8 +9,9 @@ from typing import Dict, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
 
-from config.settings import API_BASE_URL, API_ENDPOINTS, TOKEN_FILE
+from config.settings import TOKEN_FILE
 from src.utils import setup_logging, save_json, load_json, get_raspberry_pi_serial
+from src.http_client import get_http_client
 
 
 class DeviceActivation:
@@ -18,6 +19,7 @@ class DeviceActivation:
     
     def __init__(self):
         self.logger = setup_logging("device_activation")
+        self.http_client = get_http_client()
         self.token = None
         self.device_id = None
         self.activation_date = None
@@ -88,16 +90,9 @@ class DeviceActivation:
             }
             
             # Enviar requisição de ativação
-            url = f"{API_BASE_URL}{API_ENDPOINTS['ativar']}"
-            
             self.logger.info(f"Tentando ativar dispositivo com chave: {activation_key[:8]}...")
             
-            response = requests.post(
-                url,
-                json=activation_data,
-                timeout=30,
-                headers={'Content-Type': 'application/json'}
-            )
+            response = self.http_client.post('ativar', json=activation_data)
             
             if response.status_code == 200:
                 response_data = response.json()
@@ -157,23 +152,15 @@ class DeviceActivation:
             return False, "Nenhum token disponível"
         
         try:
-            url = f"{API_BASE_URL}{API_ENDPOINTS['status']}"
-            
-            headers = {
-                'Authorization': f'Bearer {self.token}',
-                'Content-Type': 'application/json'
-            }
-            
             data = {
                 'device_id': self.device_id,
                 'timestamp': datetime.now().isoformat()
             }
             
-            response = requests.post(
-                url,
-                json=data,
-                headers=headers,
-                timeout=30
+            response = self.http_client.post(
+                'status',
+                token=self.token,
+                json=data
             )
             
             if response.status_code == 200:
@@ -211,23 +198,15 @@ class DeviceActivation:
                 return True, "Token ainda válido por mais de 24 horas"
         
         try:
-            url = f"{API_BASE_URL}/refresh_token"  # Endpoint para renovação
-            
-            headers = {
-                'Authorization': f'Bearer {self.token}',
-                'Content-Type': 'application/json'
-            }
-            
             data = {
                 'device_id': self.device_id,
                 'timestamp': datetime.now().isoformat()
             }
             
-            response = requests.post(
-                url,
-                json=data,
-                headers=headers,
-                timeout=30
+            response = self.http_client.post(
+                'refresh',
+                token=self.token,
+                json=data
             )
             
             if response.status_code == 200:
@@ -306,24 +285,16 @@ class DeviceActivation:
         try:
             if self.token:
                 # Notificar servidor sobre desativação
-                url = f"{API_BASE_URL}/desativar_dispositivo"
-                
-                headers = {
-                    'Authorization': f'Bearer {self.token}',
-                    'Content-Type': 'application/json'
-                }
-                
                 data = {
                     'device_id': self.device_id,
                     'timestamp': datetime.now().isoformat()
                 }
                 
                 try:
-                    response = requests.post(
-                        url,
-                        json=data,
-                        headers=headers,
-                        timeout=30
+                    response = self.http_client.post(
+                        'desativar',
+                        token=self.token,
+                        json=data
                     )
                     
                     if response.status_code == 200:
@@ -14,12 +14,13 @@ import sys
 # Adicionar diretório pai ao path para imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from config.settings import GUI_CONFIG
+from config.settings import DAEMON_CONFIG, GUI_CONFIG
 from src.utils import setup_logging, is_raspberry_pi
 from src.network import NetworkManager
 from src.activation import DeviceActivation
 from src.scanner import BarcodeScanner, MockScanner
 from src.sync import DataSync
+from src.daemon_client import DaemonClient
 from src.datetime_config import DateTimeManager
 
 
@@ -39,20 +40,29 @@ class ScannerApp:
         self.activation_manager = DeviceActivation()
         self.datetime_manager = DateTimeManager()
         
-        # Usar scanner simulado se não for Raspberry Pi
-        if is_raspberry_pi():
-            self.scanner = BarcodeScanner()
+        if DAEMON_CONFIG["enabled"]:
+            # Captura e sincronização no daemon (src/daemon.py); o cliente
+            # faz o papel de scanner e de sincronização para a interface
+            self.daemon_client = DaemonClient()
+            self.scanner = self.daemon_client
+            self.data_sync = self.daemon_client
+            self.scanner.set_callback(self._on_scan_recorded)
         else:
-            self.scanner = MockScanner()
-        
-        self.data_sync = DataSync(self.activation_manager)
-        
-        # Configurar callback do scanner
-        self.scanner.set_callback(self._on_barcode_scanned)
+            self.daemon_client = None
+            
+            # Usar scanner simulado se não for Raspberry Pi
+            if is_raspberry_pi():
+                self.scanner = BarcodeScanner()
+            else:
+                self.scanner = MockScanner()
+            
+            self.data_sync = DataSync(self.activation_manager)
+            
+            # Configurar callback do scanner
+            self.scanner.set_callback(self._on_barcode_scanned)
         
         # Estado da aplicação
         self.current_frame = None
-        self.scanned_codes = []
         self.is_activated = False
         
         # Criar janela principal
@@ -640,21 +650,17 @@ class ScannerApp:
         else:
             self.logger.error("Falha ao iniciar scanner")
     
-    def _on_barcode_scanned(self, code: str, timestamp: datetime):
+    def _on_barcode_scanned(self, code: str, timestamp: datetime, metadata: Dict = None):
         """Callback chamado quando um código é escaneado"""
         self.logger.info(f"Código escaneado: {code}")
         
-        # Adicionar à lista local
-        code_data = {
-            'code': code,
-            'timestamp': timestamp,
-            'formatted_time': timestamp.strftime("%d/%m/%Y %H:%M:%S")
-        }
-        self.scanned_codes.append(code_data)
-        
-        # Adicionar para sincronização
-        self.data_sync.add_code(code, timestamp)
+        # Adicionar para sincronização (o histórico da tela lê os mesmos registros)
+        self.data_sync.add_code(code, timestamp, metadata)
         
+        self._on_scan_recorded(code, timestamp, metadata)
+    
+    def _on_scan_recorded(self, code: str, timestamp: datetime = None, metadata: Dict = None):
+        """Atualiza a interface após a leitura ser gravada (aqui ou no daemon)"""
         # Atualizar interface se estiver na tela de scanner
         if hasattr(self, 'codes_textbox'):
             self._update_codes_display()
@@ -699,13 +705,13 @@ class ScannerApp:
         
         self.codes_textbox.delete("1.0", "end")
         
-        if not self.scanned_codes:
+        # Mostrar últimos 50 códigos
+        recent_codes = self.data_sync.get_recent_scans(50)
+        
+        if not recent_codes:
             self.codes_textbox.insert("1.0", "Nenhum código escaneado ainda.")
             return
         
-        # Mostrar últimos 50 códigos
-        recent_codes = self.scanned_codes[-50:]
-        
         for code_data in reversed(recent_codes):
             line = f"{code_data['formatted_time']} - {code_data['code']}\n"
             self.codes_textbox.insert("1.0", line)
@@ -798,13 +804,17 @@ class ScannerApp:
         """Trata fechamento da aplicação"""
         self.logger.info("Aplicação sendo fechada")
         
-        # Parar scanner
-        if hasattr(self, 'scanner'):
-            self.scanner.stop_capture()
-        
-        # Parar sincronização
-        if hasattr(self, 'data_sync'):
-            self.data_sync.stop_sync_thread()
+        if getattr(self, 'daemon_client', None):
+            # Captura e sincronização continuam no daemon
+            self.daemon_client.close()
+        else:
+            # Parar scanner
+            if hasattr(self, 'scanner'):
+                self.scanner.stop_capture()
+            
+            # Parar sincronização
+            if hasattr(self, 'data_sync'):
+                self.data_sync.stop_sync_thread()
         
         # Fechar aplicação
         self.root.quit()
@@ -836,4 +846,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
\ No newline at end of file
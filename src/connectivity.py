@@ -0,0 +1,134 @@
+"""
+Módulo de monitoramento de conectividade com a API
+"""
+
+import socket
+import threading
+import time
+from typing import Callable, Dict, List
+from urllib.parse import urlparse
+
+from config.settings import API_BASE_URL, CONNECTIVITY_CONFIG
+from src.utils import setup_logging
+
+
+class ConnectivityMonitor:
+    """Verifica a conectividade com o host da API em background
+    
+    O estado fica em cache e pode ser consultado sem bloqueio. Ouvintes são
+    notificados quando o estado muda (online/offline).
+    """
+    
+    def __init__(self, base_url: str = API_BASE_URL):
+        self.logger = setup_logging("connectivity")
+        parsed = urlparse(base_url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or (443 if parsed.scheme == "https" else 80)
+        self.probe_interval = CONNECTIVITY_CONFIG["probe_interval"]
+        self.offline_probe_interval = CONNECTIVITY_CONFIG["offline_probe_interval"]
+        self.probe_timeout = CONNECTIVITY_CONFIG["probe_timeout"]
+        self.ttl = CONNECTIVITY_CONFIG["ttl"]
+        
+        self._online = False
+        self._checked_at = None
+        self._listeners: List[Callable[[bool], None]] = []
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self.is_running = False
+        self.monitor_thread = None
+    
+    def start(self):
+        """Inicia thread de verificação"""
+        if self.is_running:
+            return
+        
+        self.is_running = True
+        self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
+        self.monitor_thread.start()
+        self.logger.info(f"Monitor de conectividade iniciado para {self.host}:{self.port}")
+    
+    def stop(self):
+        """Para thread de verificação"""
+        self.is_running = False
+        self._wakeup.set()
+        if self.monitor_thread:
+            self.monitor_thread.join(timeout=self.probe_timeout + 1)
+        self.logger.info("Monitor de conectividade parado")
+    
+    def is_online(self) -> bool:
+        """Retorna estado em cache (sem bloqueio)
+        
+        Um estado mais antigo que o TTL é considerado offline.
+        """
+        checked_at = self._checked_at
+        if checked_at is None or time.monotonic() - checked_at > self.ttl:
+            return False
+        return self._online
+    
+    def add_listener(self, callback: Callable[[bool], None]):
+        """Registra callback chamado com o novo estado quando ele muda"""
+        with self._lock:
+            self._listeners.append(callback)
+    
+    def remove_listener(self, callback: Callable[[bool], None]):
+        """Remove callback registrado"""
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+    
+    def request_probe(self):
+        """Solicita nova verificação imediata"""
+        self._wakeup.set()
+    
+    def report_success(self):
+        """Registra comunicação bem-sucedida com a API"""
+        self._set_state(True)
+    
+    def report_failure(self):
+        """Registra falha de rede e agenda nova verificação"""
+        self._set_state(False)
+        self._wakeup.set()
+    
+    def get_status(self) -> Dict:
+        """Retorna status do monitor"""
+        checked_at = self._checked_at
+        return {
+            'online': self.is_online(),
+            'host': self.host,
+            'port': self.port,
+            'seconds_since_check': time.monotonic() - checked_at if checked_at is not None else None
+        }
+    
+    def _probe(self) -> bool:
+        """Testa conexão TCP com o host da API"""
+        try:
+            with socket.create_connection((self.host, self.port), timeout=self.probe_timeout):
+                return True
+        except OSError:
+            return False
+    
+    def _monitor_loop(self):
+        """Loop de verificação periódica"""
+        while self.is_running:
+            self._wakeup.clear()
+            self._set_state(self._probe())
+            
+            interval = self.probe_interval if self._online else self.offline_probe_interval
+            self._wakeup.wait(interval)
+    
+    def _set_state(self, online: bool):
+        """Atualiza estado e notifica ouvintes se mudou"""
+        with self._lock:
+            changed = online != self._online or self._checked_at is None
+            self._online = online
+            self._checked_at = time.monotonic()
+            listeners = list(self._listeners) if changed else []
+        
+        if changed:
+            self.logger.info(f"Conectividade com a API: {'online' if online else 'offline'}")
+        
+        for callback in listeners:
+            try:
+                callback(online)
+            except Exception as e:
+                self.logger.error(f"Erro no callback de conectividade: {e}")
\ No newline at end of file
@@ -0,0 +1,307 @@
+"""
+Daemon de captura e sincronização, separado do processo da interface
+"""
+
+import argparse
+import json
+import os
+import queue
+import signal
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+# Adicionar diretório pai ao path para imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import DAEMON_CONFIG, DAEMON_SOCKET_FILE
+from src.utils import setup_logging, is_raspberry_pi
+from src.activation import DeviceActivation
+from src.scanner import BarcodeScanner, MockScanner
+from src.sync import DataSync
+from src.daemon_client import encode_message
+
+
+class _ClientConnection:
+    """Cliente conectado: mensagens são enviadas por uma thread própria
+    
+    A fila é limitada para que um cliente travado (ex.: interface congelada)
+    nunca bloqueie a captura; se encher, o cliente é desconectado.
+    """
+    
+    def __init__(self, sock: socket.socket, queue_size: int):
+        self.sock = sock
+        self.outbox = queue.Queue(maxsize=queue_size)
+        self.closed = False
+        self.writer_thread = threading.Thread(target=self._write_loop, name="daemon_client_writer", daemon=True)
+        self.writer_thread.start()
+    
+    def send(self, message: Dict) -> bool:
+        """Enfileira mensagem sem bloquear; False se o cliente não acompanha"""
+        if self.closed:
+            return False
+        try:
+            self.outbox.put_nowait(encode_message(message))
+            return True
+        except queue.Full:
+            return False
+    
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+        try:
+            self.outbox.put_nowait(None)  # Acorda a thread de envio
+        except queue.Full:
+            pass
+    
+    def _write_loop(self):
+        while not self.closed:
+            data = self.outbox.get()
+            if data is None:
+                break
+            # Junta o que acumulou em um único envio
+            chunks = [data]
+            while True:
+                try:
+                    data = self.outbox.get_nowait()
+                except queue.Empty:
+                    break
+                if data is None:
+                    break
+                chunks.append(data)
+            try:
+                self.sock.sendall(b''.join(chunks))
+            except OSError:
+                break
+        self.close()
+
+
+class CaptureDaemon:
+    """Processo dono do scanner (evdev) e do armazenamento de pendentes
+    
+    Captura e sincronização rodam fora do processo da interface: redesenhos
+    da tela não disputam o GIL com a leitura das teclas, e uma falha da
+    interface não perde leituras. A interface conecta via socket Unix
+    (DaemonClient) para receber as leituras e consultar o status.
+    
+    `enable_simulation` expõe o comando simulate_burst (leituras sintéticas
+    no armazenamento real); só para --mock e benchmarks.
+    """
+    
+    def __init__(self, socket_path: Optional[Path] = None, scanner=None,
+                 data_sync: Optional[DataSync] = None, activation_manager=None,
+                 enable_simulation: bool = False):
+        self.logger = setup_logging("capture_daemon")
+        self.socket_path = Path(socket_path or DAEMON_SOCKET_FILE)
+        self.queue_size = DAEMON_CONFIG["client_queue_size"]
+        self.activation_manager = activation_manager or DeviceActivation()
+        
+        # Usar scanner simulado se não for Raspberry Pi
+        if scanner is None:
+            scanner = BarcodeScanner() if is_raspberry_pi() else MockScanner()
+        self.scanner = scanner
+        self.data_sync = data_sync or DataSync(self.activation_manager)
+        self.scanner.set_callback(self._on_barcode_scanned)
+        
+        self.is_running = False
+        self.server_socket = None
+        self.accept_thread = None
+        self._clients = []
+        self._clients_lock = threading.Lock()
+        self._stopped = threading.Event()
+        
+        self.commands = {
+            'ping': lambda request: True,
+            'status': self._cmd_status,
+            'recent_scans': self._cmd_recent_scans,
+            'start_capture': self._cmd_start_capture,
+            'force_sync': lambda request: list(self.data_sync.force_sync()),
+        }
+        # Comandos demorados rodam em thread própria para não atrasar as demais consultas
+        self.slow_commands = {'force_sync'}
+        if enable_simulation and isinstance(self.scanner, MockScanner):
+            self.commands['simulate_burst'] = self._cmd_simulate_burst
+            self.slow_commands.add('simulate_burst')
+    
+    def start(self) -> bool:
+        """Abre o socket e inicia a captura (se o dispositivo estiver ativado)"""
+        if self.is_running:
+            return True
+        
+        try:
+            if self.socket_path.exists():
+                self.socket_path.unlink()  # Socket de execução anterior
+            self.server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.server_socket.bind(str(self.socket_path))
+            os.chmod(self.socket_path, 0o660)
+            self.server_socket.listen(4)
+        except Exception as e:
+            self.logger.error(f"Erro ao abrir socket {self.socket_path}: {e}")
+            return False
+        
+        self.is_running = True
+        self._stopped.clear()
+        self.accept_thread = threading.Thread(target=self._accept_loop, name="daemon_accept", daemon=True)
+        self.accept_thread.start()
+        
+        if self.activation_manager.is_activated():
+            self.scanner.start_capture()
+        else:
+            self.logger.info("Dispositivo não ativado: captura aguardando a interface")
+        
+        self.logger.info(f"Daemon de captura ouvindo em {self.socket_path}")
+        return True
+    
+    def serve_forever(self):
+        """Executa até stop() (ex.: SIGTERM)"""
+        if self.start():
+            self._stopped.wait()
+    
+    def stop(self):
+        """Para captura, sincronização e desconecta clientes"""
+        if not self.is_running:
+            return
+        self.is_running = False
+        
+        try:
+            self.server_socket.close()
+        except Exception:
+            pass
+        with self._clients_lock:
+            clients, self._clients = self._clients, []
+        for client in clients:
+            client.close()
+        
+        self.scanner.stop_capture()
+        self.data_sync.stop_sync_thread()
+        try:
+            self.socket_path.unlink()
+        except OSError:
+            pass
+        
+        self.logger.info("Daemon de captura parado")
+        self._stopped.set()
+    
+    def _on_barcode_scanned(self, code: str, timestamp, metadata: Dict = None):
+        """Grava a leitura e a repassa às interfaces conectadas"""
+        captured_at = time.monotonic()
+        self.data_sync.add_code(code, timestamp, metadata)
+        self._broadcast({
+            'event': 'scan',
+            'code': code,
+            'timestamp': timestamp.isoformat(),
+            'metadata': metadata,
+            'captured_at': captured_at  # relógio monotônico, comum aos processos
+        })
+    
+    def _broadcast(self, message: Dict):
+        with self._clients_lock:
+            clients = list(self._clients)
+        for client in clients:
+            if not client.send(message):
+                self.logger.warning("Cliente não acompanha as leituras, desconectando")
+                self._drop_client(client)
+    
+    def _drop_client(self, client: _ClientConnection):
+        with self._clients_lock:
+            if client in self._clients:
+                self._clients.remove(client)
+        client.close()
+    
+    def _accept_loop(self):
+        while self.is_running:
+            try:
+                sock, _ = self.server_socket.accept()
+            except OSError:
+                if self.is_running:
+                    self.logger.error("Erro ao aceitar conexão no socket do daemon")
+                    time.sleep(0.1)
+                continue
+            
+            client = _ClientConnection(sock, self.queue_size)
+            with self._clients_lock:
+                self._clients.append(client)
+            threading.Thread(target=self._client_loop, args=(client,), name="daemon_client_reader",
+                             daemon=True).start()
+            self.logger.info("Interface conectada ao daemon")
+    
+    def _client_loop(self, client: _ClientConnection):
+        """Lê consultas de um cliente até a desconexão"""
+        try:
+            with client.sock.makefile('rb') as reader:
+                for line in reader:
+                    try:
+                        request = json.loads(line)
+                    except ValueError:
+                        self.logger.warning("Consulta inválida ignorada")
+                        continue
+                    
+                    if request.get('cmd') in self.slow_commands:
+                        threading.Thread(target=self._handle_request, args=(client, request),
+                                         daemon=True).start()
+                    else:
+                        self._handle_request(client, request)
+        except (OSError, ValueError):
+            pass
+        
+        self._drop_client(client)
+        self.logger.info("Interface desconectada do daemon")
+    
+    def _handle_request(self, client: _ClientConnection, request: Dict):
+        command = self.commands.get(request.get('cmd'))
+        try:
+            result = command(request) if command else None
+            if command is None:
+                self.logger.warning(f"Comando desconhecido: {request.get('cmd')}")
+        except Exception as e:
+            self.logger.error(f"Erro ao executar {request.get('cmd')}: {e}")
+            result = None
+        client.send({'id': request.get('id'), 'result': result})
+    
+    def _cmd_status(self, request: Dict) -> Dict:
+        return {
+            'scanner': self.scanner.get_scanner_status(),
+            'sync': self.data_sync.get_sync_status()
+        }
+    
+    def _cmd_recent_scans(self, request: Dict):
+        return [record.to_display_dict() for record in self.data_sync.get_recent_scans(request.get('limit'))]
+    
+    def _cmd_start_capture(self, request: Dict) -> bool:
+        """Relê o token (a ativação é feita pela interface) e inicia a captura"""
+        self.activation_manager.load_token()
+        if not self.activation_manager.is_activated():
+            self.logger.warning("Captura não iniciada: dispositivo não ativado")
+            return False
+        return self.scanner.is_running or self.scanner.start_capture()
+    
+    def _cmd_simulate_burst(self, request: Dict):
+        lateness = self.scanner.simulate_burst(int(request['count']), float(request['interval']))
+        return [round(value * 1000, 3) for value in lateness]
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Daemon de captura e sincronização")
+    parser.add_argument('--socket', type=Path, default=DAEMON_SOCKET_FILE, help="Caminho do socket Unix")
+    parser.add_argument('--mock', action='store_true', help="Usar scanner simulado (habilita simulate_burst)")
+    args = parser.parse_args()
+    
+    daemon = CaptureDaemon(args.socket, scanner=MockScanner() if args.mock else None,
+                           enable_simulation=args.mock)
+    signal.signal(signal.SIGTERM, lambda signum, frame: daemon.stop())
+    signal.signal(signal.SIGINT, lambda signum, frame: daemon.stop())
+    daemon.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,201 @@
+"""
+Módulo cliente do daemon de captura/sincronização (usado pela interface)
+"""
+
+import itertools
+import json
+import queue
+import socket
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config.settings import DAEMON_CONFIG, DAEMON_SOCKET_FILE
+from src.persist_writer import LatencyStats
+from src.utils import setup_logging
+
+
+def encode_message(message: Dict) -> bytes:
+    """Codifica mensagem do protocolo: uma linha JSON por mensagem"""
+    return (json.dumps(message, separators=(',', ':'), ensure_ascii=False, default=str) + '\n').encode('utf-8')
+
+
+class DaemonClient:
+    """Cliente do daemon de captura via socket Unix
+    
+    O daemon (src/daemon.py) é dono do scanner e do armazenamento de
+    pendentes; a interface só recebe eventos de leitura e faz consultas.
+    Oferece os métodos de BarcodeScanner e DataSync usados pela interface, de
+    modo que a tela funciona igual nos dois modos. Se o daemon reiniciar, o
+    cliente reconecta sozinho; a captura não depende da interface.
+    
+    Protocolo: linhas JSON. Consultas {"id", "cmd", ...} recebem
+    {"id", "result"}; leituras chegam como {"event": "scan", ...}.
+    
+    O callback das leituras roda numa thread própria, nunca na thread que lê
+    o socket: assim ele pode fazer consultas (ex.: get_recent_scans()) sem
+    esperar por uma resposta que só a thread de leitura entregaria.
+    """
+    
+    def __init__(self, socket_path: Optional[Path] = None):
+        self.logger = setup_logging("daemon_client")
+        self.socket_path = Path(socket_path or DAEMON_SOCKET_FILE)
+        self.request_timeout = DAEMON_CONFIG["request_timeout"]
+        self.reconnect_interval = DAEMON_CONFIG["reconnect_interval"]
+        self.callback = None
+        self.delivery_latency = LatencyStats()  # captura no daemon -> chegada na interface
+        
+        self._sock = None
+        self._send_lock = threading.Lock()
+        self._responses: Dict[int, Dict] = {}
+        self._ids = itertools.count(1)
+        self._connected = threading.Event()
+        self._closing = False
+        self._scans = queue.Queue()
+        self._callback_thread = threading.Thread(target=self._deliver_scans, name="daemon_client_callback", daemon=True)
+        self._callback_thread.start()
+        self._thread = threading.Thread(target=self._run, name="daemon_client", daemon=True)
+        self._thread.start()
+    
+    def set_callback(self, callback: Callable[..., None]):
+        """Define callback das leituras: (código, timestamp[, metadados])"""
+        self.callback = callback
+    
+    def wait_connected(self, timeout: Optional[float] = None) -> bool:
+        """Aguarda conexão com o daemon"""
+        return self._connected.wait(timeout)
+    
+    def request(self, cmd: str, timeout: Optional[float] = None, **args) -> Any:
+        """Envia consulta ao daemon e retorna o resultado (None se indisponível)"""
+        if not self._connected.is_set():
+            return None
+        
+        request_id = next(self._ids)
+        waiter = {'done': threading.Event(), 'result': None}
+        self._responses[request_id] = waiter
+        try:
+            with self._send_lock:
+                self._sock.sendall(encode_message(dict(args, id=request_id, cmd=cmd)))
+            if not waiter['done'].wait(self.request_timeout if timeout is None else timeout):
+                self.logger.warning(f"Daemon não respondeu a {cmd}")
+            return waiter['result']
+        except Exception as e:
+            self.logger.error(f"Erro ao consultar daemon ({cmd}): {e}")
+            return None
+        finally:
+            self._responses.pop(request_id, None)
+    
+    def start_capture(self) -> bool:
+        """Pede ao daemon para iniciar a captura (ex.: após a ativação)"""
+        return bool(self.request('start_capture'))
+    
+    def get_scanner_status(self) -> Dict:
+        """Retorna status do scanner no daemon"""
+        status = self.request('status')
+        if not status:
+            return {'running': False, 'devices_found': 0, 'daemon_connected': False}
+        return dict(status['scanner'], daemon_connected=True)
+    
+    def get_sync_status(self) -> Dict:
+        """Retorna status da sincronização no daemon"""
+        status = self.request('status')
+        return status['sync'] if status else {}
+    
+    def get_recent_scans(self, limit: Optional[int] = None) -> List[Dict]:
+        """Retorna últimas leituras (dicts com formatted_time, code e status)"""
+        return self.request('recent_scans', limit=limit) or []
+    
+    def force_sync(self) -> Tuple[int, int]:
+        """Força sincronização no daemon"""
+        result = self.request('force_sync', timeout=DAEMON_CONFIG["force_sync_timeout"])
+        return tuple(result) if result else (0, 0)
+    
+    def simulate_burst(self, count: int, interval: float) -> List[float]:
+        """Simula leituras no daemon (scanner simulado) e retorna os atrasos de agendamento"""
+        return self.request('simulate_burst', timeout=count * interval + 30,
+                            count=count, interval=interval) or []
+    
+    def close(self):
+        """Desconecta do daemon (a captura continua)"""
+        self._closing = True
+        self._disconnect()
+        self._thread.join(timeout=2)
+        self._scans.put(None)
+        self._callback_thread.join(timeout=2)
+    
+    def _run(self):
+        """Conecta, lê mensagens e reconecta se o daemon cair"""
+        while not self._closing:
+            try:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.connect(str(self.socket_path))
+            except OSError as e:
+                sock.close()
+                self.logger.debug(f"Daemon indisponível em {self.socket_path}: {e}")
+                time.sleep(self.reconnect_interval)
+                continue
+            
+            self._sock = sock
+            self._connected.set()
+            self.logger.info(f"Conectado ao daemon em {self.socket_path}")
+            try:
+                with sock.makefile('rb') as reader:
+                    for line in reader:
+                        self._handle_message(line)
+            except (OSError, ValueError):
+                pass
+            
+            self._disconnect()
+            if not self._closing:
+                self.logger.warning("Conexão com o daemon perdida, reconectando")
+                time.sleep(self.reconnect_interval)
+    
+    def _handle_message(self, line: bytes):
+        try:
+            message = json.loads(line)
+        except ValueError:
+            self.logger.warning("Mensagem inválida do daemon ignorada")
+            return
+        
+        if message.get('event') == 'scan':
+            if message.get('captured_at') is not None:
+                self.delivery_latency.record(time.monotonic() - message['captured_at'])
+            self._scans.put(message)
+            return
+        
+        waiter = self._responses.get(message.get('id'))
+        if waiter is not None:
+            waiter['result'] = message.get('result')
+            waiter['done'].set()
+    
+    def _deliver_scans(self):
+        """Entrega leituras ao callback, em ordem, fora da thread do socket"""
+        while True:
+            message = self._scans.get()
+            if message is None:
+                break
+            if not self.callback:
+                continue
+            try:
+                timestamp = datetime.fromisoformat(message['timestamp'])
+                if message.get('metadata'):
+                    self.callback(message['code'], timestamp, message['metadata'])
+                else:
+                    self.callback(message['code'], timestamp)
+            except Exception as e:
+                self.logger.error(f"Erro no callback: {e}")
+    
+    def _disconnect(self):
+        """Fecha o socket e libera consultas em espera"""
+        self._connected.clear()
+        sock, self._sock = self._sock, None
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+        for waiter in list(self._responses.values()):
+            waiter['done'].set()
\ No newline at end of file
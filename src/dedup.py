@@ -0,0 +1,81 @@
+"""
+Módulo de supressão de leituras repetidas do scanner
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+
+class RecentCodeFilter:
+    """LRU de códigos recentes com expiração por janela de tempo
+    
+    Um código é considerado repetido se foi lido há menos de `window` segundos
+    (contados da última leitura, então um gatilho segurado continua sendo
+    suprimido). Entradas expiradas saem pela frente do OrderedDict e o total
+    é limitado a `max_entries`, então cada leitura custa O(1) amortizado e a
+    memória não cresce com o volume de leituras.
+    """
+    
+    def __init__(self, window: float = 1.0, max_entries: int = 256):
+        self.window = window
+        self.max_entries = max(1, max_entries)
+        self._recent: "OrderedDict[Hashable, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.accepted = 0
+        self.repeated = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+    
+    def is_repeat(self, code: Hashable, now: Optional[float] = None) -> bool:
+        """Registra leitura e retorna True se o código foi lido dentro da janela
+        
+        `code` pode ser qualquer chave (ex.: tupla dispositivo e código).
+        """
+        if not self.enabled:
+            self.accepted += 1
+            return False
+        
+        now = time.monotonic() if now is None else now
+        
+        with self._lock:
+            self._expire(now)
+            
+            last_seen = self._recent.get(code)
+            self._recent[code] = now
+            self._recent.move_to_end(code)
+            
+            if last_seen is not None:
+                self.repeated += 1
+                return True
+            
+            if len(self._recent) > self.max_entries:
+                self._recent.popitem(last=False)
+            self.accepted += 1
+            return False
+    
+    def clear(self):
+        """Esquece códigos recentes (contadores são mantidos)"""
+        with self._lock:
+            self._recent.clear()
+    
+    def get_stats(self) -> Dict:
+        """Retorna contadores de supressão"""
+        return {
+            'window': self.window,
+            'accepted': self.accepted,
+            'repeated': self.repeated,
+            'tracked': len(self._recent)
+        }
+    
+    def _expire(self, now: float):
+        """Remove da frente os códigos cuja janela já passou"""
+        cutoff = now - self.window
+        while self._recent:
+            code, last_seen = next(iter(self._recent.items()))
+            if last_seen > cutoff:
+                break
+            self._recent.popitem(last=False)
\ No newline at end of file
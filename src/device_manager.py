@@ -0,0 +1,166 @@
+"""
+Módulo de descoberta e conexão a quente de dispositivos de entrada (inotify)
+"""
+
+import ctypes
+import os
+import struct
+from typing import List, Optional, Tuple
+
+import evdev
+
+from src.utils import setup_logging
+
+# inotify(7): máscaras de eventos e struct inotify_event (wd, mask, cookie, len)
+IN_ATTRIB = 0x00000004
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+INOTIFY_EVENT = struct.Struct('iIII')
+
+SCANNER_KEYWORDS = ('scanner', 'barcode', 'usb')
+
+
+class InputDeviceManager:
+    """Descobre scanners em /dev/input e acompanha conexões e desconexões
+    
+    discover() lista os nós eventN com os.scandir() e identifica os
+    scanners pelo nome. watch() abre um descritor inotify sobre o diretório
+    para ser incluído no loop de captura; read_changes() traduz os eventos
+    em ('added' | 'removed' | 'rescan', caminho). Nós novos são avisados em
+    IN_CREATE e de novo em IN_ATTRIB, porque o udev só libera a permissão
+    depois de criar o nó.
+    """
+    
+    def __init__(self, directory: str = "/dev/input"):
+        self.logger = setup_logging("device_manager")
+        self.directory = directory
+        self.inotify_fd = None
+        self.changes_seen = 0
+    
+    def list_event_nodes(self) -> List[str]:
+        """Caminhos dos nós eventN, em ordem numérica"""
+        try:
+            with os.scandir(self.directory) as entries:
+                names = [entry.name for entry in entries if self.is_event_node(entry.name)]
+        except OSError as e:
+            self.logger.error(f"Erro ao listar dispositivos de entrada: {e}")
+            return []
+        names.sort(key=lambda name: int(name[5:]))
+        return [os.path.join(self.directory, name) for name in names]
+    
+    @staticmethod
+    def is_event_node(name: str) -> bool:
+        return name.startswith("event") and name[5:].isdigit()
+    
+    def probe(self, device_path: str) -> Optional[str]:
+        """Nome do dispositivo se ele parece um scanner; None caso contrário"""
+        try:
+            device = evdev.InputDevice(device_path)
+        except OSError as e:
+            self.logger.debug(f"Erro ao verificar dispositivo {device_path}: {e}")
+            return None
+        
+        try:
+            # Scanner simula teclado; geralmente tem nome específico ou é um teclado USB
+            if evdev.ecodes.EV_KEY not in device.capabilities():
+                return None
+            device_name = device.name.lower()
+            if any(keyword in device_name for keyword in SCANNER_KEYWORDS):
+                return device.name
+            return None
+        finally:
+            device.close()
+    
+    def discover(self) -> List[str]:
+        """Procura scanners; sem nenhum, usa o primeiro teclado como reserva"""
+        nodes = self.list_event_nodes()
+        found = []
+        for device_path in nodes:
+            name = self.probe(device_path)
+            if name:
+                self.logger.info(f"Scanner encontrado: {name} em {device_path}")
+                found.append(device_path)
+        
+        if not found:
+            self.logger.warning("Nenhum scanner encontrado. Tentando usar teclado padrão...")
+            keyboard = self._find_fallback_keyboard(nodes)
+            if keyboard:
+                found.append(keyboard)
+        return found
+    
+    def _find_fallback_keyboard(self, nodes: List[str]) -> Optional[str]:
+        """Primeiro dispositivo com teclas, usado quando nenhum scanner é reconhecido"""
+        for device_path in nodes:
+            try:
+                device = evdev.InputDevice(device_path)
+            except OSError:
+                continue
+            try:
+                if evdev.ecodes.EV_KEY in device.capabilities():
+                    self.logger.info(f"Usando teclado padrão: {device.name} em {device_path}")
+                    return device_path
+            finally:
+                device.close()
+        return None
+    
+    def watch(self) -> Optional[int]:
+        """Abre o inotify sobre o diretório e retorna o descritor (None se indisponível)"""
+        if self.inotify_fd is not None:
+            return self.inotify_fd
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd < 0:
+                raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+            if libc.inotify_add_watch(fd, os.fsencode(self.directory), IN_CREATE | IN_DELETE | IN_ATTRIB) < 0:
+                error = ctypes.get_errno()
+                os.close(fd)
+                raise OSError(error, os.strerror(error))
+        except (AttributeError, OSError) as e:
+            self.logger.warning(f"Monitoramento de {self.directory} indisponível, sem conexão a quente: {e}")
+            return None
+        
+        self.inotify_fd = fd
+        self.logger.info(f"Monitorando conexões de dispositivos em {self.directory}")
+        return fd
+    
+    def read_changes(self) -> List[Tuple[str, str]]:
+        """Lê eventos pendentes do inotify como (tipo, caminho)
+        
+        'rescan' (sem caminho) indica que a fila do kernel transbordou e a
+        lista de dispositivos deve ser refeita.
+        """
+        changes = []
+        while True:
+            try:
+                data = os.read(self.inotify_fd, 4096)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            
+            offset = 0
+            while offset + INOTIFY_EVENT.size <= len(data):
+                _, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                name = data[offset + INOTIFY_EVENT.size:offset + INOTIFY_EVENT.size + length]
+                offset += INOTIFY_EVENT.size + length
+                
+                if mask & IN_Q_OVERFLOW:
+                    changes.append(('rescan', None))
+                    continue
+                name = os.fsdecode(name.split(b'\0', 1)[0])
+                if not self.is_event_node(name):
+                    continue
+                
+                device_path = os.path.join(self.directory, name)
+                changes.append(('removed' if mask & IN_DELETE else 'added', device_path))
+        
+        self.changes_seen += len(changes)
+        return changes
+    
+    def close(self):
+        """Para de monitorar o diretório"""
+        if self.inotify_fd is not None:
+            os.close(self.inotify_fd)
+            self.inotify_fd = None
\ No newline at end of file
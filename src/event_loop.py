@@ -0,0 +1,136 @@
+"""
+Módulo do loop de eventos da captura (epoll)
+"""
+
+import os
+import select
+import threading
+from collections import deque
+from typing import Callable, Dict
+
+from src.utils import setup_logging
+
+
+class EpollLoop:
+    """Despacha descritores prontos para leitura, sem timeout de polling
+    
+    run() bloqueia em epoll.poll() sem timeout: sem leituras a thread não
+    acorda. stop() e call_soon() (de qualquer thread) sinalizam por um
+    eventfd, ou por um pipe onde não houver eventfd. Descritores podem ser
+    incluídos e removidos com o loop rodando; o handler recebe o descritor
+    pronto.
+    """
+    
+    def __init__(self):
+        self.logger = setup_logging("epoll_loop")
+        self._epoll = select.epoll()
+        self._handlers: Dict[int, Callable[[int], None]] = {}
+        self._lock = threading.Lock()
+        self._stopped = False
+        self._closed = False
+        self._callbacks = deque()
+        self.wakeups = 0  # Retornos de epoll.poll(), para medir acordadas ociosas
+        
+        if hasattr(os, 'eventfd'):
+            self._wake_read = self._wake_write = os.eventfd(0, os.EFD_NONBLOCK | os.EFD_CLOEXEC)
+        else:
+            self._wake_read, self._wake_write = os.pipe()
+            os.set_blocking(self._wake_read, False)
+            os.set_blocking(self._wake_write, False)
+        self._epoll.register(self._wake_read, select.EPOLLIN)
+    
+    def add(self, fd: int, handler: Callable[[int], None]):
+        """Monitora `fd`; handler(fd) é chamado quando houver dados ou erro"""
+        with self._lock:
+            self._handlers[fd] = handler
+            self._epoll.register(fd, select.EPOLLIN)
+    
+    def remove(self, fd: int):
+        """Deixa de monitorar `fd` (antes de fechá-lo)"""
+        with self._lock:
+            if self._handlers.pop(fd, None) is None:
+                return
+            try:
+                self._epoll.unregister(fd)
+            except (OSError, ValueError):
+                pass  # Já fechado
+    
+    def __len__(self) -> int:
+        return len(self._handlers)
+    
+    def run(self):
+        """Despacha eventos até stop() (um loop parado não é reiniciado)"""
+        while not self._stopped:
+            events = self._epoll.poll()
+            self.wakeups += 1
+            for fd, _ in events:
+                if fd == self._wake_read:
+                    self._drain_wakeup()
+                    self._run_callbacks()
+                    continue
+                
+                handler = self._handlers.get(fd)
+                if handler is None:
+                    continue
+                try:
+                    handler(fd)
+                except Exception as e:
+                    self.logger.error(f"Erro ao tratar descritor {fd}: {e}")
+    
+    def call_soon(self, callback: Callable[[], None]):
+        """Executa callback() na thread do loop (para alterar descritores de fora dela)
+        
+        Depois de close() o callback é descartado: não há mais loop para executá-lo.
+        """
+        if self._closed:
+            return
+        self._callbacks.append(callback)
+        self._wakeup()
+    
+    def stop(self):
+        """Encerra run() (pode ser chamado de outra thread, antes ou durante run())"""
+        self._stopped = True
+        self._wakeup()
+    
+    def _wakeup(self):
+        # Com o lock, close() não fecha o descritor entre a verificação e a
+        # escrita; depois dele o número pode já pertencer a outro arquivo
+        with self._lock:
+            if self._closed:
+                return
+            try:
+                if self._wake_read == self._wake_write:
+                    os.eventfd_write(self._wake_write, 1)
+                else:
+                    os.write(self._wake_write, b'\0')
+            except (BlockingIOError, OSError):
+                pass  # Já sinalizado
+    
+    def close(self):
+        """Libera o epoll e o descritor de parada (stop() e call_soon() viram no-op)"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._epoll.close()
+            os.close(self._wake_read)
+            if self._wake_write != self._wake_read:
+                os.close(self._wake_write)
+    
+    def _run_callbacks(self):
+        while self._callbacks:
+            callback = self._callbacks.popleft()
+            try:
+                callback()
+            except Exception as e:
+                self.logger.error(f"Erro ao executar tarefa no loop: {e}")
+    
+    def _drain_wakeup(self):
+        try:
+            if self._wake_read == self._wake_write:
+                os.eventfd_read(self._wake_read)
+            else:
+                while os.read(self._wake_read, 512):
+                    pass
+        except BlockingIOError:
+            pass
\ No newline at end of file
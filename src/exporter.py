@@ -0,0 +1,117 @@
+"""
+Módulo de exportação das leituras (pendentes e histórico) em streaming
+"""
+
+import csv
+import gzip
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from config.settings import STORAGE_CONFIG
+from src.records import PendingRecord
+from src.utils import setup_logging
+
+
+class ScanExporter:
+    """Exporta leituras direto do armazenamento, bloco a bloco
+    
+    Os registros são lidos com store.iter_export() e gravados à medida que
+    chegam, então a memória usada não depende do tamanho do backlog. O
+    formato vem da extensão: .csv ou .jsonl, com .gz para compressão gzip.
+    O arquivo é gravado com nome temporário e renomeado no fim, para que um
+    pendrive removido no meio não deixe uma exportação incompleta com o
+    nome final.
+    """
+    
+    CSV_FIELDS = PendingRecord.FIELDS + ('formatted_time', 'extra')
+    
+    def __init__(self, store, chunk_size: Optional[int] = None):
+        self.logger = setup_logging("scan_exporter")
+        self.store = store
+        self.chunk_size = max(1, chunk_size or STORAGE_CONFIG["load_chunk_size"])
+    
+    @staticmethod
+    def detect_format(file_path: Path) -> Tuple[str, bool]:
+        """Retorna (formato, comprimido) a partir da extensão do arquivo"""
+        suffixes = [suffix.lower() for suffix in Path(file_path).suffixes]
+        compressed = bool(suffixes) and suffixes[-1] == '.gz'
+        if compressed:
+            suffixes = suffixes[:-1]
+        fmt = 'jsonl' if suffixes and suffixes[-1] in ('.jsonl', '.json') else 'csv'
+        return fmt, compressed
+    
+    def export(self, file_path, statuses: Optional[Iterable[str]] = None,
+               start: Optional[datetime] = None, end: Optional[datetime] = None,
+               include_history: bool = False,
+               progress: Optional[Callable[[int, int], None]] = None) -> Tuple[bool, int]:
+        """Exporta leituras filtradas por status e intervalo [start, end)
+        
+        `progress(exportados, lidos)` é chamado após cada bloco. Retorna
+        (sucesso, quantidade exportada).
+        """
+        file_path = Path(file_path)
+        fmt, compressed = self.detect_format(file_path)
+        statuses = set(statuses) if statuses else None
+        tmp_path = file_path.with_name(file_path.name + '.tmp')
+        
+        exported = 0
+        scanned = 0
+        try:
+            with self._open_output(tmp_path, compressed) as output:
+                if fmt == 'csv':
+                    writer = csv.DictWriter(output, fieldnames=self.CSV_FIELDS, extrasaction='ignore')
+                    writer.writeheader()
+                
+                for chunk in self.store.iter_export(self.chunk_size, include_history=include_history):
+                    scanned += len(chunk)
+                    for record in chunk:
+                        if not self._matches(record, statuses, start, end):
+                            continue
+                        record = PendingRecord.from_dict(record)
+                        if fmt == 'csv':
+                            row = record.to_display_dict()
+                            row['extra'] = json.dumps(record.extra, ensure_ascii=False) if record.extra else ''
+                            writer.writerow(row)
+                        else:
+                            output.write(json.dumps(record.to_display_dict(), ensure_ascii=False) + '\n')
+                        exported += 1
+                    
+                    if progress:
+                        progress(exported, scanned)
+            
+            # Garante os dados no dispositivo (ex.: pendrive) antes do nome final
+            fd = os.open(tmp_path, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            os.replace(tmp_path, file_path)
+            self.logger.info(f"Exportados {exported} de {scanned} registros para {file_path}")
+            return True, exported
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao exportar para {file_path}: {e}")
+            if tmp_path.exists():
+                tmp_path.unlink()
+            return False, exported
+    
+    @staticmethod
+    def _open_output(path: Path, compressed: bool):
+        if compressed:
+            return gzip.open(path, 'wt', encoding='utf-8', newline='')
+        return open(path, 'w', encoding='utf-8', newline='')
+    
+    @staticmethod
+    def _matches(record: Dict, statuses, start: Optional[datetime], end: Optional[datetime]) -> bool:
+        if statuses is not None and (record.get('status') or 'pending') not in statuses:
+            return False
+        if start is None and end is None:
+            return True
+        try:
+            timestamp = datetime.fromisoformat(record['timestamp'])
+        except (KeyError, TypeError, ValueError):
+            return False
+        return (start is None or timestamp >= start) and (end is None or timestamp < end)
\ No newline at end of file
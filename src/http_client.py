@@ -0,0 +1,186 @@
+"""
+Módulo de cliente HTTP compartilhado com pool de conexões
+"""
+
+import gzip
+import json
+import threading
+from typing import Dict, Optional, Union, Tuple, Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, ResponseError
+from urllib3.util.retry import Retry
+
+from config.settings import API_BASE_URL, API_ENDPOINTS, HTTP_CONFIG, SYNC_CONFIG
+from src.utils import setup_logging
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def supported_encodings() -> Tuple[str, ...]:
+    """Retorna codificações de corpo disponíveis, da preferida para a menos"""
+    return ('zstd', 'gzip') if zstandard is not None else ('gzip',)
+
+
+def compress_body(data: bytes, encoding: str) -> bytes:
+    """Comprime corpo de requisição com a codificação informada"""
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    if encoding == 'zstd' and zstandard is not None:
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    raise ValueError(f"Codificação não suportada: {encoding}")
+
+
+class RetryPolicy(Retry):
+    """Retry do urllib3 que não reenvia POST já processado nem dorme por horas
+    
+    POST só é repetido em 429/503, respostas de um servidor que recusou o
+    pedido; 502/504 vêm do gateway e o backend pode já ter gravado. Um
+    Retry-After maior que HTTP_CONFIG["max_retry_after"] não é esperado
+    dentro do requests: a resposta volta na hora e o envio é reagendado.
+    """
+    
+    POST_STATUS_FORCELIST = frozenset([429, 503])
+    MAX_RETRY_AFTER = HTTP_CONFIG["max_retry_after"]
+    
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if method and method.upper() == 'POST' and status_code not in self.POST_STATUS_FORCELIST:
+            return False
+        return super().is_retry(method, status_code, has_retry_after)
+    
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        if response is not None:
+            retry_after = self.get_retry_after(response)
+            if retry_after is not None and retry_after > self.MAX_RETRY_AFTER:
+                # Com raise_on_status=False o urllib3 devolve a resposta ao chamador
+                raise MaxRetryError(_pool, url, ResponseError(f"Retry-After de {retry_after:.0f} s"))
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+
+class HttpClient:
+    """Cliente HTTP com keep-alive, timeouts por endpoint e política única de retry"""
+    
+    def __init__(self, base_url: str = API_BASE_URL):
+        self.logger = setup_logging("http_client")
+        self.base_url = base_url.rstrip('/')
+        self.connect_timeout = HTTP_CONFIG["connect_timeout"]
+        self.timeouts = HTTP_CONFIG["timeouts"]
+        self._auth_token = None
+        self._auth_headers = None
+        self._headers_lock = threading.Lock()
+        
+        self.session = requests.Session()
+        self.session.headers.update({'Content-Type': 'application/json'})
+        
+        # Pool de conexões keep-alive com política de retry única
+        adapter = HTTPAdapter(
+            pool_connections=HTTP_CONFIG["pool_connections"],
+            pool_maxsize=HTTP_CONFIG["pool_maxsize"],
+            max_retries=self._build_retry_policy()
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+    
+    def _build_retry_policy(self) -> Retry:
+        """Cria política de retry compartilhada por todas as requisições
+        
+        Erros de conexão e respostas 429/5xx (POST só em 429/503) são repetidos
+        com backoff. Erros de leitura não são repetidos, pois o servidor pode
+        já ter processado o POST.
+        """
+        max_retries = HTTP_CONFIG["max_retries"]
+        return RetryPolicy(
+            total=max_retries,
+            connect=max_retries,
+            read=0,
+            status=max_retries,
+            backoff_factor=HTTP_CONFIG["backoff_factor"],
+            status_forcelist=(429, 502, 503, 504),
+            allowed_methods=frozenset(['GET', 'POST']),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+    
+    def url_for(self, endpoint: str) -> str:
+        """Resolve nome de endpoint (ou URL completa) para URL"""
+        if endpoint.startswith(('http://', 'https://')):
+            return endpoint
+        path = API_ENDPOINTS.get(endpoint, endpoint)
+        return f"{self.base_url}{path}"
+    
+    def timeout_for(self, endpoint: str) -> Tuple[float, float]:
+        """Retorna timeout (conexão, leitura) configurado para o endpoint"""
+        read_timeout = self.timeouts.get(endpoint, self.timeouts["default"])
+        return (min(self.connect_timeout, read_timeout), read_timeout)
+    
+    def auth_headers(self, token: Optional[str]) -> Dict[str, str]:
+        """Retorna cabeçalhos de autenticação pré-montados para o token"""
+        if not token:
+            return {}
+        
+        with self._headers_lock:
+            if token != self._auth_token:
+                self._auth_token = token
+                self._auth_headers = {'Authorization': f'Bearer {token}'}
+            return self._auth_headers
+    
+    def request(self, method: str, endpoint: str, token: Optional[str] = None,
+                timeout: Optional[Union[float, Tuple[float, float]]] = None,
+                **kwargs) -> requests.Response:
+        """Executa requisição usando o pool de conexões compartilhado"""
+        headers = dict(self.auth_headers(token))
+        headers.update(kwargs.pop('headers', None) or {})
+        
+        return self.session.request(
+            method,
+            self.url_for(endpoint),
+            headers=headers,
+            timeout=timeout if timeout is not None else self.timeout_for(endpoint),
+            **kwargs
+        )
+    
+    def get(self, endpoint: str, token: Optional[str] = None, **kwargs) -> requests.Response:
+        """Executa GET"""
+        return self.request('GET', endpoint, token=token, **kwargs)
+    
+    def post(self, endpoint: str, token: Optional[str] = None, **kwargs) -> requests.Response:
+        """Executa POST"""
+        return self.request('POST', endpoint, token=token, **kwargs)
+    
+    def post_json(self, endpoint: str, payload: Any, token: Optional[str] = None,
+                  encoding: Optional[str] = None, **kwargs) -> requests.Response:
+        """Executa POST com corpo JSON, comprimido se `encoding` for informado
+        
+        Corpos menores que SYNC_CONFIG["compression_min_size"] são enviados sem
+        compressão, pois o ganho não compensa o custo de CPU.
+        """
+        body = json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        headers = dict(kwargs.pop('headers', None) or {})
+        
+        if encoding and len(body) >= SYNC_CONFIG["compression_min_size"]:
+            body = compress_body(body, encoding)
+            headers['Content-Encoding'] = encoding
+        
+        return self.post(endpoint, token=token, data=body, headers=headers, **kwargs)
+    
+    def close(self):
+        """Fecha conexões do pool"""
+        self.session.close()
+
+
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """Retorna o cliente HTTP compartilhado do processo"""
+    global _shared_client
+    
+    with _shared_client_lock:
+        if _shared_client is None:
+            _shared_client = HttpClient()
+        return _shared_client
\ No newline at end of file
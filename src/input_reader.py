@@ -0,0 +1,88 @@
+"""
+Módulo de leitura direta de eventos de entrada (struct input_event)
+"""
+
+import os
+import struct
+from typing import Callable
+
+from evdev import ecodes
+
+# struct input_event: timeval (dois long nativos), type e code (u16), value (s32).
+# Com alinhamento nativo o tamanho acompanha a ABI do kernel (24 bytes em 64
+# bits, 16 bytes em 32 bits).
+INPUT_EVENT = struct.Struct('llHHi')
+EVENT_SIZE = INPUT_EVENT.size
+
+EV_KEY = ecodes.EV_KEY
+KEY_REPEAT = 2
+
+
+class RawEventReader:
+    """Lê eventos de um descritor em blocos, sem criar objetos por evento
+    
+    Cada leitura usa os.readv() sobre um buffer reutilizado e decodifica os
+    registros com struct.iter_unpack() sobre um memoryview; só eventos EV_KEY
+    chegam ao handler. Solturas são mantidas (o decodificador precisa delas
+    para Shift/AltGr) e repetições automáticas são descartadas.
+    
+    Funciona com qualquer descritor: dispositivos /dev/input/event*, pipes ou
+    arquivos com eventos gravados. Um evento partido entre duas leituras (só
+    acontece em pipes e arquivos) é completado na leitura seguinte.
+    """
+    
+    def __init__(self, fd: int, max_events: int = 64):
+        self.fd = fd
+        self._buffer = bytearray(EVENT_SIZE * max(1, max_events))
+        self._view = memoryview(self._buffer)
+        self._partial = 0  # Bytes de um evento incompleto no início do buffer
+        self.events_read = 0
+        self.key_events = 0
+    
+    def read_keys(self, handler: Callable[[int, int], None]) -> int:
+        """Lê o que estiver disponível e chama handler(code, value) por tecla
+        
+        Retorna quantos eventos de tecla foram entregues (0 se não havia
+        dados). Levanta EOFError quando o descritor foi fechado do outro lado.
+        """
+        try:
+            count = os.readv(self.fd, [self._view[self._partial:]])
+        except BlockingIOError:
+            return 0
+        if count == 0:
+            raise EOFError(f"descritor {self.fd} encerrado")
+        
+        available = self._partial + count
+        whole = available - available % EVENT_SIZE
+        delivered = 0
+        for _, _, ev_type, code, value in INPUT_EVENT.iter_unpack(self._view[:whole]):
+            if ev_type == EV_KEY and value != KEY_REPEAT:
+                handler(code, value)
+                delivered += 1
+        
+        self._partial = available - whole
+        if self._partial:
+            self._buffer[:self._partial] = self._buffer[whole:available]
+        
+        self.events_read += whole // EVENT_SIZE
+        self.key_events += delivered
+        return delivered
+
+
+def pack_events(events, with_noise: bool = True, timestamp: float = 0.0) -> bytes:
+    """Serializa eventos (code, value) de tecla como struct input_event
+    
+    Com `with_noise`, cada tecla vem como um teclado USB envia: EV_MSC
+    (MSC_SCAN) antes e EV_SYN (SYN_REPORT) depois. Usado para gravar e
+    reproduzir leituras em testes.
+    """
+    seconds = int(timestamp)
+    micros = int((timestamp - seconds) * 1_000_000)
+    data = bytearray()
+    for code, value in events:
+        if with_noise:
+            data += INPUT_EVENT.pack(seconds, micros, ecodes.EV_MSC, ecodes.MSC_SCAN, 0x70000 + code)
+        data += INPUT_EVENT.pack(seconds, micros, EV_KEY, code, value)
+        if with_noise:
+            data += INPUT_EVENT.pack(seconds, micros, ecodes.EV_SYN, ecodes.SYN_REPORT, 0)
+    return bytes(data)
\ No newline at end of file
@@ -0,0 +1,220 @@
+"""
+Módulo de decodificação de teclas do scanner por layout de teclado
+"""
+
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+from evdev import ecodes
+
+
+# Caracteres por tecla: (normal, com Shift[, com AltGr]). As letras a-z são
+# incluídas por _compile(); teclas cujo Shift dá a maiúscula (ex.: ç) também
+# seguem o CapsLock.
+_US_KEYS = {
+    'KEY_1': ('1', '!'), 'KEY_2': ('2', '@'), 'KEY_3': ('3', '#'), 'KEY_4': ('4', '$'),
+    'KEY_5': ('5', '%'), 'KEY_6': ('6', '^'), 'KEY_7': ('7', '&'), 'KEY_8': ('8', '*'),
+    'KEY_9': ('9', '('), 'KEY_0': ('0', ')'),
+    'KEY_MINUS': ('-', '_'), 'KEY_EQUAL': ('=', '+'),
+    'KEY_LEFTBRACE': ('[', '{'), 'KEY_RIGHTBRACE': (']', '}'), 'KEY_BACKSLASH': ('\\', '|'),
+    'KEY_SEMICOLON': (';', ':'), 'KEY_APOSTROPHE': ("'", '"'), 'KEY_GRAVE': ('`', '~'),
+    'KEY_COMMA': (',', '<'), 'KEY_DOT': ('.', '>'), 'KEY_SLASH': ('/', '?'),
+    'KEY_102ND': ('\\', '|'), 'KEY_SPACE': (' ', ' '),
+    'KEY_KPDOT': ('.', '.'), 'KEY_KPCOMMA': (',', ','),
+}
+
+_ABNT2_KEYS = {
+    'KEY_1': ('1', '!', '¹'), 'KEY_2': ('2', '@', '²'), 'KEY_3': ('3', '#', '³'),
+    'KEY_4': ('4', '$', '£'), 'KEY_5': ('5', '%', '¢'), 'KEY_6': ('6', '¨', '¬'),
+    'KEY_7': ('7', '&'), 'KEY_8': ('8', '*'), 'KEY_9': ('9', '('), 'KEY_0': ('0', ')'),
+    'KEY_MINUS': ('-', '_'), 'KEY_EQUAL': ('=', '+', '§'),
+    'KEY_Q': ('q', 'Q', '/'), 'KEY_W': ('w', 'W', '?'), 'KEY_E': ('e', 'E', '°'),
+    'KEY_LEFTBRACE': ('´', '`'), 'KEY_RIGHTBRACE': ('[', '{', 'ª'),
+    'KEY_SEMICOLON': ('ç', 'Ç'), 'KEY_APOSTROPHE': ('~', '^'), 'KEY_GRAVE': ("'", '"'),
+    'KEY_BACKSLASH': (']', '}', 'º'), 'KEY_102ND': ('\\', '|'),
+    'KEY_COMMA': (',', '<'), 'KEY_DOT': ('.', '>'), 'KEY_SLASH': (';', ':'),
+    'KEY_RO': ('/', '?', '°'), 'KEY_SPACE': (' ', ' '),
+    'KEY_KPDOT': (',', ','), 'KEY_KPCOMMA': ('.', '.'),
+}
+
+# Teclas mortas: acentuam a próxima letra (ou saem sozinhas antes de outro caractere)
+_ABNT2_DEAD = {'´': '\u0301', '`': '\u0300', '~': '\u0303', '^': '\u0302', '¨': '\u0308'}
+
+LAYOUTS = {
+    'us': (_US_KEYS, {}),
+    'abnt2': (_ABNT2_KEYS, _ABNT2_DEAD),
+}
+
+# Teclado numérico (NumLock ligado, como os scanners enviam)
+_KEYPAD = {
+    'KEY_KP0': '0', 'KEY_KP1': '1', 'KEY_KP2': '2', 'KEY_KP3': '3', 'KEY_KP4': '4',
+    'KEY_KP5': '5', 'KEY_KP6': '6', 'KEY_KP7': '7', 'KEY_KP8': '8', 'KEY_KP9': '9',
+    'KEY_KPMINUS': '-', 'KEY_KPPLUS': '+', 'KEY_KPASTERISK': '*', 'KEY_KPSLASH': '/',
+}
+
+_SHIFT, _ALTGR, _CAPSLOCK = 1, 2, 3
+_MODIFIERS = {
+    'KEY_LEFTSHIFT': _SHIFT, 'KEY_RIGHTSHIFT': _SHIFT,
+    'KEY_RIGHTALT': _ALTGR,
+    'KEY_CAPSLOCK': _CAPSLOCK,
+}
+
+_TABLE_SIZE = ecodes.KEY_MAX + 1
+
+
+class KeyDecoder:
+    """Converte eventos EV_KEY em caracteres, com estado de Shift/CapsLock/AltGr
+    
+    As tabelas são listas indexadas pelo código da tecla, montadas uma vez por
+    layout; cada evento custa uma indexação, sem dicionários nem consultas a
+    evdev.ecodes. Layouts: 'us' e 'abnt2' (com teclas mortas).
+    """
+    
+    _compiled: Dict[str, Tuple] = {}
+    
+    def __init__(self, layout: str = 'us'):
+        layout = (layout or 'us').lower()
+        if layout not in LAYOUTS:
+            raise ValueError(f"Layout de teclado desconhecido: {layout} (disponíveis: {', '.join(LAYOUTS)})")
+        self.layout = layout
+        if layout not in self._compiled:
+            self._compiled[layout] = self._compile(layout)
+        self._normal, self._shifted, self._altgr, self._letters, self._modifiers, self._dead = self._compiled[layout]
+        self.caps_lock = False
+        self.reset()
+    
+    def reset(self):
+        """Solta modificadores e descarta acento pendente (CapsLock é mantido)"""
+        self._shift_down = 0
+        self._altgr_down = False
+        self._pending_dead = None
+    
+    @property
+    def shift(self) -> bool:
+        return self._shift_down > 0
+    
+    @property
+    def altgr(self) -> bool:
+        return self._altgr_down
+    
+    def feed(self, code: int, value: int) -> str:
+        """Processa um evento (valor 1 = pressionada, 0 = solta, 2 = repetição)
+        
+        Retorna o texto produzido pela tecla ('' para modificadores, soltura
+        e teclas sem caractere). Uma tecla morta seguida de caractere que não
+        acentua devolve os dois.
+        """
+        if not 0 <= code < _TABLE_SIZE:
+            return ''
+        
+        modifier = self._modifiers[code]
+        if modifier:
+            if modifier == _SHIFT:
+                if value == 1:
+                    self._shift_down += 1
+                elif value == 0:
+                    self._shift_down = max(0, self._shift_down - 1)
+            elif modifier == _ALTGR:
+                self._altgr_down = value != 0
+            elif value == 1:
+                self.caps_lock = not self.caps_lock
+            return ''
+        
+        if value != 1:
+            return ''
+        
+        if self._altgr_down and self._altgr[code]:
+            char = self._altgr[code]
+        elif self._shift_down:
+            char = self._normal[code] if self.caps_lock and self._letters[code] else self._shifted[code]
+        else:
+            char = self._shifted[code] if self.caps_lock and self._letters[code] else self._normal[code]
+        
+        if not char or not self._dead:
+            return char
+        return self._compose(char)
+    
+    def _compose(self, char: str) -> str:
+        """Aplica tecla morta pendente ao caractere"""
+        pending = self._pending_dead
+        if char in self._dead:
+            if pending is None:
+                self._pending_dead = char
+                return ''
+            # Duas teclas mortas: a primeira sai sozinha
+            self._pending_dead = char
+            return pending
+        
+        if pending is None:
+            return char
+        self._pending_dead = None
+        if char == ' ':
+            return pending
+        composed = unicodedata.normalize('NFC', char + self._dead[pending])
+        return composed if len(composed) == 1 else pending + char
+    
+    @staticmethod
+    def _compile(layout: str) -> Tuple:
+        """Monta as tabelas planas de um layout"""
+        keys, dead = LAYOUTS[layout]
+        normal: List[str] = [''] * _TABLE_SIZE
+        shifted: List[str] = [''] * _TABLE_SIZE
+        altgr: List[str] = [''] * _TABLE_SIZE
+        letters = bytearray(_TABLE_SIZE)
+        modifiers = bytearray(_TABLE_SIZE)
+        
+        for letter in 'abcdefghijklmnopqrstuvwxyz':
+            code = getattr(ecodes, f'KEY_{letter.upper()}')
+            normal[code], shifted[code], letters[code] = letter, letter.upper(), 1
+        for name, char in _KEYPAD.items():
+            code = getattr(ecodes, name)
+            normal[code] = shifted[code] = char
+        for name, chars in keys.items():
+            code = getattr(ecodes, name)
+            normal[code], shifted[code] = chars[0], chars[1]
+            altgr[code] = chars[2] if len(chars) > 2 else ''
+            letters[code] = 1 if chars[0].isalpha() and chars[1] == chars[0].upper() else 0
+        for name, modifier in _MODIFIERS.items():
+            modifiers[getattr(ecodes, name)] = modifier
+        
+        return normal, shifted, altgr, letters, modifiers, dead
+
+
+def text_to_events(text: str, layout: str = 'us', enter: bool = True) -> List[Tuple[int, int]]:
+    """Eventos (código, valor) que um scanner no `layout` enviaria para `text`
+    
+    Usado em benchmarks e testes do decodificador. Caracteres acentuados usam
+    a tecla morta seguida da letra; caracteres sem tecla são ignorados.
+    """
+    decoder = KeyDecoder(layout)
+    normal, shifted, altgr, _, _, dead = KeyDecoder._compiled[decoder.layout]
+    # Preferência: tecla sem modificador, depois Shift, depois AltGr; entre
+    # teclas equivalentes, a de menor código (linha principal, não o teclado numérico)
+    strokes: Dict[str, Tuple[int, int]] = {}
+    for table, modifier in ((altgr, ecodes.KEY_RIGHTALT), (shifted, ecodes.KEY_LEFTSHIFT), (normal, None)):
+        for code in range(len(table) - 1, -1, -1):
+            if table[code]:
+                strokes[table[code]] = (code, modifier)
+    
+    def press(code: int, modifier: Optional[int]) -> List[Tuple[int, int]]:
+        if modifier is None:
+            return [(code, 1), (code, 0)]
+        return [(modifier, 1), (code, 1), (code, 0), (modifier, 0)]
+    
+    events = []
+    for char in text:
+        if char in dead:
+            events += press(*strokes[char]) + press(ecodes.KEY_SPACE, None)
+            continue
+        if char not in strokes:
+            base = unicodedata.normalize('NFD', char)
+            mark = next((d for d, m in dead.items() if base[1:] == m), None)
+            if mark is None or base[0] not in strokes:
+                continue
+            events += press(*strokes[mark])
+            char = base[0]
+        events += press(*strokes[char])
+    
+    if enter:
+        events += [(ecodes.KEY_ENTER, 1), (ecodes.KEY_ENTER, 0)]
+    return events
\ No newline at end of file
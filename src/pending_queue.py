@@ -0,0 +1,62 @@
+"""
+Módulo da fila em memória de códigos pendentes
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+class PendingQueue:
+    """Códigos pendentes indexados por ID, em ordem de chegada
+    
+    Inclusão, consulta e remoção por ID são O(1). Iterações usam uma cópia
+    tirada sob lock, então podem ocorrer enquanto o scanner adiciona códigos.
+    """
+    
+    def __init__(self, records: Optional[Iterable[Dict]] = None):
+        self._records: "OrderedDict[int, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        if records is not None:
+            for record in records:
+                self._records[record['id']] = record
+    
+    def add(self, record: Dict):
+        """Adiciona registro (deve ter 'id')"""
+        with self._lock:
+            self._records[record['id']] = record
+    
+    def get(self, record_id: int) -> Optional[Dict]:
+        """Retorna registro pelo ID"""
+        return self._records.get(record_id)
+    
+    def remove(self, record_ids: Iterable[int]) -> int:
+        """Remove registros pelo ID e retorna quantos existiam"""
+        removed = 0
+        with self._lock:
+            for record_id in record_ids:
+                if self._records.pop(record_id, None) is not None:
+                    removed += 1
+        return removed
+    
+    def snapshot(self) -> List[Dict]:
+        """Retorna cópia da lista de registros em ordem de chegada"""
+        with self._lock:
+            return list(self._records.values())
+    
+    def clear(self):
+        """Remove todos os registros"""
+        with self._lock:
+            self._records.clear()
+    
+    def __contains__(self, record_id: int) -> bool:
+        return record_id in self._records
+    
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.snapshot())
+    
+    def __len__(self) -> int:
+        return len(self._records)
+    
+    def __bool__(self) -> bool:
+        return bool(self._records)
\ No newline at end of file
@@ -0,0 +1,1192 @@
+"""
+Módulo de armazenamento persistente de códigos pendentes
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from config.settings import (
+    PENDING_FILE, PENDING_JOURNAL_FILE, PENDING_DB_FILE, PENDING_SEGMENT_DIR, STORAGE_CONFIG
+)
+from src.utils import setup_logging, load_csv, load_json, save_json
+from src.records import PendingRecord
+from src.persist_writer import GroupCommitWriter, LatencyStats
+
+
+def _encode_record(obj):
+    """Serializa PendingRecord como dict no journal"""
+    if isinstance(obj, PendingRecord):
+        return obj.to_dict()
+    raise TypeError(f"Objeto {type(obj).__name__} não serializável")
+
+
+class PendingJournal:
+    """Journal append-only de códigos pendentes
+    
+    Cada operação (novo código, confirmação, atualização de tentativas, remoção)
+    é gravada como uma linha JSON no fim do arquivo. O estado é reconstruído
+    relendo o journal; a compactação reescreve apenas os registros vivos.
+    
+    As gravações passam por um GroupCommitWriter: o chamador apenas serializa
+    e enfileira, e a durabilidade segue STORAGE_CONFIG["durability"].
+    
+    A compactação grava primeiro uma entrada 'meta' com o último ID
+    reservado, para que os IDs não recomecem quando todos os registros já
+    foram confirmados.
+    """
+    
+    ADD_PREFIX = b'{"op":"add"'  # Início das linhas 'add' gravadas por _encode
+    
+    def __init__(self, journal_path: Path, legacy_csv: Path = PENDING_FILE):
+        self.logger = setup_logging("pending_store")
+        self.journal_path = Path(journal_path)
+        self.legacy_csv = Path(legacy_csv)
+        self.compaction_threshold = STORAGE_CONFIG["compaction_threshold"]
+        self.entry_count = 0
+        self.last_id = 0
+        self._writer = GroupCommitWriter(
+            self.journal_path,
+            flush_interval=STORAGE_CONFIG["flush_interval"],
+            durability=STORAGE_CONFIG["durability"]
+        )
+        self._lock = threading.Lock()
+        self._scan_state = None
+        self._tail = (0, 0)  # (último ID lido, posição no arquivo) de iter_after()
+    
+    def next_id(self) -> int:
+        """Reserva o próximo ID de registro"""
+        with self._lock:
+            self.last_id += 1
+            return self.last_id
+    
+    def scan(self) -> int:
+        """Varre o journal e retorna quantos registros estão vivos
+        
+        Apenas confirmações, remoções e atualizações são decodificadas; linhas
+        'add' só são contadas. Os registros são lidos depois, em blocos, por
+        iter_records().
+        """
+        self._writer.flush()
+        if not self.journal_path.exists() and self.legacy_csv.exists():
+            self._migrate_legacy_csv()
+        
+        dead = set()
+        updates = {}
+        meta_last_id = 0
+        add_count = 0
+        entry_count = 0
+        last_adds = []
+        end = 0
+        
+        if self.journal_path.exists():
+            with open(self.journal_path, 'rb') as f:
+                for line_number, line in enumerate(f, 1):
+                    end += len(line)
+                    if line.startswith(self.ADD_PREFIX):
+                        entry_count += 1
+                        add_count += 1
+                        last_adds = [last_adds[-1], line] if last_adds else [line]
+                        continue
+                    
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Linha incompleta (ex.: queda de energia durante a escrita)
+                        self.logger.warning(f"Entrada inválida ignorada no journal (linha {line_number})")
+                        continue
+                    
+                    entry_count += 1
+                    op = entry.get('op')
+                    if op in ('ack', 'remove'):
+                        dead.update(entry['ids'])
+                    elif op == 'update':
+                        for record_id, fields in entry['updates']:
+                            updates.setdefault(record_id, {}).update(fields)
+                    elif op == 'meta':
+                        meta_last_id = max(meta_last_id, entry.get('last_id', 0))
+        
+        # IDs crescem ao longo do journal: basta decodificar a última linha 'add'
+        # (ou a penúltima, se a última estiver truncada). O meta da compactação
+        # guarda IDs já usados cujos registros não estão mais no arquivo
+        last_id = max(meta_last_id, max(dead, default=0))
+        for line in reversed(last_adds):
+            try:
+                last_id = max(last_id, json.loads(line)['record']['id'])
+                break
+            except (ValueError, KeyError):
+                continue
+        
+        with self._lock:
+            self.entry_count = entry_count
+            self.last_id = max(self.last_id, last_id)
+            self._scan_state = (dead, updates, end)
+            self._tail = (0, end)
+        
+        live_count = max(0, add_count - len(dead))
+        self.logger.info(f"Journal varrido: ~{live_count} registros pendentes, {entry_count} entradas")
+        return live_count
+    
+    def iter_records(self, chunk_size: int) -> Iterator[List[Dict]]:
+        """Lê registros vivos em blocos de até `chunk_size`, em ordem de ID
+        
+        Cobre o journal até o ponto varrido por scan(); entradas gravadas
+        depois disso se referem a registros que já estão em memória.
+        """
+        if self._scan_state is None:
+            self.scan()
+        dead, updates, end = self._scan_state
+        
+        chunk = []
+        offset = 0
+        if self.journal_path.exists():
+            with open(self.journal_path, 'rb') as f:
+                for line in f:
+                    offset += len(line)
+                    if offset > end:
+                        break
+                    if not line.startswith(self.ADD_PREFIX):
+                        continue
+                    
+                    try:
+                        record = json.loads(line)['record']
+                    except ValueError:
+                        continue
+                    
+                    record_id = record['id']
+                    if record_id in dead:
+                        continue
+                    if record_id in updates:
+                        record.update(updates[record_id])
+                    
+                    chunk.append(record)
+                    if len(chunk) >= chunk_size:
+                        yield chunk
+                        chunk = []
+        
+        if chunk:
+            yield chunk
+        self._scan_state = None
+    
+    def iter_after(self, after_id: int, chunk_size: int) -> Iterator[List[Dict]]:
+        """Lê registros gravados depois de scan() com ID acima de `after_id`
+        
+        Traz de volta à memória leituras que só foram gravadas em disco (fila
+        em memória cheia). Esses registros ainda não têm confirmações nem
+        atualizações, então basta ler as linhas 'add'. A leitura continua de
+        onde a anterior parou, sem reler o journal inteiro.
+        """
+        self._writer.flush()
+        tail_id, offset = self._tail
+        if tail_id > after_id:
+            offset = 0
+        if not self.journal_path.exists():
+            return
+        
+        chunk = []
+        with open(self.journal_path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # Linha ainda sendo gravada
+                offset += len(line)
+                if not line.startswith(self.ADD_PREFIX):
+                    continue
+                
+                try:
+                    record = json.loads(line)['record']
+                except ValueError:
+                    continue
+                if record['id'] <= after_id:
+                    continue
+                
+                chunk.append(record)
+                if len(chunk) >= chunk_size:
+                    self._tail = (record['id'], offset)
+                    yield chunk
+                    chunk = []
+        
+        if chunk:
+            self._tail = (chunk[-1]['id'], offset)
+            yield chunk
+    
+    def load(self) -> "OrderedDict[int, Dict]":
+        """Reconstrói todos os registros vivos de uma vez (ex.: migração)"""
+        self.scan()
+        records = OrderedDict()
+        for chunk in self.iter_records(STORAGE_CONFIG["load_chunk_size"]):
+            for record in chunk:
+                records[record['id']] = record
+        
+        self.logger.info(f"Journal carregado: {len(records)} registros pendentes, {self.entry_count} entradas")
+        return records
+    
+    def iter_export(self, chunk_size: int, include_history: bool = False) -> Iterator[List[Dict]]:
+        """Lê registros para exportação, em blocos, sem afetar a carga em andamento
+        
+        Com `include_history`, registros confirmados que ainda estão no journal
+        (até a próxima compactação) saem com status 'synced'. Guarda em memória
+        só os IDs confirmados/removidos e as atualizações.
+        """
+        self._writer.flush()
+        acked, removed, updates = set(), set(), {}
+        if not self.journal_path.exists():
+            return
+        
+        with open(self.journal_path, 'rb') as f:
+            for line in f:
+                if line.startswith(self.ADD_PREFIX):
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                op = entry.get('op')
+                if op == 'ack':
+                    acked.update(entry['ids'])
+                elif op == 'remove':
+                    removed.update(entry['ids'])
+                elif op == 'update':
+                    for record_id, fields in entry['updates']:
+                        updates.setdefault(record_id, {}).update(fields)
+        
+        chunk = []
+        with open(self.journal_path, 'rb') as f:
+            for line in f:
+                if not line.startswith(self.ADD_PREFIX):
+                    continue
+                try:
+                    record = json.loads(line)['record']
+                except ValueError:
+                    continue
+                
+                record_id = record['id']
+                if record_id in removed or (record_id in acked and not include_history):
+                    continue
+                if record_id in updates:
+                    record.update(updates[record_id])
+                if record_id in acked:
+                    record['status'] = 'synced'
+                
+                chunk.append(record)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+        
+        if chunk:
+            yield chunk
+    
+    def append(self, record: Dict) -> bool:
+        """Grava novo registro (o registro deve ter 'id')"""
+        return self._write_entries([{'op': 'add', 'record': record}])
+    
+    def ack(self, record_ids: Iterable[int]) -> bool:
+        """Grava confirmação de registros sincronizados"""
+        ids = list(record_ids)
+        return self._write_entries([{'op': 'ack', 'ids': ids}]) if ids else True
+    
+    def remove(self, record_ids: Iterable[int]) -> bool:
+        """Grava remoção de registros (ex.: falhas descartadas)"""
+        ids = list(record_ids)
+        return self._write_entries([{'op': 'remove', 'ids': ids}]) if ids else True
+    
+    def update(self, updates: Iterable[Tuple[int, Dict]]) -> bool:
+        """Grava atualização de campos (tentativas, status) de registros"""
+        updates = [[record_id, fields] for record_id, fields in updates]
+        return self._write_entries([{'op': 'update', 'updates': updates}]) if updates else True
+    
+    def needs_compaction(self, live_count: int) -> bool:
+        """Verifica se entradas obsoletas passaram do limite
+        
+        Exige também que as obsoletas superem as vivas, para que o custo da
+        reescrita seja amortizado.
+        """
+        dead_entries = self.entry_count - live_count
+        return dead_entries >= self.compaction_threshold and dead_entries >= live_count
+    
+    def compact(self, records: Iterable[Dict]) -> bool:
+        """Reescreve o journal contendo apenas os registros vivos"""
+        tmp_path = self.journal_path.with_suffix(self.journal_path.suffix + '.tmp')
+        
+        with self._lock:
+            try:
+                # Registros são obtidos dentro do lock para não perder escritas concorrentes;
+                # entradas ainda na fila do writer vão para o arquivo antigo
+                records = list(records)
+                self._writer.flush()
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(self._encode({'op': 'meta', 'last_id': self.last_id}))
+                    for record in records:
+                        f.write(self._encode({'op': 'add', 'record': record}))
+                    f.flush()
+                    os.fsync(f.fileno())
+                
+                self._writer.release()
+                os.replace(tmp_path, self.journal_path)
+                self.logger.info(f"Journal compactado: {self.entry_count} -> {len(records) + 1} entradas")
+                self.entry_count = len(records) + 1
+                self._tail = (0, 0)
+                return True
+            
+            except Exception as e:
+                self.logger.error(f"Erro ao compactar journal: {e}")
+                if tmp_path.exists():
+                    tmp_path.unlink()
+                return False
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Aguarda a gravação das entradas enfileiradas"""
+        return self._writer.flush(timeout)
+    
+    def get_write_stats(self) -> Dict:
+        """Retorna latência leitura→durável e contadores do writer"""
+        return self._writer.get_stats()
+    
+    def close(self):
+        """Grava entradas pendentes e fecha o journal"""
+        with self._lock:
+            self._writer.close()
+    
+    def _write_entries(self, entries: List[Dict]) -> bool:
+        """Enfileira entradas para o fim do journal (gravadas em grupo pelo writer)"""
+        try:
+            data = ''.join(self._encode(entry) for entry in entries)
+            with self._lock:
+                self._writer.write(data)
+                self.entry_count += len(entries)
+            return True
+        except Exception as e:
+            self.logger.error(f"Erro ao gravar no journal {self.journal_path}: {e}")
+            return False
+    
+    @staticmethod
+    def _encode(entry: Dict) -> str:
+        return json.dumps(entry, separators=(',', ':'), ensure_ascii=False, default=_encode_record) + '\n'
+    
+    def _migrate_legacy_csv(self):
+        """Converte pendentes.csv do formato antigo para o journal"""
+        legacy_records = load_csv(self.legacy_csv)
+        self.logger.info(f"Migrando {len(legacy_records)} códigos de {self.legacy_csv} para o journal")
+        
+        records = []
+        for record in legacy_records:
+            record['retry_count'] = int(record.get('retry_count') or 0)
+            record['last_attempt'] = record.get('last_attempt') or None
+            record['status'] = record.get('status') or 'pending'
+            self.last_id += 1
+            record['id'] = self.last_id
+            records.append(record)
+        
+        if self.compact(records):
+            self.legacy_csv.rename(self.legacy_csv.with_suffix('.csv.migrado'))
+
+
+class SQLitePendingStore:
+    """Armazenamento de códigos pendentes em SQLite (modo WAL)
+    
+    Mesma interface do PendingJournal, com colunas tipadas e índice em
+    (status, next_attempt) para consultas de códigos devidos e contagens.
+    
+    Registros confirmados são apagados; o maior ID já gravado fica em
+    store_meta, para que os IDs não recomecem depois de uma sincronização
+    completa.
+    """
+    
+    COLUMNS = ('id', 'code', 'timestamp', 'device_id', 'retry_count', 'last_attempt', 'next_attempt', 'status')
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS pending_codes (
+            id INTEGER PRIMARY KEY,
+            code TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            device_id TEXT,
+            retry_count INTEGER NOT NULL DEFAULT 0,
+            last_attempt TEXT,
+            next_attempt REAL NOT NULL DEFAULT 0,
+            status TEXT NOT NULL DEFAULT 'pending',
+            metadata TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_pending_status_next ON pending_codes (status, next_attempt);
+        CREATE TABLE IF NOT EXISTS store_meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+    """
+    
+    def __init__(self, db_path: Path, legacy_csv: Path = PENDING_FILE,
+                 legacy_journal: Path = PENDING_JOURNAL_FILE):
+        self.logger = setup_logging("pending_store")
+        self.db_path = Path(db_path)
+        self.legacy_csv = Path(legacy_csv)
+        self.legacy_journal = Path(legacy_journal)
+        self._lock = threading.Lock()
+        
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        
+        row = self._conn.execute(
+            "SELECT MAX(COALESCE((SELECT MAX(id) FROM pending_codes), 0), "
+            "COALESCE((SELECT value FROM store_meta WHERE key = 'last_id'), 0))"
+        ).fetchone()
+        self.last_id = row[0] or 0
+        self._scan_last_id = None
+        self.write_latency = LatencyStats()
+    
+    def next_id(self) -> int:
+        """Reserva o próximo ID de registro"""
+        with self._lock:
+            self.last_id += 1
+            return self.last_id
+    
+    def scan(self) -> int:
+        """Conta registros pendentes e fixa o limite lido por iter_records()"""
+        self._migrate_legacy_files()
+        
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*), MAX(id) FROM pending_codes").fetchone()
+        self._scan_last_id = row[1] or 0
+        
+        self.logger.info(f"Banco aberto: {row[0]} registros pendentes")
+        return row[0]
+    
+    def iter_records(self, chunk_size: int) -> Iterator[List[Dict]]:
+        """Lê registros em blocos de até `chunk_size`, em ordem de ID (paginação por chave)"""
+        if self._scan_last_id is None:
+            self.scan()
+        
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT * FROM pending_codes WHERE id > ? AND id <= ? ORDER BY id LIMIT ?",
+                    (last_id, self._scan_last_id, chunk_size)
+                ).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1]['id']
+            yield [self._row_to_record(row) for row in rows]
+    
+    def iter_after(self, after_id: int, chunk_size: int) -> Iterator[List[Dict]]:
+        """Lê registros com ID acima de `after_id`, em blocos (paginação por chave)"""
+        last_id = after_id
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT * FROM pending_codes WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, chunk_size)
+                ).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1]['id']
+            yield [self._row_to_record(row) for row in rows]
+    
+    def iter_export(self, chunk_size: int, include_history: bool = False) -> Iterator[List[Dict]]:
+        """Lê registros para exportação, em blocos (paginação por chave)
+        
+        Registros confirmados são apagados da tabela, então não há histórico.
+        """
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT * FROM pending_codes WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, chunk_size)
+                ).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1]['id']
+            yield [self._row_to_record(row) for row in rows]
+    
+    def load(self) -> "OrderedDict[int, Dict]":
+        """Carrega registros pendentes em ordem de inserção"""
+        self._migrate_legacy_files()
+        
+        records = OrderedDict()
+        with self._lock:
+            for row in self._conn.execute("SELECT * FROM pending_codes ORDER BY id"):
+                records[row['id']] = self._row_to_record(row)
+        
+        self.logger.info(f"Banco carregado: {len(records)} registros pendentes")
+        return records
+    
+    def append(self, record: Dict) -> bool:
+        """Grava novo registro (o registro deve ter 'id')"""
+        return self._insert([record])
+    
+    def ack(self, record_ids: Iterable[int]) -> bool:
+        """Remove registros sincronizados"""
+        return self._delete(record_ids)
+    
+    def remove(self, record_ids: Iterable[int]) -> bool:
+        """Remove registros (ex.: falhas descartadas)"""
+        return self._delete(record_ids)
+    
+    def update(self, updates: Iterable[Tuple[int, Dict]]) -> bool:
+        """Atualiza campos (tentativas, status) de registros"""
+        try:
+            with self._lock, self._conn:
+                for record_id, fields in updates:
+                    columns = {k: v for k, v in fields.items() if k in self.COLUMNS and k != 'id'}
+                    extra = {k: v for k, v in fields.items() if k not in self.COLUMNS}
+                    
+                    if columns:
+                        assignments = ', '.join(f"{k} = ?" for k in columns)
+                        self._conn.execute(
+                            f"UPDATE pending_codes SET {assignments} WHERE id = ?",
+                            [*columns.values(), record_id]
+                        )
+                    
+                    if extra:
+                        row = self._conn.execute(
+                            "SELECT metadata FROM pending_codes WHERE id = ?", (record_id,)
+                        ).fetchone()
+                        if row is not None:
+                            metadata = json.loads(row['metadata'] or '{}')
+                            metadata.update(extra)
+                            self._conn.execute(
+                                "UPDATE pending_codes SET metadata = ? WHERE id = ?",
+                                (json.dumps(metadata, ensure_ascii=False), record_id)
+                            )
+            return True
+        except Exception as e:
+            self.logger.error(f"Erro ao atualizar registros no banco: {e}")
+            return False
+    
+    def iter_by_status(self, status: str, chunk_size: int) -> Iterator[List[Dict]]:
+        """Lê registros com o status, em blocos (consulta indexada por status)
+        
+        Paginação pela chave do índice (next_attempt, id): registros
+        removidos entre um bloco e outro não deslocam os seguintes.
+        """
+        last_key = (-1.0, 0)
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT * FROM pending_codes WHERE status = ? AND (next_attempt, id) > (?, ?) "
+                    "ORDER BY next_attempt, id LIMIT ?",
+                    (status, *last_key, chunk_size)
+                ).fetchall()
+            if not rows:
+                break
+            last_key = (rows[-1]['next_attempt'], rows[-1]['id'])
+            yield [self._row_to_record(row) for row in rows]
+    
+    def needs_compaction(self, live_count: int) -> bool:
+        """SQLite reaproveita páginas livres, não há compactação periódica"""
+        return False
+    
+    def compact(self, records: Iterable[Dict]) -> bool:
+        """Sem efeito no SQLite"""
+        return True
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Gravações no banco são síncronas"""
+        return True
+    
+    def get_write_stats(self) -> Dict:
+        """Retorna latência das gravações (commit no WAL, synchronous=NORMAL)"""
+        stats = self.write_latency.snapshot()
+        stats['durability'] = 'sqlite'
+        return stats
+    
+    def close(self):
+        """Fecha conexão com o banco"""
+        with self._lock:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+    
+    def _insert(self, records: List[Dict]) -> bool:
+        start = time.monotonic()
+        try:
+            rows = []
+            for record in records:
+                metadata = {k: v for k, v in record.items() if k not in self.COLUMNS}
+                rows.append((
+                    record['id'],
+                    record['code'],
+                    record['timestamp'],
+                    record.get('device_id'),
+                    int(record.get('retry_count') or 0),
+                    record.get('last_attempt') or None,
+                    float(record.get('next_attempt') or 0),
+                    record.get('status') or 'pending',
+                    json.dumps(metadata, ensure_ascii=False) if metadata else None
+                ))
+            
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO pending_codes "
+                    "(id, code, timestamp, device_id, retry_count, last_attempt, next_attempt, status, metadata) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                # Marca de IDs na mesma transação: sobrevive à remoção dos confirmados
+                if rows:
+                    self._conn.execute(
+                        "INSERT INTO store_meta (key, value) VALUES ('last_id', ?) "
+                        "ON CONFLICT(key) DO UPDATE SET value = MAX(value, excluded.value)",
+                        (max(row[0] for row in rows),)
+                    )
+            self.write_latency.record(time.monotonic() - start)
+            return True
+        except Exception as e:
+            self.logger.error(f"Erro ao gravar registros no banco {self.db_path}: {e}")
+            return False
+    
+    def _delete(self, record_ids: Iterable[int]) -> bool:
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "DELETE FROM pending_codes WHERE id = ?",
+                    ((record_id,) for record_id in record_ids)
+                )
+            return True
+        except Exception as e:
+            self.logger.error(f"Erro ao remover registros do banco: {e}")
+            return False
+    
+    @staticmethod
+    def _row_to_record(row: sqlite3.Row) -> Dict:
+        record = {
+            'id': row['id'],
+            'code': row['code'],
+            'timestamp': row['timestamp'],
+            'device_id': row['device_id'],
+            'retry_count': row['retry_count'],
+            'last_attempt': row['last_attempt'],
+            'next_attempt': row['next_attempt'],
+            'status': row['status']
+        }
+        if row['metadata']:
+            record.update(json.loads(row['metadata']))
+        return record
+    
+    def _migrate_legacy_files(self):
+        """Importa uma única vez o journal e o pendentes.csv antigos"""
+        if self.legacy_journal.exists():
+            journal = PendingJournal(self.legacy_journal, self.legacy_csv)
+            records = list(journal.load().values())
+            journal.close()
+            self.logger.info(f"Migrando {len(records)} códigos do journal para o banco")
+            if self._insert(records):
+                self.last_id = max([self.last_id] + [r['id'] for r in records])
+                self.legacy_journal.rename(self.legacy_journal.with_suffix('.journal.migrado'))
+        
+        if self.legacy_csv.exists():
+            legacy_records = load_csv(self.legacy_csv)
+            self.logger.info(f"Migrando {len(legacy_records)} códigos de {self.legacy_csv} para o banco")
+            for record in legacy_records:
+                record['id'] = self.next_id()
+            if self._insert(legacy_records):
+                self.legacy_csv.rename(self.legacy_csv.with_suffix('.csv.migrado'))
+
+
+class _Segment:
+    """Estado em memória de um segmento: quais IDs do intervalo estão vivos"""
+    
+    __slots__ = ('index', 'path', 'live', 'live_count', 'entries')
+    
+    def __init__(self, index: int, path: Path, size: int):
+        self.index = index
+        self.path = path
+        self.live = bytearray(size)  # 1 byte por ID do intervalo do segmento
+        self.live_count = 0
+        self.entries = 0
+
+
+class SegmentedPendingLog:
+    """Log de códigos pendentes dividido em segmentos de tamanho fixo
+    
+    O registro de ID n pertence ao segmento (n - 1) // segment_records. Suas
+    confirmações, remoções e atualizações são gravadas no próprio segmento,
+    que pode ser relido isoladamente e é apagado com um único unlink quando
+    todos os seus registros são confirmados. Carga e sincronização avançam
+    segmento a segmento, do mais antigo para o mais novo.
+    
+    Com STORAGE_CONFIG["history_segments"], os últimos segmentos confirmados
+    são movidos para `historico/` (um rename) em vez de apagados, e servem de
+    histórico para exportação.
+    
+    `segmentos.json` guarda também o maior segmento já retirado: depois que
+    todo o backlog é confirmado, os IDs continuam dali (sem reaproveitar IDs
+    nem nomes de segmento do histórico).
+    
+    Mesma interface do PendingJournal; todos os segmentos compartilham um
+    GroupCommitWriter.
+    """
+    
+    ID_PREFIX = b'{"op":"add","record":{"id":'  # Início das linhas 'add' de PendingRecord
+    META_FILE = "segmentos.json"
+    HISTORY_DIR = "historico"
+    
+    def __init__(self, segment_dir: Path, legacy_journal: Path = PENDING_JOURNAL_FILE,
+                 legacy_csv: Path = PENDING_FILE):
+        self.logger = setup_logging("pending_store")
+        self.segment_dir = Path(segment_dir)
+        self.segment_dir.mkdir(parents=True, exist_ok=True)
+        self.legacy_journal = Path(legacy_journal)
+        self.legacy_csv = Path(legacy_csv)
+        self.compaction_threshold = STORAGE_CONFIG["compaction_threshold"]
+        self.history_segments = max(0, STORAGE_CONFIG.get("history_segments", 0))
+        self.history_dir = self.segment_dir / self.HISTORY_DIR
+        
+        # O tamanho dos segmentos é fixado na criação: o mapeamento ID -> segmento depende dele
+        meta = load_json(self.segment_dir / self.META_FILE)
+        if meta and meta.get('segment_records'):
+            self.segment_records = int(meta['segment_records'])
+        else:
+            self.segment_records = max(1, STORAGE_CONFIG["segment_records"])
+            save_json({'segment_records': self.segment_records}, self.segment_dir / self.META_FILE)
+        self.retired_through = int((meta or {}).get('retired_through', -1))  # Maior segmento já retirado
+        self._meta_lock = threading.Lock()
+        
+        self.last_id = 0
+        self._last_appended_id = 0
+        self.deleted_segments = 0
+        self._segments: Dict[int, _Segment] = {}
+        self._scan_state = None
+        self._lock = threading.Lock()
+        self._writer = GroupCommitWriter(
+            flush_interval=STORAGE_CONFIG["flush_interval"],
+            durability=STORAGE_CONFIG["durability"]
+        )
+    
+    def next_id(self) -> int:
+        """Reserva o próximo ID de registro"""
+        with self._lock:
+            self.last_id += 1
+            return self.last_id
+    
+    def scan(self) -> int:
+        """Varre os segmentos e retorna quantos registros estão vivos
+        
+        Linhas 'add' têm o ID lido do prefixo, sem decodificar o registro.
+        Segmentos sem registros vivos (ex.: queda antes do unlink) são apagados.
+        """
+        self._writer.flush()
+        if self.legacy_journal.exists() or self.legacy_csv.exists():
+            self._migrate_legacy_files()
+        
+        segments = {}
+        last_id = 0
+        for path in sorted(self.segment_dir.glob("seg-*.journal")):
+            index = self._path_index(path)
+            if index < 0:
+                continue
+            segment = _Segment(index, path, self.segment_records)
+            first_id = index * self.segment_records + 1
+            
+            with open(path, 'rb') as f:
+                for line_number, line in enumerate(f, 1):
+                    try:
+                        if line.startswith(self.ID_PREFIX):
+                            start = len(self.ID_PREFIX)
+                            added, removed = [int(line[start:line.index(b',', start)])], ()
+                        else:
+                            entry = json.loads(line)
+                            op = entry.get('op')
+                            added = [entry['record']['id']] if op == 'add' else ()
+                            removed = entry['ids'] if op in ('ack', 'remove') else ()
+                    except ValueError:
+                        self.logger.warning(f"Entrada inválida ignorada em {path.name} (linha {line_number})")
+                        continue
+                    
+                    segment.entries += 1
+                    for record_id in added:
+                        self._mark(segment, record_id - first_id, True)
+                        last_id = max(last_id, record_id)
+                    for record_id in removed:
+                        self._mark(segment, record_id - first_id, False)
+            
+            if segment.live_count:
+                segments[index] = segment
+            else:
+                self._retire_segment_file(path)
+        
+        # Sem registros vivos (backlog todo confirmado), os IDs seguem depois do
+        # último segmento retirado; segmentos do histórico de versões anteriores,
+        # sem 'retired_through', também contam
+        retired = self.retired_through
+        if self.history_dir.exists():
+            retired = max([retired] + [self._path_index(p) for p in self.history_dir.glob("seg-*.journal")])
+        last_id = max(last_id, (retired + 1) * self.segment_records)
+        
+        with self._lock:
+            self._segments = segments
+            self.last_id = max(self.last_id, last_id)
+            self._last_appended_id = max(self._last_appended_id, last_id)
+            self._scan_state = (sorted(segments), self.last_id)
+        
+        live_count = sum(segment.live_count for segment in segments.values())
+        self.logger.info(f"Log segmentado varrido: {live_count} registros pendentes em {len(segments)} segmentos")
+        return live_count
+    
+    def iter_records(self, chunk_size: int) -> Iterator[List[Dict]]:
+        """Lê registros vivos segmento a segmento, em blocos de até `chunk_size`
+        
+        Só um segmento é decodificado por vez; registros criados depois de
+        scan() já estão em memória e são ignorados.
+        """
+        if self._scan_state is None:
+            self.scan()
+        indexes, scan_last_id = self._scan_state
+        
+        for index in indexes:
+            path = self._segment_path(index)
+            if not path.exists():
+                continue
+            
+            chunk = list(self._replay_segment(path, scan_last_id).values())
+            for start in range(0, len(chunk), chunk_size):
+                yield chunk[start:start + chunk_size]
+        
+        self._scan_state = None
+    
+    def iter_after(self, after_id: int, chunk_size: int) -> Iterator[List[Dict]]:
+        """Lê registros vivos com ID acima de `after_id`, segmento a segmento
+        
+        Traz de volta à memória leituras que só foram gravadas em disco (fila
+        em memória cheia); só os segmentos a partir do de `after_id` são lidos.
+        """
+        self._writer.flush()
+        first_index = self._segment_index(after_id + 1)
+        with self._lock:
+            indexes = sorted(index for index in self._segments if index >= first_index)
+        
+        for index in indexes:
+            try:
+                records = self._replay_segment(self._segment_path(index))
+            except FileNotFoundError:
+                continue
+            chunk = [record for record_id, record in records.items() if record_id > after_id]
+            for start in range(0, len(chunk), chunk_size):
+                yield chunk[start:start + chunk_size]
+    
+    def iter_export(self, chunk_size: int, include_history: bool = False) -> Iterator[List[Dict]]:
+        """Lê registros para exportação, segmento a segmento, sem afetar a carga
+        
+        Com `include_history`, os segmentos do histórico vêm primeiro, com os
+        registros confirmados marcados como 'synced'. A memória usada é a de um
+        segmento, qualquer que seja o backlog.
+        """
+        self._writer.flush()
+        paths = sorted(self.segment_dir.glob("seg-*.journal"))
+        if include_history and self.history_dir.exists():
+            paths = sorted(self.history_dir.glob("seg-*.journal")) + paths
+        
+        for path in paths:
+            try:
+                records = self._replay_segment(path, keep_acked=include_history)
+            except FileNotFoundError:
+                continue  # Segmento confirmado e apagado durante a exportação
+            chunk = list(records.values())
+            for start in range(0, len(chunk), chunk_size):
+                yield chunk[start:start + chunk_size]
+    
+    def load(self) -> "OrderedDict[int, Dict]":
+        """Reconstrói todos os registros vivos de uma vez"""
+        self.scan()
+        records = OrderedDict()
+        for chunk in self.iter_records(STORAGE_CONFIG["load_chunk_size"]):
+            for record in chunk:
+                records[record['id']] = record
+        return records
+    
+    def append(self, record: Dict) -> bool:
+        """Grava novo registro no segmento do seu ID"""
+        try:
+            data = PendingJournal._encode({'op': 'add', 'record': record})
+            index = self._segment_index(record['id'])
+            with self._lock:
+                segment = self._segments.get(index)
+                if segment is None:
+                    segment = self._segments[index] = _Segment(index, self._segment_path(index), self.segment_records)
+                self._mark(segment, record['id'] - index * self.segment_records - 1, True)
+                segment.entries += 1
+                self._writer.write(data, segment.path)
+                
+                # Primeiro registro de um segmento novo fecha os anteriores
+                empty = []
+                if record['id'] > self._last_appended_id:
+                    self._last_appended_id = record['id']
+                    if segment.entries == 1:
+                        empty = self._take_empty_segments()
+            self._delete_segments(empty)
+            return True
+        except Exception as e:
+            self.logger.error(f"Erro ao gravar no log segmentado {self.segment_dir}: {e}")
+            return False
+    
+    def ack(self, record_ids: Iterable[int]) -> bool:
+        """Grava confirmação de registros; apaga segmentos que ficarem vazios"""
+        return self._remove_ids('ack', record_ids)
+    
+    def remove(self, record_ids: Iterable[int]) -> bool:
+        """Grava remoção de registros (ex.: falhas descartadas)"""
+        return self._remove_ids('remove', record_ids)
+    
+    def update(self, updates: Iterable[Tuple[int, Dict]]) -> bool:
+        """Grava atualização de campos no segmento de cada registro"""
+        try:
+            by_segment = OrderedDict()
+            for record_id, fields in updates:
+                by_segment.setdefault(self._segment_index(record_id), []).append([record_id, fields])
+            
+            with self._lock:
+                for index, entries in by_segment.items():
+                    segment = self._segments.get(index)
+                    if segment is None:
+                        continue
+                    segment.entries += 1
+                    self._writer.write(PendingJournal._encode({'op': 'update', 'updates': entries}), segment.path)
+            return True
+        except Exception as e:
+            self.logger.error(f"Erro ao gravar atualização no log segmentado: {e}")
+            return False
+    
+    def needs_compaction(self, live_count: int) -> bool:
+        """Verifica se algum segmento acumulou entradas obsoletas demais
+        
+        Segmentos normalmente são apagados inteiros; a compactação só atinge
+        os que ficam presos por poucos códigos com muitas tentativas.
+        """
+        with self._lock:
+            return any(self._segment_needs_compaction(s) for s in self._segments.values())
+    
+    def compact(self, records: Iterable[Dict]) -> bool:
+        """Reescreve apenas os segmentos com muitas entradas obsoletas"""
+        with self._lock:
+            targets = {i: s for i, s in self._segments.items() if self._segment_needs_compaction(s)}
+            if not targets:
+                return True
+            
+            by_segment = {index: [] for index in targets}
+            for record in list(records):
+                index = self._segment_index(record['id'])
+                if index in by_segment:
+                    by_segment[index].append(record)
+            
+            try:
+                for index, segment_records in by_segment.items():
+                    segment = targets[index]
+                    tmp_path = segment.path.with_suffix('.tmp')
+                    with open(tmp_path, 'w', encoding='utf-8') as f:
+                        for record in segment_records:
+                            f.write(PendingJournal._encode({'op': 'add', 'record': record}))
+                        f.flush()
+                        os.fsync(f.fileno())
+                    
+                    self._writer.release(segment.path)
+                    os.replace(tmp_path, segment.path)
+                    self.logger.info(f"Segmento {segment.path.name} compactado: "
+                                     f"{segment.entries} -> {len(segment_records)} entradas")
+                    segment.entries = len(segment_records)
+                return True
+            
+            except Exception as e:
+                self.logger.error(f"Erro ao compactar segmentos: {e}")
+                return False
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Aguarda a gravação das entradas enfileiradas"""
+        return self._writer.flush(timeout)
+    
+    def get_write_stats(self) -> Dict:
+        """Retorna latência leitura→durável, contadores do writer e dos segmentos"""
+        stats = self._writer.get_stats()
+        stats['segments'] = len(self._segments)
+        stats['deleted_segments'] = self.deleted_segments
+        return stats
+    
+    def close(self):
+        """Grava entradas pendentes e fecha os segmentos"""
+        self._writer.close()
+    
+    def _segment_index(self, record_id: int) -> int:
+        return (record_id - 1) // self.segment_records
+    
+    def _segment_path(self, index: int) -> Path:
+        return self.segment_dir / f"seg-{index:08d}.journal"
+    
+    @staticmethod
+    def _path_index(path: Path) -> int:
+        """Índice do segmento pelo nome do arquivo (-1 se não for um segmento)"""
+        try:
+            return int(path.stem.split('-', 1)[1])
+        except (IndexError, ValueError):
+            return -1
+    
+    def _save_meta(self):
+        """Grava segmentos.json de forma atômica (temporário + rename)"""
+        meta_path = self.segment_dir / self.META_FILE
+        tmp_path = meta_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'segment_records': self.segment_records, 'retired_through': self.retired_through}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, meta_path)
+    
+    def _segment_needs_compaction(self, segment: _Segment) -> bool:
+        dead_entries = segment.entries - segment.live_count
+        return dead_entries >= self.compaction_threshold and dead_entries >= segment.live_count
+    
+    @staticmethod
+    def _mark(segment: _Segment, offset: int, alive: bool):
+        """Marca ID (deslocamento no segmento) como vivo ou confirmado"""
+        if not 0 <= offset < len(segment.live) or segment.live[offset] == alive:
+            return
+        segment.live[offset] = alive
+        segment.live_count += 1 if alive else -1
+    
+    def _remove_ids(self, op: str, record_ids: Iterable[int]) -> bool:
+        """Grava confirmação/remoção por segmento e apaga os que ficarem vazios"""
+        try:
+            by_segment = OrderedDict()
+            for record_id in record_ids:
+                by_segment.setdefault(self._segment_index(record_id), []).append(record_id)
+            
+            with self._lock:
+                for index, ids in by_segment.items():
+                    segment = self._segments.get(index)
+                    if segment is None:
+                        continue
+                    first_id = index * self.segment_records + 1
+                    for record_id in ids:
+                        self._mark(segment, record_id - first_id, False)
+                    
+                    # Segmento que vai ser apagado não precisa da entrada (no histórico, precisa)
+                    if segment.live_count or not self._is_closed(index) or self.history_segments:
+                        segment.entries += 1
+                        self._writer.write(PendingJournal._encode({'op': op, 'ids': ids}), segment.path)
+                empty = self._take_empty_segments()
+            
+            self._delete_segments(empty)
+            return True
+        except Exception as e:
+            self.logger.error(f"Erro ao gravar {op} no log segmentado: {e}")
+            return False
+    
+    def _is_closed(self, index: int) -> bool:
+        """Segmento não receberá mais registros novos (já há gravação no seguinte)"""
+        return index < self._segment_index(self._last_appended_id + 1)
+    
+    def _take_empty_segments(self) -> List[_Segment]:
+        """Retira do índice os segmentos fechados sem registros vivos (chamar com lock)"""
+        empty = [s for i, s in self._segments.items() if not s.live_count and self._is_closed(i)]
+        for segment in empty:
+            del self._segments[segment.index]
+        return empty
+    
+    def _delete_segments(self, segments: List[_Segment]):
+        """Apaga (ou move para o histórico) segmentos vazios (fora do lock: espera o writer)"""
+        for segment in segments:
+            try:
+                self._writer.release(segment.path)
+                self._retire_segment_file(segment.path)
+                self.logger.info(f"Segmento {segment.path.name} confirmado por completo")
+            except Exception as e:
+                self.logger.error(f"Erro ao apagar segmento {segment.path}: {e}")
+    
+    def _retire_segment_file(self, path: Path):
+        """Move segmento sem registros vivos para o histórico, ou o apaga
+        
+        A marca de segmento retirado é gravada antes: se a energia cair entre
+        as duas operações, o segmento apenas é retirado de novo no scan().
+        """
+        self.deleted_segments += 1
+        index = self._path_index(path)
+        with self._meta_lock:
+            if index > self.retired_through:
+                self.retired_through = index
+                self._save_meta()
+        
+        if not self.history_segments:
+            path.unlink(missing_ok=True)
+            return
+        
+        self.history_dir.mkdir(exist_ok=True)
+        os.replace(path, self.history_dir / path.name)
+        history = sorted(self.history_dir.glob("seg-*.journal"), key=self._path_index)
+        for old_path in history[:-self.history_segments]:
+            old_path.unlink(missing_ok=True)
+    
+    @staticmethod
+    def _replay_segment(path: Path, max_id: Optional[int] = None,
+                        keep_acked: bool = False) -> "OrderedDict[int, Dict]":
+        """Reconstrói os registros de um segmento
+        
+        Registros confirmados são descartados ou, com `keep_acked`, mantidos
+        com status 'synced'. IDs acima de `max_id` são ignorados.
+        """
+        records = OrderedDict()
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                op = entry.get('op')
+                if op == 'add':
+                    record = entry['record']
+                    if max_id is None or record['id'] <= max_id:
+                        records[record['id']] = record
+                elif op == 'ack' and keep_acked:
+                    for record_id in entry['ids']:
+                        if record_id in records:
+                            records[record_id]['status'] = 'synced'
+                elif op in ('ack', 'remove'):
+                    for record_id in entry['ids']:
+                        records.pop(record_id, None)
+                elif op == 'update':
+                    for record_id, fields in entry['updates']:
+                        if record_id in records:
+                            records[record_id].update(fields)
+        return records
+    
+    def _migrate_legacy_files(self):
+        """Distribui o journal único (ou pendentes.csv) antigo pelos segmentos"""
+        journal = PendingJournal(self.legacy_journal, self.legacy_csv)
+        records = list(journal.load().values())
+        journal.close()
+        self.logger.info(f"Migrando {len(records)} códigos do journal para segmentos")
+        
+        by_segment = OrderedDict()
+        for record in records:
+            by_segment.setdefault(self._segment_index(record['id']), []).append(record)
+        
+        try:
+            for index, segment_records in by_segment.items():
+                with open(self._segment_path(index), 'a', encoding='utf-8') as f:
+                    for record in segment_records:
+                        f.write(PendingJournal._encode({'op': 'add', 'record': record}))
+                    f.flush()
+                    os.fsync(f.fileno())
+        except Exception as e:
+            self.logger.error(f"Erro ao migrar journal para segmentos: {e}")
+            return
+        
+        if self.legacy_journal.exists():
+            self.legacy_journal.rename(self.legacy_journal.with_suffix('.journal.migrado'))
+
+
+# Backends de open_pending_store(), todos com a mesma interface
+PendingStore = Union[PendingJournal, SQLitePendingStore, SegmentedPendingLog]
+
+
+def open_pending_store() -> PendingStore:
+    """Abre o armazenamento de pendentes configurado em STORAGE_CONFIG["backend"]"""
+    if STORAGE_CONFIG["backend"] == "sqlite":
+        return SQLitePendingStore(PENDING_DB_FILE)
+    if STORAGE_CONFIG["backend"] == "journal":
+        return PendingJournal(PENDING_JOURNAL_FILE)
+    return SegmentedPendingLog(PENDING_SEGMENT_DIR)
\ No newline at end of file
@@ -0,0 +1,225 @@
+"""
+Módulo de escrita em grupo (group commit) dos registros persistidos
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Dict, Optional
+
+from src.utils import setup_logging
+
+
+DURABILITY_LEVELS = ('none', 'flush', 'fsync')
+
+
+class LatencyStats:
+    """Amostras recentes de latência (janela limitada) com percentis"""
+    
+    def __init__(self, max_samples: int = 1000):
+        self._samples = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.max = 0.0
+    
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+            if seconds > self.max:
+                self.max = seconds
+    
+    def snapshot(self) -> Dict:
+        """Retorna contagem e percentis em milissegundos"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return {'count': self.count, 'p50_ms': None, 'p99_ms': None, 'max_ms': None}
+        return {
+            'count': self.count,
+            'p50_ms': round(samples[len(samples) // 2] * 1000, 3),
+            'p99_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000, 3),
+            'max_ms': round(self.max * 1000, 3)
+        }
+
+
+class GroupCommitWriter:
+    """Escritor de arquivo append-only com commit em grupo
+    
+    Quem grava só enfileira os dados e retorna; uma thread dedicada mantém o
+    arquivo aberto e, a cada `flush_interval`, grava tudo o que acumulou com
+    uma única escrita e um único flush/fsync. Assim uma rajada de leituras
+    custa poucas chamadas de sistema e a thread do scanner não espera pelo
+    cartão SD.
+    
+    Uma mesma thread pode atender vários arquivos (ex.: segmentos): escritas
+    com `path` vão para esse arquivo, e até `max_open_files` ficam abertos.
+    
+    Durabilidade:
+        none  - dados ficam no buffer do processo até o fechamento ou buffer cheio
+        flush - entregues ao sistema operacional a cada grupo (sobrevivem a falha do processo)
+        fsync - gravados no disco a cada grupo (sobrevivem a queda de energia)
+    """
+    
+    def __init__(self, path: Optional[Path] = None, flush_interval: float = 0.05,
+                 durability: str = 'flush', max_open_files: int = 8):
+        self.logger = setup_logging("persist_writer")
+        self.path = Path(path) if path is not None else None
+        self.max_open_files = max(1, max_open_files)
+        self.flush_interval = max(0.0, flush_interval)
+        if durability not in DURABILITY_LEVELS:
+            self.logger.warning(f"Durabilidade {durability} inválida, usando flush")
+            durability = 'flush'
+        self.durability = durability
+        
+        self.latency = LatencyStats()
+        self.commits = 0
+        self.errors = 0
+        self.bytes_written = 0
+        
+        self._files: "OrderedDict[Path, object]" = OrderedDict()
+        self._pending = []
+        self._enqueued = 0
+        self._committed = 0
+        self._closing = False
+        self._urgent = False
+        self._cond = threading.Condition()
+        self._thread = None
+    
+    def write(self, data: str, path: Optional[Path] = None) -> int:
+        """Enfileira dados para gravação e retorna o número de sequência"""
+        path = self.path if path is None else path
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                self._closing = False
+                self._thread = threading.Thread(target=self._run, name="persist_writer", daemon=True)
+                self._thread.start()
+            self._pending.append((path, data, time.monotonic()))
+            self._enqueued += 1
+            # Só a primeira entrada do grupo acorda a thread de escrita
+            if len(self._pending) == 1:
+                self._cond.notify_all()
+            return self._enqueued
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Aguarda a gravação de tudo o que foi enfileirado até agora"""
+        with self._cond:
+            target = self._enqueued
+            if self._committed < target:
+                self._urgent = True  # Encerra a janela de agrupamento em curso
+                self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._committed >= target or self._thread is None, timeout)
+    
+    def release(self, path: Optional[Path] = None):
+        """Grava pendências e fecha o arquivo (ou todos, se `path` for None)
+        
+        O arquivo é reaberto na próxima escrita. Usado antes de o arquivo ser
+        substituído (ex.: compactação) ou apagado.
+        """
+        self.flush()
+        with self._cond:
+            if path is None:
+                for open_path in list(self._files):
+                    self._close_file(open_path)
+            else:
+                self._close_file(Path(path))
+    
+    def close(self, timeout: float = 5.0):
+        """Grava pendências, para a thread e fecha o arquivo"""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout=timeout)
+        with self._cond:
+            self._thread = None
+            for open_path in list(self._files):
+                self._close_file(open_path)
+            self._cond.notify_all()
+    
+    def get_stats(self) -> Dict:
+        """Retorna latência leitura→durável e contadores de commit"""
+        stats = self.latency.snapshot()
+        stats.update({
+            'durability': self.durability,
+            'flush_interval': self.flush_interval,
+            'commits': self.commits,
+            'errors': self.errors,
+            'bytes_written': self.bytes_written,
+            'queued': len(self._pending)
+        })
+        return stats
+    
+    def _run(self):
+        """Loop da thread de escrita"""
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closing)
+                if not self._pending and self._closing:
+                    return
+                
+                # Janela de agrupamento: acumula o que chegar no intervalo
+                # (escritas não acordam a thread; flush() e close() sim)
+                if self.flush_interval and not self._closing:
+                    self._cond.wait_for(lambda: self._urgent or self._closing, self.flush_interval)
+                
+                batch, self._pending = self._pending, []
+                self._urgent = False
+            
+            self._commit(batch)
+            
+            with self._cond:
+                self._committed += len(batch)
+                self._cond.notify_all()
+    
+    def _commit(self, batch):
+        """Grava um grupo com uma escrita e um flush/fsync por arquivo"""
+        by_path = OrderedDict()
+        for path, data, _ in batch:
+            by_path.setdefault(path, []).append(data)
+        
+        for path, chunks in by_path.items():
+            try:
+                f = self._open_file(path)
+                text = ''.join(chunks)
+                f.write(text)
+                self.bytes_written += len(text.encode('utf-8'))
+                if self.durability != 'none':
+                    f.flush()
+                if self.durability == 'fsync':
+                    os.fsync(f.fileno())
+            except Exception as e:
+                self.errors += 1
+                self.logger.error(f"Erro ao gravar {len(chunks)} entradas em {path}: {e}")
+                with self._cond:
+                    self._close_file(path)
+        self.commits += 1
+        
+        now = time.monotonic()
+        for _, _, enqueued_at in batch:
+            self.latency.record(now - enqueued_at)
+    
+    def _open_file(self, path: Path):
+        """Retorna arquivo aberto para `path`, fechando o menos usado se preciso"""
+        with self._cond:
+            f = self._files.get(path)
+            if f is not None:
+                self._files.move_to_end(path)
+                return f
+            
+            while len(self._files) >= self.max_open_files:
+                self._close_file(next(iter(self._files)))
+            f = open(path, 'a', encoding='utf-8')
+            self._files[path] = f
+            return f
+    
+    def _close_file(self, path: Path):
+        f = self._files.pop(path, None)
+        if f is not None:
+            try:
+                f.close()
+            except Exception:
+                pass
\ No newline at end of file
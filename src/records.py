@@ -0,0 +1,115 @@
+"""
+Módulo da representação compacta de códigos pendentes em memória
+"""
+
+import sys
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from src.utils import format_timestamp
+
+
+class PendingRecord:
+    """Registro de leitura pendente com __slots__
+    
+    Substitui o dict por código: campos fixos ficam em slots, device_id e
+    status são internados (uma única string por dispositivo/estado) e
+    formatted_time é derivado do timestamp em vez de armazenado. Campos extras
+    (metadados do scanner) vão para `extra`, criado só quando existem.
+    
+    Mantém a interface de mapeamento usada pelos armazenamentos e pela
+    sincronização (`record['status']`, `get`, `items`). formatted_time não
+    faz parte dela: é lido por `record['formatted_time']` na interface e
+    incluído só por to_display_dict(), nunca no que é gravado ou enviado.
+    """
+    
+    FIELDS = ('id', 'code', 'timestamp', 'device_id', 'idempotency_key',
+              'retry_count', 'last_attempt', 'next_attempt', 'status')
+    
+    __slots__ = FIELDS + ('extra',)
+    
+    def __init__(self, id: int, code: str, timestamp: str, device_id: Optional[str],
+                 idempotency_key: Optional[str] = None, retry_count: int = 0,
+                 last_attempt: Optional[str] = None, next_attempt: float = 0,
+                 status: str = 'pending', extra: Optional[Dict[str, Any]] = None):
+        self.id = id
+        self.code = code
+        self.timestamp = timestamp
+        self.device_id = sys.intern(device_id) if device_id else device_id
+        self.idempotency_key = idempotency_key
+        self.retry_count = retry_count
+        self.last_attempt = last_attempt
+        self.next_attempt = next_attempt
+        self.status = sys.intern(status)
+        self.extra = extra or None
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PendingRecord":
+        """Converte registro lido do armazenamento (dict)"""
+        extra = {k: v for k, v in data.items() if k not in cls.FIELDS and k != 'formatted_time'}
+        return cls(
+            data['id'], data['code'], data['timestamp'], data.get('device_id'),
+            idempotency_key=data.get('idempotency_key'),
+            retry_count=int(data.get('retry_count') or 0),
+            last_attempt=data.get('last_attempt') or None,
+            next_attempt=data.get('next_attempt') or 0,
+            status=data.get('status') or 'pending',
+            extra=extra
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Converte para dict (formato gravado e enviado)"""
+        return dict(self.items())
+    
+    def to_display_dict(self) -> Dict[str, Any]:
+        """Converte para dict com formatted_time (interface e exportação)"""
+        data = self.to_dict()
+        data['formatted_time'] = self.formatted_time
+        return data
+    
+    @property
+    def formatted_time(self) -> str:
+        try:
+            return format_timestamp(datetime.fromisoformat(self.timestamp))
+        except (TypeError, ValueError):
+            return ''
+    
+    def keys(self) -> Iterator[str]:
+        yield from self.FIELDS
+        if self.extra:
+            yield from self.extra
+    
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        for key in self.keys():
+            yield key, self[key]
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+    
+    def __getitem__(self, key: str) -> Any:
+        if key in self.FIELDS:
+            return getattr(self, key)
+        if key == 'formatted_time':
+            return self.formatted_time
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+    
+    def __setitem__(self, key: str, value: Any):
+        if key == 'status':
+            self.status = sys.intern(value)
+        elif key in self.FIELDS:
+            setattr(self, key, value)
+        elif key != 'formatted_time':
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self.FIELDS or bool(self.extra and key in self.extra)
+    
+    def __repr__(self) -> str:
+        return f"PendingRecord(id={self.id}, code={self.code!r}, status={self.status!r})"
\ No newline at end of file
@@ -3,6 +3,7 @@ Módulo de captura global do scanner de códigos de barras
 """
 
 import evdev
+import functools
 import threading
 import time
 import queue
@@ -13,7 +14,35 @@ import os
 import subprocess
 
 from config.settings import SCANNER_CONFIG
-from src.utils import setup_logging, run_command
+from src.utils import setup_logging
+from src.dedup import RecentCodeFilter
+from src.keymap import KeyDecoder
+from src.input_reader import RawEventReader
+from src.event_loop import EpollLoop
+from src.device_manager import InputDeviceManager
+
+KEY_ENTER = evdev.ecodes.KEY_ENTER
+KEY_KPENTER = evdev.ecodes.KEY_KPENTER
+KEY_BACKSPACE = evdev.ecodes.KEY_BACKSPACE
+
+
+class DeviceDecodeState:
+    """Estado de decodificação de um dispositivo de entrada
+    
+    Cada scanner tem buffer, horário da última tecla e decodificador
+    (Shift/CapsLock/tecla morta) próprios, então leituras simultâneas em
+    dois scanners não se misturam. `source` é o caminho do dispositivo
+    (None para leituras simuladas).
+    """
+    
+    __slots__ = ('source', 'decoder', 'buffer', 'last_key_time', 'scans')
+    
+    def __init__(self, source: Optional[str], layout: str):
+        self.source = source
+        self.decoder = KeyDecoder(layout)
+        self.buffer = ""
+        self.last_key_time = 0
+        self.scans = 0
 
 
 class BarcodeScanner:
@@ -21,14 +50,24 @@ class BarcodeScanner:
     
     def __init__(self):
         self.logger = setup_logging("barcode_scanner")
-        self.scanner_devices = []
         self.is_running = False
         self.scanner_thread = None
-        self.code_buffer = ""
-        self.last_key_time = 0
         self.key_timeout = 0.1  # 100ms entre teclas para considerar como um código
         self.callback = None
         self.device_paths = []
+        self.device_manager = InputDeviceManager(SCANNER_CONFIG.get("input_dir", "/dev/input"))
+        self.layout = SCANNER_CONFIG.get("keyboard_layout", "us")
+        self.raw_input = SCANNER_CONFIG.get("raw_input", True)
+        self._loop = None
+        self._devices = {}  # fd -> (caminho, RawEventReader ou InputDevice, handler de tecla)
+        self._states: Dict[str, DeviceDecodeState] = {}  # caminho -> estado de decodificação
+        self._states_lock = threading.Lock()  # _states e device_paths mudam na thread do loop
+        self._default_state = DeviceDecodeState(None, self.layout)
+        self.dedup_mode = SCANNER_CONFIG.get("dedup_mode", "drop")
+        self.recent_codes = RecentCodeFilter(
+            SCANNER_CONFIG.get("dedup_window", 0),
+            SCANNER_CONFIG.get("dedup_max_entries", 256)
+        )
         
         # Encontrar dispositivos de scanner
         self._find_scanner_devices()
@@ -36,67 +75,16 @@ class BarcodeScanner:
     def _find_scanner_devices(self):
         """Encontra dispositivos de scanner USB"""
         try:
-            # Listar dispositivos de entrada
-            success, output, _ = run_command("ls /dev/input/event*")
-            if not success:
-                self.logger.error("Erro ao listar dispositivos de entrada")
-                return
-            
-            for device_path in output.split():
-                try:
-                    device = evdev.InputDevice(device_path)
-                    
-                    # Verificar se é um dispositivo de teclado (scanner simula teclado)
-                    if evdev.ecodes.EV_KEY in device.capabilities():
-                        # Tentar identificar se é um scanner (geralmente tem nome específico)
-                        device_name = device.name.lower()
-                        if any(keyword in device_name for keyword in ['scanner', 'barcode', 'usb']):
-                            self.scanner_devices.append(device)
-                            self.device_paths.append(device_path)
-                            self.logger.info(f"Scanner encontrado: {device.name} em {device_path}")
-                        else:
-                            # Verificar se é um teclado USB genérico (pode ser scanner)
-                            if 'usb' in device_name and 'keyboard' in device_name:
-                                self.scanner_devices.append(device)
-                                self.device_paths.append(device_path)
-                                self.logger.info(f"Teclado USB encontrado (possível scanner): {device.name} em {device_path}")
-                    
-                    device.close()
-                    
-                except Exception as e:
-                    self.logger.debug(f"Erro ao verificar dispositivo {device_path}: {e}")
-                    continue
-            
-            if not self.scanner_devices:
-                self.logger.warning("Nenhum scanner encontrado. Tentando usar teclado padrão...")
-                self._setup_fallback_keyboard()
-                
+            self.device_paths = self.device_manager.discover()
         except Exception as e:
             self.logger.error(f"Erro ao encontrar dispositivos de scanner: {e}")
-            self._setup_fallback_keyboard()
     
-    def _setup_fallback_keyboard(self):
-        """Configura teclado padrão como fallback"""
-        try:
-            # Tentar usar teclado padrão
-            success, output, _ = run_command("ls /dev/input/event*")
-            if success:
-                for device_path in output.split():
-                    try:
-                        device = evdev.InputDevice(device_path)
-                        if evdev.ecodes.EV_KEY in device.capabilities():
-                            self.scanner_devices.append(device)
-                            self.device_paths.append(device_path)
-                            self.logger.info(f"Usando teclado padrão: {device.name} em {device_path}")
-                            break
-                        device.close()
-                    except:
-                        continue
-        except Exception as e:
-            self.logger.error(f"Erro ao configurar teclado padrão: {e}")
-    
-    def set_callback(self, callback: Callable[[str, datetime], None]):
-        """Define callback para quando um código for capturado"""
+    def set_callback(self, callback: Callable[..., None]):
+        """Define callback para quando um código for capturado
+        
+        O callback recebe (código, timestamp). No modo de deduplicação "tag",
+        leituras repetidas recebem também metadados {'repeated_scan': True}.
+        """
         self.callback = callback
     
     def start_capture(self):
@@ -105,11 +93,16 @@ class BarcodeScanner:
             self.logger.warning("Captura já está rodando")
             return False
         
-        if not self.scanner_devices:
-            self.logger.error("Nenhum dispositivo de scanner disponível")
-            return False
+        # Monitorar /dev/input antes de refazer a descoberta: um scanner
+        # conectado depois da descoberta do construtor não fica de fora
+        if self.device_manager.watch() is not None:
+            self._find_scanner_devices()
+        
+        if not self.device_paths:
+            self.logger.warning("Nenhum dispositivo de scanner disponível, aguardando conexão")
         
         self.is_running = True
+        self._loop = EpollLoop()
         self.scanner_thread = threading.Thread(target=self._capture_loop, daemon=True)
         self.scanner_thread.start()
         
@@ -119,151 +112,253 @@ class BarcodeScanner:
     def stop_capture(self):
         """Para captura de códigos de barras"""
         self.is_running = False
+        if self._loop:
+            self._loop.stop()
         if self.scanner_thread:
             self.scanner_thread.join(timeout=2)
         
-        # Fechar dispositivos
-        for device in self.scanner_devices:
-            try:
-                device.close()
-            except:
-                pass
-        
-        self.scanner_devices.clear()
         self.logger.info("Captura de scanner parada")
     
     def _capture_loop(self):
-        """Loop principal de captura"""
+        """Loop principal de captura
+        
+        Bloqueia em epoll até algum dispositivo ter eventos, até uma mudança
+        em /dev/input ou até stop_capture(); com o scanner parado a thread
+        não acorda. Scanners conectados e desconectados entram e saem do
+        loop sem interromper a captura dos demais.
+        """
+        loop = self._loop
         try:
-            # Criar lista de dispositivos para monitorar
-            devices = []
-            for device_path in self.device_paths:
-                try:
-                    device = evdev.InputDevice(device_path)
-                    devices.append(device)
-                except Exception as e:
-                    self.logger.error(f"Erro ao abrir dispositivo {device_path}: {e}")
+            for device_path in list(self.device_paths):
+                self._open_device(device_path)
             
-            if not devices:
+            watch_fd = self.device_manager.inotify_fd
+            if watch_fd is not None:
+                loop.add(watch_fd, self._on_device_changes)
+            elif not self._devices:
                 self.logger.error("Nenhum dispositivo pode ser aberto")
+                self.is_running = False
                 return
             
-            # Monitorar eventos de todos os dispositivos
-            while self.is_running:
-                try:
-                    # Usar select para monitorar múltiplos dispositivos
-                    import select
-                    ready, _, _ = select.select(devices, [], [], 0.1)
-                    
-                    for device in ready:
-                        try:
-                            for event in device.read():
-                                if event.type == evdev.ecodes.EV_KEY:
-                                    self._process_key_event(event)
-                        except (OSError, BlockingIOError):
-                            continue
-                        except Exception as e:
-                            self.logger.error(f"Erro ao ler eventos do dispositivo {device.path}: {e}")
-                            continue
-                            
-                except Exception as e:
-                    self.logger.error(f"Erro no loop de captura: {e}")
-                    time.sleep(0.1)
-                    
+            loop.run()
+        
         except Exception as e:
             self.logger.error(f"Erro fatal no loop de captura: {e}")
         finally:
-            # Fechar dispositivos
-            for device in devices:
-                try:
-                    device.close()
-                except:
-                    pass
+            if self.device_manager.inotify_fd is not None:
+                loop.remove(self.device_manager.inotify_fd)
+                self.device_manager.close()
+            for fd in list(self._devices):
+                self._close_device(fd, forget=False)
+            loop.close()
+    
+    def _open_device(self, device_path: str) -> bool:
+        """Abre dispositivo e o inclui no loop de captura
+        
+        Com SCANNER_CONFIG["raw_input"], o descritor é lido por um
+        RawEventReader (sem objetos InputEvent); senão, por evdev.
+        """
+        try:
+            if self.raw_input:
+                fd = os.open(device_path, os.O_RDONLY | os.O_NONBLOCK)
+                source = RawEventReader(fd)
+            else:
+                source = evdev.InputDevice(device_path)
+                fd = source.fd
+        except OSError as e:
+            self.logger.error(f"Erro ao abrir dispositivo {device_path}: {e}")
+            return False
+        
+        # Estado novo a cada abertura: nada de uma conexão anterior vaza para a próxima
+        state = DeviceDecodeState(device_path, self.layout)
+        with self._states_lock:
+            self._states[device_path] = state
+            if device_path not in self.device_paths:
+                self.device_paths.append(device_path)
+        self._devices[fd] = (device_path, source, functools.partial(self._process_key, state=state))
+        self._loop.add(fd, self._read_device)
+        return True
+    
+    def _close_device(self, fd: int, forget: bool = True):
+        """Remove dispositivo do loop de captura e fecha o descritor
+        
+        Com `forget`, o caminho sai de device_paths (dispositivo
+        desconectado); ao parar a captura ele é mantido para a próxima.
+        """
+        device_path, source, _ = self._devices.pop(fd, (None, None, None))
+        with self._states_lock:
+            self._states.pop(device_path, None)
+            if forget and device_path in self.device_paths:
+                self.device_paths.remove(device_path)
+        self._loop.remove(fd)
+        try:
+            if isinstance(source, RawEventReader):
+                os.close(fd)
+            elif source is not None:
+                source.close()
+        except OSError:
+            pass
+    
+    def _read_device(self, fd: int):
+        """Lê eventos disponíveis de um dispositivo (chamado pelo loop de captura)"""
+        device_path, source, handler = self._devices[fd]
+        try:
+            if isinstance(source, RawEventReader):
+                source.read_keys(handler)
+            else:
+                for event in source.read():
+                    if event.type == evdev.ecodes.EV_KEY:
+                        handler(event.code, event.value)
+        except BlockingIOError:
+            pass
+        except (EOFError, OSError) as e:
+            # Dispositivo desconectado
+            self.logger.error(f"Dispositivo {device_path} indisponível: {e}")
+            self._close_device(fd)
+            if not self._devices:
+                self.logger.warning("Nenhum dispositivo de scanner aberto")
+    
+    def _open_fd(self, device_path: str) -> Optional[int]:
+        """Descritor do dispositivo aberto em `device_path`, se houver"""
+        for fd, (path, _, _) in self._devices.items():
+            if path == device_path:
+                return fd
+        return None
+    
+    def _on_device_changes(self, inotify_fd: int):
+        """Inclui e remove dispositivos conforme os eventos do inotify (thread do loop)"""
+        for change, device_path in self.device_manager.read_changes():
+            if change == 'rescan':
+                self._sync_devices()
+                continue
+            
+            fd = self._open_fd(device_path)
+            if change == 'removed':
+                if fd is not None:
+                    self.logger.info(f"Scanner desconectado: {device_path}")
+                    self._close_device(fd)
+            elif fd is None:
+                # Nó novo ou com permissão alterada: só scanners reconhecidos entram
+                name = self.device_manager.probe(device_path)
+                if name and self._open_device(device_path):
+                    self.logger.info(f"Scanner conectado: {name} em {device_path}")
     
-    def _process_key_event(self, event):
-        """Processa evento de tecla do scanner"""
-        if event.code == evdev.ecodes.KEY_ENTER:
+    def _sync_devices(self):
+        """Refaz a descoberta e ajusta os dispositivos abertos (thread do loop)"""
+        wanted = self.device_manager.discover()
+        for fd, (device_path, _, _) in list(self._devices.items()):
+            if device_path not in wanted:
+                self._close_device(fd)
+        for device_path in wanted:
+            if self._open_fd(device_path) is None:
+                self._open_device(device_path)
+    
+    def _process_key_event(self, event, state: DeviceDecodeState = None):
+        """Processa evento de tecla do scanner (InputEvent do evdev)"""
+        self._process_key(event.code, event.value, state)
+    
+    def _process_key(self, code: int, value: int, state: DeviceDecodeState = None):
+        """Processa tecla do scanner (valor 1 = pressionada, 0 = solta)
+        
+        `state` é o estado do dispositivo que enviou a tecla; sem ele (leituras
+        simuladas) usa um estado comum.
+        """
+        if state is None:
+            state = self._default_state
+        
+        if code == KEY_ENTER or code == KEY_KPENTER:
             # Enter indica fim do código
-            if self.code_buffer:
-                self._process_complete_code()
-        elif event.code == evdev.ecodes.KEY_BACKSPACE:
+            if value == 1 and state.buffer:
+                self._process_complete_code(state)
+            return
+        
+        if code == KEY_BACKSPACE:
             # Backspace remove último caractere
-            if self.code_buffer:
-                self.code_buffer = self.code_buffer[:-1]
-        elif event.value == 1:  # Tecla pressionada
+            if value == 1 and state.buffer:
+                state.buffer = state.buffer[:-1]
+            return
+        
+        if value == 1:  # Tecla pressionada
             # Verificar timeout entre teclas
             current_time = time.time()
-            if current_time - self.last_key_time > self.key_timeout:
-                self.code_buffer = ""
-            
-            self.last_key_time = current_time
-            
-            # Converter código de tecla para caractere
-            char = self._keycode_to_char(event.code)
-            if char:
-                self.code_buffer += char
-    
-    def _keycode_to_char(self, keycode):
-        """Converte código de tecla para caractere"""
-        # Mapeamento básico de códigos de tecla para caracteres
-        key_mapping = {
-            evdev.ecodes.KEY_A: 'a', evdev.ecodes.KEY_B: 'b', evdev.ecodes.KEY_C: 'c',
-            evdev.ecodes.KEY_D: 'd', evdev.ecodes.KEY_E: 'e', evdev.ecodes.KEY_F: 'f',
-            evdev.ecodes.KEY_G: 'g', evdev.ecodes.KEY_H: 'h', evdev.ecodes.KEY_I: 'i',
-            evdev.ecodes.KEY_J: 'j', evdev.ecodes.KEY_K: 'k', evdev.ecodes.KEY_L: 'l',
-            evdev.ecodes.KEY_M: 'm', evdev.ecodes.KEY_N: 'n', evdev.ecodes.KEY_O: 'o',
-            evdev.ecodes.KEY_P: 'p', evdev.ecodes.KEY_Q: 'q', evdev.ecodes.KEY_R: 'r',
-            evdev.ecodes.KEY_S: 's', evdev.ecodes.KEY_T: 't', evdev.ecodes.KEY_U: 'u',
-            evdev.ecodes.KEY_V: 'v', evdev.ecodes.KEY_W: 'w', evdev.ecodes.KEY_X: 'x',
-            evdev.ecodes.KEY_Y: 'y', evdev.ecodes.KEY_Z: 'z',
-            evdev.ecodes.KEY_0: '0', evdev.ecodes.KEY_1: '1', evdev.ecodes.KEY_2: '2',
-            evdev.ecodes.KEY_3: '3', evdev.ecodes.KEY_4: '4', evdev.ecodes.KEY_5: '5',
-            evdev.ecodes.KEY_6: '6', evdev.ecodes.KEY_7: '7', evdev.ecodes.KEY_8: '8',
-            evdev.ecodes.KEY_9: '9',
-            evdev.ecodes.KEY_MINUS: '-', evdev.ecodes.KEY_EQUAL: '=',
-            evdev.ecodes.KEY_LEFTBRACE: '[', evdev.ecodes.KEY_RIGHTBRACE: ']',
-            evdev.ecodes.KEY_BACKSLASH: '\\', evdev.ecodes.KEY_SEMICOLON: ';',
-            evdev.ecodes.KEY_APOSTROPHE: "'", evdev.ecodes.KEY_GRAVE: '`',
-            evdev.ecodes.KEY_COMMA: ',', evdev.ecodes.KEY_DOT: '.',
-            evdev.ecodes.KEY_SLASH: '/', evdev.ecodes.KEY_SPACE: ' '
-        }
+            if current_time - state.last_key_time > self.key_timeout:
+                state.buffer = ""
+            state.last_key_time = current_time
         
-        return key_mapping.get(keycode, '')
+        # Modificadores (Shift, CapsLock, AltGr) também contam na soltura
+        char = state.decoder.feed(code, value)
+        if char:
+            state.buffer += char
     
-    def _process_complete_code(self):
+    def _process_complete_code(self, state: DeviceDecodeState):
         """Processa código completo capturado"""
-        if not self.code_buffer:
+        if not state.buffer:
             return
         
-        code = self.code_buffer.strip()
+        code = state.buffer.strip()
         timestamp = datetime.now()
+        state.scans += 1
         
-        self.logger.info(f"Código capturado: {code} em {timestamp}")
+        self.logger.info(f"Código capturado: {code} em {timestamp}"
+                         + (f" ({state.source})" if state.source else ""))
         
-        # Chamar callback se definido
-        if self.callback:
-            try:
-                self.callback(code, timestamp)
-            except Exception as e:
-                self.logger.error(f"Erro no callback: {e}")
+        self._dispatch_code(code, timestamp, state.source)
         
         # Limpar buffer
-        self.code_buffer = ""
+        state.buffer = ""
+    
+    def _dispatch_code(self, code: str, timestamp: datetime, source: Optional[str] = None):
+        """Entrega código ao callback, descartando ou marcando leituras repetidas
+        
+        Leituras de um dispositivo levam `source_device` nos metadados; a
+        supressão de repetidas é por dispositivo, então o mesmo produto lido
+        em duas bancadas não é descartado.
+        """
+        if not self.callback:
+            return
+        
+        try:
+            metadata = {'source_device': source} if source else {}
+            if self.recent_codes.is_repeat((source, code) if source else code):
+                if self.dedup_mode != "tag":
+                    self.logger.debug(f"Leitura repetida de {code} descartada")
+                    return
+                metadata['repeated_scan'] = True
+            
+            if metadata:
+                self.callback(code, timestamp, metadata)
+            else:
+                self.callback(code, timestamp)
+        except Exception as e:
+            self.logger.error(f"Erro no callback: {e}")
     
     def get_scanner_status(self) -> Dict:
         """Retorna status do scanner"""
+        # Cópias sob o lock: a thread do loop inclui e remove dispositivos
+        with self._states_lock:
+            states = [self._default_state] + list(self._states.values())
+            device_paths = list(self.device_paths)
+        latest = max(states, key=lambda state: state.last_key_time)
         return {
             'running': self.is_running,
-            'devices_found': len(self.scanner_devices),
-            'device_paths': self.device_paths,
-            'current_buffer': self.code_buffer,
-            'last_activity': self.last_key_time
+            'devices_found': len(device_paths),
+            'device_paths': device_paths,
+            'current_buffer': latest.buffer,
+            'keyboard_layout': self.layout,
+            'last_activity': latest.last_key_time,
+            'devices': {
+                state.source: {'buffer': state.buffer, 'last_activity': state.last_key_time, 'scans': state.scans}
+                for state in states if state.source
+            },
+            'loop_wakeups': self._loop.wakeups if self._loop else 0,
+            'hotplug': self.device_manager.inotify_fd is not None,
+            'dedup': dict(self.recent_codes.get_stats(), mode=self.dedup_mode)
         }
     
     def test_scanner(self) -> bool:
         """Testa se o scanner está funcionando"""
         try:
-            if not self.scanner_devices:
+            if not self.device_paths:
                 return False
             
             # Tentar abrir um dispositivo
@@ -276,11 +371,15 @@ class BarcodeScanner:
             return False
     
     def refresh_devices(self):
-        """Atualiza lista de dispositivos"""
-        self.stop_capture()
-        self._find_scanner_devices()
-        if self.is_running:
-            self.start_capture()
+        """Atualiza lista de dispositivos
+        
+        Com a captura rodando, a descoberta é refeita na thread do loop e só
+        os dispositivos que mudaram são abertos ou fechados.
+        """
+        if self.is_running and self._loop:
+            self._loop.call_soon(self._sync_devices)
+        else:
+            self._find_scanner_devices()
 
 
 class MockScanner(BarcodeScanner):
@@ -292,8 +391,24 @@ class MockScanner(BarcodeScanner):
     
     def simulate_barcode(self, code: str):
         """Simula leitura de código de barras"""
-        if self.callback:
-            self.callback(code, datetime.now())
+        self._dispatch_code(code, datetime.now())
+    
+    def simulate_burst(self, count: int, interval: float, prefix: str = "789") -> List[float]:
+        """Simula `count` leituras a cada `interval` segundos nesta thread
+        
+        Retorna o atraso (segundos) de cada leitura em relação ao horário
+        previsto, que mede a variação de agendamento da thread de captura.
+        """
+        lateness = []
+        start = time.monotonic()
+        for i in range(count):
+            target = start + i * interval
+            delay = target - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            lateness.append(max(0.0, time.monotonic() - target))
+            self.simulate_barcode(f"{prefix}{i:010d}")
+        return lateness
     
     def _find_scanner_devices(self):
         """Não procura dispositivos reais"""
@@ -308,4 +423,4 @@ class MockScanner(BarcodeScanner):
     def stop_capture(self):
         """Para scanner simulado"""
         self.is_running = False
-        self.logger.info("Scanner simulado parado") 
\ No newline at end of file
+        self.logger.info("Scanner simulado parado")
\ No newline at end of file
@@ -0,0 +1,72 @@
+"""
+Módulo de agendamento de tentativas de sincronização
+"""
+
+import heapq
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+
+from config.settings import SYNC_CONFIG
+
+
+class RetryScheduler:
+    """Fila de prioridade de códigos pendentes ordenada pela próxima tentativa
+    
+    Entradas obsoletas (código já sincronizado, removido ou reagendado) não são
+    retiradas do heap na hora; são descartadas quando chegam ao topo.
+    """
+    
+    def __init__(self):
+        self.retry_delay = SYNC_CONFIG["retry_delay"]
+        self.max_retry_delay = SYNC_CONFIG["max_retry_delay"]
+        self._heap = []
+        self._lock = threading.Lock()
+    
+    def backoff_delay(self, retry_count: int) -> float:
+        """Calcula atraso exponencial com jitter para a tentativa"""
+        delay = min(self.max_retry_delay, self.retry_delay * (2 ** max(0, retry_count - 1)))
+        # Jitter evita que todos os códigos de uma queda tentem de novo juntos
+        return random.uniform(delay / 2, delay)
+    
+    def schedule(self, code_data: Dict):
+        """Agenda código para sua próxima tentativa (campo 'next_attempt')"""
+        if code_data.get('status') != 'pending':
+            return
+        with self._lock:
+            heapq.heappush(self._heap, (code_data.get('next_attempt') or 0, code_data['id'], code_data))
+    
+    def pop_due(self, now: Optional[float] = None, limit: Optional[int] = None) -> List[Dict]:
+        """Retira códigos cuja próxima tentativa já venceu"""
+        now = time.time() if now is None else now
+        due = []
+        
+        with self._lock:
+            while self._heap and (limit is None or len(due) < limit):
+                next_attempt, _, code_data = self._heap[0]
+                if next_attempt > now:
+                    break
+                heapq.heappop(self._heap)
+                if self._is_current(next_attempt, code_data):
+                    due.append(code_data)
+        
+        return due
+    
+    def next_due_time(self) -> Optional[float]:
+        """Retorna horário (time.time) da próxima tentativa agendada"""
+        with self._lock:
+            while self._heap:
+                next_attempt, _, code_data = self._heap[0]
+                if self._is_current(next_attempt, code_data):
+                    return next_attempt
+                heapq.heappop(self._heap)
+        return None
+    
+    def __len__(self) -> int:
+        return len(self._heap)
+    
+    @staticmethod
+    def _is_current(next_attempt: float, code_data: Dict) -> bool:
+        """Verifica se a entrada do heap ainda representa o código"""
+        return code_data.get('status') == 'pending' and (code_data.get('next_attempt') or 0) == next_attempt
\ No newline at end of file
@@ -3,79 +3,247 @@ Módulo de sincronização de dados offline
 """
 
 import requests
-import json
-import csv
+import itertools
 import threading
 import time
 from typing import Dict, List, Optional, Tuple
-from datetime import datetime, timedelta
-import logging
-from queue import Queue
-import os
+from datetime import datetime
+from queue import Queue, Empty
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
-from config.settings import API_BASE_URL, API_ENDPOINTS, PENDING_FILE, SCANNER_CONFIG
-from src.utils import setup_logging, append_csv_row, load_csv, save_csv, format_timestamp
+from config.settings import SCANNER_CONFIG, SYNC_CONFIG, STORAGE_CONFIG
+from src.utils import setup_logging, make_idempotency_key
+from src.http_client import HttpClient, get_http_client, supported_encodings
+from src.connectivity import ConnectivityMonitor
+from src.pending_store import PendingStore, open_pending_store
+from src.scheduler import RetryScheduler
+from src.pending_queue import PendingQueue
+from src.records import PendingRecord
+from src.exporter import ScanExporter
 
 
 class DataSync:
     """Gerenciador de sincronização de dados offline"""
     
-    def __init__(self, activation_manager):
+    def __init__(self, activation_manager, http_client: Optional[HttpClient] = None,
+                 connectivity: Optional[ConnectivityMonitor] = None,
+                 store: Optional[PendingStore] = None):
         self.logger = setup_logging("data_sync")
         self.activation_manager = activation_manager
-        self.pending_codes = []
+        self.http_client = http_client or get_http_client()
+        self.connectivity = connectivity or ConnectivityMonitor()
+        self.connectivity.add_listener(self._on_connectivity_change)
+        self.store = store or open_pending_store()
+        self.pending_codes = PendingQueue()
+        self.recent_scans = deque(maxlen=SYNC_CONFIG["recent_scans"])
+        self.scheduler = RetryScheduler()
         self.sync_thread = None
         self.is_running = False
         self.last_sync = None
         self.sync_interval = SCANNER_CONFIG["sync_interval"]
         self.max_retries = SCANNER_CONFIG["max_retries"]
+        self.batch_size = max(1, SYNC_CONFIG["batch_size"])
+        self.batch_supported = True  # Desativado se o servidor não aceitar lotes
+        self.compression = self._resolve_compression(SYNC_CONFIG["compression"])
+        self.max_in_flight = max(1, SYNC_CONFIG["max_in_flight"])
+        self.upload_executor = ThreadPoolExecutor(max_workers=self.max_in_flight,
+                                                  thread_name_prefix="sync_upload")
         self.sync_queue = Queue()
         
-        # Carregar códigos pendentes
-        self._load_pending_codes()
+        # Códigos pendentes são lidos do armazenamento sob demanda, em blocos.
+        # A fila em memória tem no máximo max_buffer_size códigos: leituras além
+        # disso ficam só no armazenamento e são lidas de volta quando há espaço.
+        # Blocos de no máximo metade do limite, para o próximo entrar antes de
+        # a fila esvaziar.
+        self.max_resident = max(1, SCANNER_CONFIG["max_buffer_size"])
+        self.load_chunk_size = max(1, min(STORAGE_CONFIG["load_chunk_size"], self.max_resident // 2))
+        self.unloaded_count = 0
+        self.spilled_count = 0  # Leituras novas gravadas só no armazenamento
+        self.failed_count = 0  # Falhas definitivas, mantidas só no armazenamento
+        self.peak_resident = 0
+        self._spill_after = 0  # Leituras só em disco têm ID acima deste
+        self._spill_expected = 0
+        self._loading_spilled = False
+        self._loader = None
+        self._load_lock = threading.RLock()
+        self._spill_lock = threading.Lock()
+        self._store_ready = threading.Event()
         
         # Iniciar thread de sincronização
         self.start_sync_thread()
     
-    def _load_pending_codes(self):
-        """Carrega códigos pendentes do arquivo CSV"""
-        try:
-            if PENDING_FILE.exists():
-                self.pending_codes = load_csv(PENDING_FILE)
-                self.logger.info(f"Carregados {len(self.pending_codes)} códigos pendentes")
+    @property
+    def is_loading(self) -> bool:
+        """Indica se ainda há códigos pendentes no armazenamento não lidos"""
+        return self._loader is not None or self.spilled_count > 0
+    
+    def _has_room(self) -> bool:
+        """Indica se o próximo bloco cabe na fila em memória"""
+        return len(self.pending_codes) + self.load_chunk_size <= self.max_resident
+    
+    def _open_store(self):
+        """Varre o armazenamento (contagem rápida) e prepara a leitura em blocos
+        
+        Executado uma única vez, na thread de sincronização ou no primeiro uso;
+        não depende do tamanho do backlog além da varredura do índice/journal.
+        """
+        if self._store_ready.is_set():
+            return
+        
+        with self._load_lock:
+            if self._store_ready.is_set():
+                return
+            try:
+                self.unloaded_count = self.store.scan()
+                self._loader = self.store.iter_records(self.load_chunk_size) if self.unloaded_count else None
+                self.logger.info(f"{self.unloaded_count} códigos pendentes no armazenamento")
+            except Exception as e:
+                self.logger.error(f"Erro ao abrir armazenamento de pendentes: {e}")
+                self._loader = None
+            finally:
+                self._store_ready.set()
+    
+    def _load_next_chunk(self) -> List[PendingRecord]:
+        """Lê o próximo bloco de códigos pendentes para a fila em memória
+        
+        Primeiro o backlog encontrado ao abrir o armazenamento, depois as
+        leituras que foram só para o disco com a fila cheia. Não lê nada se o
+        bloco não couber em max_buffer_size. Retorna os registros lidos (lista
+        vazia quando não há o que ler ou espaço).
+        """
+        self._open_store()
+        
+        with self._load_lock:
+            while True:
+                if not self._has_room():
+                    return []
+                
+                if self._loader is None:
+                    with self._spill_lock:
+                        if not self.spilled_count:
+                            return []
+                        self._loader = self.store.iter_after(self._spill_after, self.load_chunk_size)
+                        self._loading_spilled = True
+                        self._spill_expected = self.spilled_count
+                
+                try:
+                    chunk = next(self._loader, None)
+                except Exception as e:
+                    self.logger.error(f"Erro ao carregar códigos pendentes: {e}")
+                    chunk = None
+                
+                if chunk:
+                    break
+                
+                self._loader = None
+                if self._loading_spilled:
+                    self._loading_spilled = False
+                    if self._spill_expected:
+                        # Leituras contadas que não chegaram ao disco (erro de gravação)
+                        with self._spill_lock:
+                            self.logger.warning(f"{self._spill_expected} leituras não encontradas no armazenamento")
+                            self.spilled_count = max(0, self.spilled_count - self._spill_expected)
+                            self._spill_expected = 0
+                    self._compact_store()
+                    return []
+                
+                self.unloaded_count = 0
+                self.logger.info(f"Carga concluída: {len(self.pending_codes)} códigos pendentes em memória")
+                self._compact_store()
+                # Segue para as leituras que foram só para o disco, se houver
+            
+            records = [PendingRecord.from_dict(record) for record in chunk]
+            if self._loading_spilled:
+                # Leituras recentes voltam como os mesmos objetos do histórico da
+                # interface, para o status de sincronização aparecer lá
+                recent = {code_data['id']: code_data for code_data in list(self.recent_scans)}
+                records = [recent.get(code_data['id'], code_data) for code_data in records]
+                with self._spill_lock:
+                    self.spilled_count = max(0, self.spilled_count - len(records))
+                    self._spill_expected = max(0, self._spill_expected - len(records))
+                    self._spill_after = max(self._spill_after, records[-1]['id'])
+                    if not self.spilled_count:
+                        self._loader = None
+                        self._loading_spilled = False
             else:
-                self.pending_codes = []
-        except Exception as e:
-            self.logger.error(f"Erro ao carregar códigos pendentes: {e}")
-            self.pending_codes = []
+                self.unloaded_count = max(0, self.unloaded_count - len(records))
+            
+            # Falhas definitivas não voltam a ser enviadas: ficam só no armazenamento
+            for code_data in records:
+                if code_data.get('status') == 'failed':
+                    self.failed_count += 1
+                    continue
+                self.pending_codes.add(code_data)
+                self.scheduler.schedule(code_data)
+            self._assign_missing_keys(records)
+            self.peak_resident = max(self.peak_resident, len(self.pending_codes))
+            self.logger.debug(f"Carregados {len(records)} códigos pendentes "
+                              f"({self.unloaded_count + self.spilled_count} restantes)")
+            return records
+    
+    def _load_remaining(self):
+        """Lê códigos pendentes restantes até encher a fila em memória"""
+        while self._load_next_chunk():
+            pass
+    
+    def _assign_missing_keys(self, records: List[PendingRecord]):
+        """Gera chave de idempotência para registros gravados antes dela existir"""
+        updates = []
+        for code_data in records:
+            if not code_data.get('idempotency_key'):
+                code_data['idempotency_key'] = make_idempotency_key(
+                    code_data.get('device_id') or self.activation_manager.device_id,
+                    code_data['id'], code_data['code'], code_data['timestamp']
+                )
+                updates.append((code_data['id'], {'idempotency_key': code_data['idempotency_key']}))
+        
+        if updates:
+            self.store.update(updates)
+            self.logger.info(f"Chave de idempotência gerada para {len(updates)} códigos antigos")
     
     def add_code(self, code: str, timestamp: datetime, metadata: Dict = None):
         """Adiciona novo código para sincronização"""
         try:
-            code_data = {
-                'code': code,
-                'timestamp': timestamp.isoformat(),
-                'formatted_time': format_timestamp(timestamp),
-                'device_id': self.activation_manager.device_id,
-                'retry_count': 0,
-                'last_attempt': None,
-                'status': 'pending'
-            }
+            # IDs só podem ser reservados depois da varredura do armazenamento
+            self._open_store()
+            device_id = self.activation_manager.device_id
+            iso_timestamp = timestamp.isoformat()
             
-            # Adicionar metadados se fornecidos
-            if metadata:
-                code_data.update(metadata)
+            # IDs reservados e gravados em ordem: leituras só em disco são
+            # lidas de volta por ID crescente
+            with self._spill_lock:
+                record_id = self.store.next_id()
+                code_data = PendingRecord(
+                    record_id, code, iso_timestamp, device_id,
+                    idempotency_key=make_idempotency_key(device_id, record_id, code, iso_timestamp),
+                    extra=dict(metadata) if metadata else None
+                )
+                
+                # Fila em memória cheia (ou leituras anteriores ainda só em disco):
+                # a leitura fica só no armazenamento até haver espaço
+                spilled = self.spilled_count > 0 or len(self.pending_codes) >= self.max_resident
+                if spilled:
+                    saved = self.store.append(code_data)
+                    if saved:
+                        if not self.spilled_count:
+                            self._spill_after = record_id - 1
+                        self.spilled_count += 1
+                else:
+                    # Adicionar à fila local e salvar no armazenamento
+                    self.pending_codes.add(code_data)
+                    self.scheduler.schedule(code_data)
+                    saved = self.store.append(code_data)
             
-            # Adicionar à lista local
-            self.pending_codes.append(code_data)
+            self.recent_scans.append(code_data)
+            self.peak_resident = max(self.peak_resident, len(self.pending_codes))
             
-            # Salvar no arquivo CSV
-            fieldnames = list(code_data.keys())
-            if append_csv_row(code_data, PENDING_FILE, fieldnames):
-                self.logger.info(f"Código {code} adicionado para sincronização")
+            if saved:
+                self.logger.info(f"Código {code} adicionado para sincronização"
+                                 + (" (somente em disco)" if spilled else ""))
                 
                 # Tentar sincronização imediata se online
-                if self._is_online():
+                if not spilled and self._is_online():
                     self.sync_queue.put(('immediate', code_data))
                 return True
             else:
@@ -92,6 +260,7 @@ class DataSync:
             return
         
         self.is_running = True
+        self.connectivity.start()
         self.sync_thread = threading.Thread(target=self._sync_loop, daemon=True)
         self.sync_thread.start()
         self.logger.info("Thread de sincronização iniciada")
@@ -99,45 +268,102 @@ class DataSync:
     def stop_sync_thread(self):
         """Para thread de sincronização"""
         self.is_running = False
+        self.sync_queue.put(('stop', None))  # Acorda a thread imediatamente
+        self.connectivity.stop()
         if self.sync_thread:
             self.sync_thread.join(timeout=5)
+        self.upload_executor.shutdown(wait=False)
+        
+        # Thread ainda em _sync_codes/ack: fechar agora faria ela gravar num
+        # armazenamento fechado
+        if self.sync_thread and self.sync_thread.is_alive():
+            self.logger.warning("Thread de sincronização não terminou a tempo; armazenamento não foi fechado")
+            return
+        self.store.close()
         self.logger.info("Thread de sincronização parada")
     
     def _sync_loop(self):
-        """Loop principal de sincronização"""
-        last_hourly_sync = None
+        """Loop principal de sincronização
+        
+        A thread fica bloqueada na fila até o próximo evento (novo código,
+        reconexão, sincronização forçada, parada), até a próxima tentativa
+        agendada ou até a sincronização periódica, sem acordar em intervalos fixos.
+        """
+        next_periodic_sync = time.monotonic()  # Sincronizar ao iniciar
+        self._open_store()
+        self._load_next_chunk()
         
         while self.is_running:
+            sync_type, data = None, None
             try:
-                current_time = datetime.now()
+                timeout = max(0.0, next_periodic_sync - time.monotonic())
                 
-                # Verificar se é hora de sincronização horária
-                if (last_hourly_sync is None or 
-                    current_time - last_hourly_sync >= timedelta(hours=1)):
-                    
-                    self.logger.info("Iniciando sincronização horária")
-                    self._sync_all_pending()
-                    last_hourly_sync = current_time
+                # Offline, tentativas vencidas e o backlog não lido aguardam o evento de reconexão
+                if self._is_online():
+                    next_due = self.scheduler.next_due_time()
+                    if next_due is not None:
+                        timeout = min(timeout, max(0.0, next_due - time.time()))
+                    if self.is_loading and self._has_room():
+                        timeout = 0.0
                 
-                # Processar itens da fila de sincronização imediata
                 try:
-                    while not self.sync_queue.empty():
-                        sync_type, data = self.sync_queue.get_nowait()
-                        if sync_type == 'immediate':
-                            self._sync_single_code(data)
-                except:
-                    pass
+                    sync_type, data = self.sync_queue.get(timeout=timeout)
+                except Empty:
+                    sync_type = 'periodic' if time.monotonic() >= next_periodic_sync else 'due'
                 
-                # Aguardar próximo ciclo
-                time.sleep(60)  # Verificar a cada minuto
+                if sync_type == 'stop':
+                    break
+                elif sync_type == 'immediate':
+                    self._sync_immediate(data)
+                elif sync_type == 'force':
+                    data['result'] = self._run_force_sync()
+                    data['done'].set()
+                elif sync_type in ('periodic', 'due', 'reconnect'):
+                    if sync_type == 'periodic':
+                        self.logger.info("Iniciando sincronização periódica")
+                        next_periodic_sync = time.monotonic() + self.sync_interval
+                    self._sync_all_pending()
                 
             except Exception as e:
                 self.logger.error(f"Erro no loop de sincronização: {e}")
-                time.sleep(60)
+                if sync_type == 'force':
+                    data['done'].set()
+    
+    def _sync_immediate(self, code_data: Dict):
+        """Sincroniza código recém-adicionado junto com os demais já na fila"""
+        codes = [code_data]
+        
+        # Agrupar rajadas de leituras em um único envio
+        while True:
+            try:
+                sync_type, data = self.sync_queue.get_nowait()
+            except Empty:
+                break
+            if sync_type == 'immediate':
+                codes.append(data)
+            else:
+                # Devolver outros eventos para a fila
+                self.sync_queue.put((sync_type, data))
+                break
+        
+        codes = [c for c in codes if c.get('status') == 'pending']
+        if not codes:
+            return
+        
+        successful_syncs, failed_syncs = self._sync_codes(codes)
+        if successful_syncs:
+            self._remove_synced_codes(successful_syncs)
+        if failed_syncs:
+            self._update_failed_syncs(failed_syncs)
+        self.last_sync = datetime.now()
     
     def _sync_all_pending(self):
-        """Sincroniza todos os códigos pendentes"""
-        if not self.pending_codes:
+        """Sincroniza os códigos pendentes cuja próxima tentativa já venceu
+        
+        Se nenhum código em memória está vencido, lê o próximo bloco do
+        armazenamento; o backlog é carregado à medida que é enviado.
+        """
+        if not self.pending_codes and not self.is_loading:
             self.logger.info("Nenhum código pendente para sincronizar")
             return
         
@@ -145,34 +371,227 @@ class DataSync:
             self.logger.info("Sem conexão com internet, pulando sincronização")
             return
         
-        self.logger.info(f"Sincronizando {len(self.pending_codes)} códigos pendentes")
+        due_codes = self.scheduler.pop_due()
+        while not due_codes and self._load_next_chunk():
+            due_codes = self.scheduler.pop_due()
+        if not due_codes:
+            self.logger.debug("Nenhum código com tentativa vencida")
+            return
         
-        successful_syncs = []
-        failed_syncs = []
+        self.logger.info(f"Sincronizando {len(due_codes)} de {self._pending_count()} códigos pendentes")
         
-        for code_data in self.pending_codes[:]:  # Copiar lista para iteração
-            try:
-                if self._sync_single_code(code_data):
-                    successful_syncs.append(code_data)
-                else:
-                    failed_syncs.append(code_data)
-                
-                # Pequena pausa entre sincronizações
-                time.sleep(0.1)
-                
-            except Exception as e:
-                self.logger.error(f"Erro ao sincronizar código {code_data.get('code', 'unknown')}: {e}")
-                failed_syncs.append(code_data)
+        successful_syncs, failed_syncs = self._sync_codes(due_codes)
         
         # Remover códigos sincronizados com sucesso
         if successful_syncs:
             self._remove_synced_codes(successful_syncs)
             self.logger.info(f"Sincronizados {len(successful_syncs)} códigos com sucesso")
         
-        # Atualizar contadores de tentativa para códigos falhados
+        # Atualizar contadores de tentativa e reagendar códigos falhados
         if failed_syncs:
             self._update_failed_syncs(failed_syncs)
             self.logger.warning(f"Falharam {len(failed_syncs)} códigos na sincronização")
+        
+        self.last_sync = datetime.now()
+    
+    def _sync_codes(self, codes: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """Sincroniza uma lista de códigos, em lotes quando o servidor suporta
+        
+        Até `max_in_flight` lotes (ou códigos, no modo individual) são enviados
+        em paralelo. Cada código pertence a um único envio, então contadores de
+        tentativa e status continuam sendo atualizados por registro.
+        """
+        successful_syncs = []
+        failed_syncs = []
+        
+        chunk_size = self.batch_size if self.batch_supported else 1
+        chunks = [codes[start:start + chunk_size] for start in range(0, len(codes), chunk_size)]
+        
+        if self.max_in_flight > 1 and len(chunks) > 1:
+            results = self.upload_executor.map(self._sync_chunk, chunks)
+        else:
+            results = map(self._sync_chunk, chunks)
+        
+        for successful, failed in results:
+            successful_syncs.extend(successful)
+            failed_syncs.extend(failed)
+        
+        return successful_syncs, failed_syncs
+    
+    def _sync_chunk(self, chunk: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """Envia um lote, ou código por código se o servidor não aceitar lotes"""
+        if self.batch_supported:
+            try:
+                result = self._sync_batch(chunk)
+            except Exception as e:
+                self.logger.error(f"Erro inesperado na sincronização em lote: {e}")
+                self._mark_attempt_failed(chunk)
+                return [], chunk
+            if result is not None:
+                return result
+        
+        # Modo individual (servidor sem suporte a lotes)
+        successful = []
+        failed = []
+        for code_data in chunk:
+            try:
+                if self._sync_single_code(code_data):
+                    successful.append(code_data)
+                else:
+                    failed.append(code_data)
+            except Exception as e:
+                self.logger.error(f"Erro ao sincronizar código {code_data.get('code', 'unknown')}: {e}")
+                failed.append(code_data)
+        
+        return successful, failed
+    
+    def _sync_batch(self, batch: List[Dict]) -> Optional[Tuple[List[Dict], List[Dict]]]:
+        """Sincroniza um lote de códigos em uma única requisição
+        
+        Retorna (sucessos, falhas) ou None se o servidor não suporta lotes.
+        """
+        successful = []
+        failed = []
+        to_send = []
+        
+        for code_data in batch:
+            # Códigos já resolvidos não precisam ser enviados
+            if code_data.get('status') != 'pending':
+                successful.append(code_data)
+                continue
+            
+            if int(code_data.get('retry_count') or 0) >= self.max_retries:
+                self.logger.warning(f"Código {code_data.get('code')} excedeu limite de tentativas")
+                code_data['status'] = 'failed'
+                failed.append(code_data)
+                continue
+            
+            to_send.append(code_data)
+        
+        if not to_send:
+            return successful, failed
+        
+        batch_data = {
+            'device_id': self.activation_manager.device_id,
+            'codes': [self._build_sync_data(code_data) for code_data in to_send]
+        }
+        
+        try:
+            response = self._post_batch(batch_data)
+        except requests.exceptions.RequestException as e:
+            self.logger.error(f"Erro de rede na sincronização em lote: {e}")
+            self.connectivity.report_failure()
+            self._mark_attempt_failed(to_send)
+            return successful, failed + to_send
+        
+        self.connectivity.report_success()
+        
+        if response.status_code in (404, 405, 501):
+            self.logger.warning("Servidor não suporta envio em lote, usando modo individual")
+            self.batch_supported = False
+            return None
+        
+        if response.status_code != 200:
+            self.logger.warning(f"Erro HTTP na sincronização em lote: HTTP {response.status_code}: {response.text}")
+            self._mark_attempt_failed(to_send)
+            return successful, failed + to_send
+        
+        try:
+            response_data = response.json()
+        except ValueError:
+            self.logger.warning("Resposta inválida na sincronização em lote")
+            self._mark_attempt_failed(to_send)
+            return successful, failed + to_send
+        
+        # Resultado por item: {'index': i, 'success': bool, 'message': str}
+        results = response_data.get('results')
+        if results is None:
+            accepted = [bool(response_data.get('success'))] * len(to_send)
+        else:
+            accepted = [False] * len(to_send)
+            for position, item in enumerate(results):
+                index = item.get('index', position)
+                if 0 <= index < len(to_send):
+                    accepted[index] = bool(item.get('success'))
+                    if not item.get('success'):
+                        self.logger.warning(f"Código {to_send[index].get('code')} rejeitado: {item.get('message', 'Erro desconhecido')}")
+        
+        rejected = []
+        for code_data, ok in zip(to_send, accepted):
+            if ok:
+                code_data['status'] = 'synced'
+                successful.append(code_data)
+            else:
+                rejected.append(code_data)
+        
+        self._mark_attempt_failed(rejected)
+        self.logger.debug(f"Lote sincronizado: {len(to_send) - len(rejected)} aceitos, {len(rejected)} rejeitados")
+        return successful, failed + rejected
+    
+    def _post_batch(self, batch_data: Dict):
+        """Envia lote, negociando a compressão do corpo com o servidor
+        
+        Se o servidor responder 415, a codificação é trocada por uma listada no
+        cabeçalho Accept-Encoding da resposta (ou desativada) e o lote é reenviado.
+        """
+        encoding = self.compression
+        response = self.http_client.post_json(
+            'registrar_lote', batch_data,
+            token=self.activation_manager.token,
+            encoding=encoding
+        )
+        
+        if response.status_code == 415 and encoding:
+            accepted = [e.strip() for e in response.headers.get('Accept-Encoding', '').split(',')]
+            fallback = next((e for e in supported_encodings() if e in accepted), None)
+            
+            # Outra thread de envio pode já ter renegociado
+            if self.compression == encoding:
+                self.logger.warning(f"Servidor não aceita corpo {encoding}, usando {fallback or 'sem compressão'}")
+                self.compression = fallback
+            
+            response = self.http_client.post_json(
+                'registrar_lote', batch_data,
+                token=self.activation_manager.token,
+                encoding=self.compression
+            )
+        
+        return response
+    
+    def _resolve_compression(self, setting) -> Optional[str]:
+        """Converte SYNC_CONFIG["compression"] em codificação disponível"""
+        if not setting:
+            return None
+        encoding = 'gzip' if setting is True else str(setting)
+        if encoding not in supported_encodings():
+            self.logger.warning(f"Compressão {encoding} indisponível, usando gzip")
+            return 'gzip'
+        return encoding
+    
+    def _build_sync_data(self, code_data: Dict) -> Dict:
+        """Monta dados de envio de um código
+        
+        A chave de idempotência vai em toda tentativa, para o servidor
+        reconhecer reenvios de leituras que já registrou.
+        """
+        return {
+            'code': code_data['code'],
+            'timestamp': code_data['timestamp'],
+            'device_id': code_data['device_id'],
+            'idempotency_key': code_data['idempotency_key'],
+            'metadata': {k: v for k, v in code_data.items() 
+                       if k not in ['id', 'code', 'timestamp', 'device_id', 'idempotency_key', 'retry_count', 'last_attempt', 'next_attempt', 'status']}
+        }
+    
+    def _mark_attempt_failed(self, codes: List[Dict]):
+        """Incrementa contador de tentativas e calcula a próxima tentativa (backoff)"""
+        now = datetime.now().isoformat()
+        current_time = time.time()
+        for code_data in codes:
+            retry_count = int(code_data.get('retry_count') or 0) + 1
+            code_data['retry_count'] = retry_count
+            code_data['last_attempt'] = now
+            code_data['next_attempt'] = current_time + self.scheduler.backoff_delay(retry_count)
     
     def _sync_single_code(self, code_data: Dict) -> bool:
         """Sincroniza um código individual"""
@@ -182,34 +601,23 @@ class DataSync:
                 return True
             
             # Verificar limite de tentativas
-            retry_count = code_data.get('retry_count', 0)
+            retry_count = int(code_data.get('retry_count') or 0)
             if retry_count >= self.max_retries:
                 self.logger.warning(f"Código {code_data.get('code')} excedeu limite de tentativas")
                 code_data['status'] = 'failed'
                 return False
             
             # Preparar dados para envio
-            sync_data = {
-                'code': code_data['code'],
-                'timestamp': code_data['timestamp'],
-                'device_id': code_data['device_id'],
-                'metadata': {k: v for k, v in code_data.items() 
-                           if k not in ['code', 'timestamp', 'device_id', 'retry_count', 'last_attempt', 'status']}
-            }
+            sync_data = self._build_sync_data(code_data)
             
             # Enviar para API
-            url = f"{API_BASE_URL}{API_ENDPOINTS['registrar']}"
-            headers = {
-                'Authorization': f'Bearer {self.activation_manager.token}',
-                'Content-Type': 'application/json'
-            }
-            
-            response = requests.post(
-                url,
+            response = self.http_client.post(
+                'registrar',
+                token=self.activation_manager.token,
                 json=sync_data,
-                headers=headers,
-                timeout=30
+                headers={'Idempotency-Key': sync_data['idempotency_key']}
             )
+            self.connectivity.report_success()
             
             if response.status_code == 200:
                 response_data = response.json()
@@ -225,37 +633,30 @@ class DataSync:
                 self.logger.warning(f"Erro HTTP na sincronização: {error_msg}")
             
             # Incrementar contador de tentativas
-            code_data['retry_count'] = retry_count + 1
-            code_data['last_attempt'] = datetime.now().isoformat()
+            self._mark_attempt_failed([code_data])
             
             return False
             
         except requests.exceptions.RequestException as e:
             self.logger.error(f"Erro de rede na sincronização: {e}")
-            code_data['retry_count'] = retry_count + 1
-            code_data['last_attempt'] = datetime.now().isoformat()
+            self.connectivity.report_failure()
+            self._mark_attempt_failed([code_data])
             return False
             
         except Exception as e:
             self.logger.error(f"Erro inesperado na sincronização: {e}")
+            self._mark_attempt_failed([code_data])
             return False
     
     def _remove_synced_codes(self, synced_codes: List[Dict]):
         """Remove códigos sincronizados com sucesso"""
         try:
-            # Remover da lista local
-            for synced_code in synced_codes:
-                if synced_code in self.pending_codes:
-                    self.pending_codes.remove(synced_code)
+            # Remover da fila local (O(1) por código)
+            self.pending_codes.remove(c['id'] for c in synced_codes)
             
-            # Reescrever arquivo CSV
-            if self.pending_codes:
-                fieldnames = list(self.pending_codes[0].keys())
-                save_csv(self.pending_codes, PENDING_FILE, fieldnames)
-            else:
-                # Se não há mais códigos, remover arquivo
-                if PENDING_FILE.exists():
-                    PENDING_FILE.unlink()
+            # Registrar confirmação no journal
+            self.store.ack(c['id'] for c in synced_codes)
+            self._compact_store()
             
             self.logger.info(f"Removidos {len(synced_codes)} códigos sincronizados")
             
@@ -263,55 +664,122 @@ class DataSync:
             self.logger.error(f"Erro ao remover códigos sincronizados: {e}")
     
     def _update_failed_syncs(self, failed_codes: List[Dict]):
-        """Atualiza contadores de tentativas para códigos falhados"""
+        """Atualiza contadores de tentativas e reagenda códigos falhados"""
         try:
-            # Atualizar arquivo CSV
-            if self.pending_codes:
-                fieldnames = list(self.pending_codes[0].keys())
-                save_csv(self.pending_codes, PENDING_FILE, fieldnames)
+            # Registrar novas tentativas no journal
+            self.store.update(
+                (c['id'], {'retry_count': c.get('retry_count', 0),
+                           'last_attempt': c.get('last_attempt'),
+                           'next_attempt': c.get('next_attempt', 0),
+                           'status': c.get('status')})
+                for c in failed_codes
+            )
+            
+            for code_data in failed_codes:
+                self.scheduler.schedule(code_data)
+            
+            # Falhas definitivas saem da fila em memória (continuam no armazenamento)
+            exhausted = [c['id'] for c in failed_codes if c.get('status') == 'failed']
+            if exhausted:
+                self.failed_count += self.pending_codes.remove(exhausted)
             
         except Exception as e:
             self.logger.error(f"Erro ao atualizar códigos falhados: {e}")
     
+    def _compact_store(self):
+        """Compacta o journal quando há muitas entradas obsoletas
+        
+        Só depois da carga completa: a compactação reescreve a partir da fila
+        em memória e perderia os códigos ainda não lidos.
+        """
+        if self.is_loading or not self._store_ready.is_set():
+            return
+        if self.store.needs_compaction(len(self.pending_codes) + self.failed_count):
+            # Sob o lock de add_code, cada leitura entra na fila e no journal de
+            # uma vez: fica na cópia da fila ou num 'add' gravado depois dela,
+            # nunca nos dois. Falhas definitivas são relidas do armazenamento
+            records = itertools.chain(self.pending_codes, self._iter_failed_in_store()) \
+                if self.failed_count else self.pending_codes
+            with self._spill_lock:
+                self.store.compact(records)
+    
+    def _iter_failed_in_store(self):
+        """Percorre as falhas definitivas, que ficam só no armazenamento
+        
+        No SQLite elas vêm do índice de status; nos journals, de uma
+        varredura completa.
+        """
+        if hasattr(self.store, 'iter_by_status'):
+            chunks = self.store.iter_by_status('failed', self.load_chunk_size)
+        else:
+            chunks = self.store.iter_export(self.load_chunk_size)
+        for chunk in chunks:
+            for record in chunk:
+                if record.get('status') == 'failed' and record['id'] not in self.pending_codes:
+                    yield record
+    
     def _is_online(self) -> bool:
-        """Verifica se há conexão com internet"""
-        try:
-            # Verificar se o dispositivo está ativado
-            if not self.activation_manager.is_activated():
-                return False
-            
-            # Testar conectividade
-            response = requests.get("https://httpbin.org/get", timeout=5)
-            return response.status_code == 200
-            
-        except:
-            return False
+        """Verifica se há conexão com a API (estado em cache, sem bloqueio)"""
+        return self.activation_manager.is_activated() and self.connectivity.is_online()
+    
+    def _on_connectivity_change(self, online: bool):
+        """Agenda sincronização quando a conexão com a API volta"""
+        if online and (self.pending_codes or self.is_loading):
+            self.logger.info("Conexão com a API restabelecida, agendando sincronização")
+            self.sync_queue.put(('reconnect', None))
     
     def force_sync(self) -> Tuple[int, int]:
         """Força sincronização imediata de todos os códigos pendentes"""
         self.logger.info("Sincronização forçada solicitada")
         
-        if not self.pending_codes:
+        if not self.is_running:
+            return self._run_force_sync()
+        
+        # Executar na thread de sincronização, acordando-a imediatamente
+        request = {'done': threading.Event(), 'result': (0, 0)}
+        self.sync_queue.put(('force', request))
+        while not request['done'].wait(timeout=1.0):
+            if not self.sync_thread.is_alive():
+                break
+        return request['result']
+    
+    def _run_force_sync(self) -> Tuple[int, int]:
+        """Executa sincronização forçada
+        
+        O backlog não lido é enviado bloco a bloco, então a memória usada fica
+        limitada aos códigos que falharem.
+        """
+        self._open_store()
+        if not self.pending_codes and not self.is_loading:
             return 0, 0
         
         if not self._is_online():
             self.logger.warning("Sem conexão com internet para sincronização forçada")
-            return 0, len(self.pending_codes)
+            self.connectivity.request_probe()
+            return 0, self._pending_count()
         
         successful = 0
         failed = 0
+        pending = self.pending_codes.snapshot()
+        while True:
+            # Ignora o backoff, mas não reenvia códigos marcados como falhados
+            pending = [c for c in pending if c.get('status') == 'pending']
+            successful_syncs, failed_syncs = self._sync_codes(pending)
+            successful += len(successful_syncs)
+            failed += len(failed_syncs)
+            
+            # Remover códigos sincronizados
+            if successful_syncs:
+                self._remove_synced_codes(successful_syncs)
+            
+            if failed_syncs:
+                self._update_failed_syncs(failed_syncs)
+            
+            pending = self._load_next_chunk()
+            if not pending:
+                break
         
-        for code_data in self.pending_codes[:]:
-            if self._sync_single_code(code_data):
-                successful += 1
-            else:
-                failed += 1
-        
-        # Remover códigos sincronizados
-        if successful > 0:
-            synced_codes = [c for c in self.pending_codes if c.get('status') == 'synced']
-            self._remove_synced_codes(synced_codes)
-        
+        self.last_sync = datetime.now()
         self.logger.info(f"Sincronização forçada: {successful} sucessos, {failed} falhas")
         return successful, failed
     
@@ -319,44 +787,94 @@ class DataSync:
         """Retorna status da sincronização"""
         return {
             'running': self.is_running,
-            'pending_count': len(self.pending_codes),
+            'pending_count': self._pending_count(),
+            'loading': self.is_loading,
+            'buffer': self.get_buffer_stats(),
+            'persistence': self.store.get_write_stats(),
             'last_sync': self.last_sync.isoformat() if self.last_sync else None,
             'sync_interval': self.sync_interval,
             'online': self._is_online(),
             'queue_size': self.sync_queue.qsize()
         }
     
-    def get_pending_codes(self) -> List[Dict]:
-        """Retorna lista de códigos pendentes"""
-        return self.pending_codes.copy()
+    def get_buffer_stats(self) -> Dict:
+        """Retorna ocupação da fila em memória e quantos códigos estão só em disco"""
+        return {
+            'resident': len(self.pending_codes),
+            'max_resident': self.max_resident,
+            'peak_resident': self.peak_resident,
+            'unloaded': self.unloaded_count,
+            'spilled': self.spilled_count,
+            'failed_on_disk': self.failed_count
+        }
+    
+    def _pending_count(self) -> int:
+        """Códigos pendentes em memória mais os que estão só no armazenamento"""
+        return len(self.pending_codes) + self.unloaded_count + self.spilled_count + self.failed_count
+    
+    def get_pending_codes(self) -> List[PendingRecord]:
+        """Retorna os códigos pendentes em memória (no máximo max_buffer_size)
+        
+        O restante do backlog fica só no armazenamento; export_data() lê
+        todos, bloco a bloco.
+        """
+        return self.pending_codes.snapshot()
+    
+    def get_recent_scans(self, limit: Optional[int] = None) -> List[PendingRecord]:
+        """Retorna últimas leituras da sessão, da mais antiga para a mais recente
+        
+        São os mesmos registros da fila de pendentes (sem cópia); o status
+        indica se já foram sincronizados.
+        """
+        recent = list(self.recent_scans)
+        return recent[-limit:] if limit else recent
     
     def clear_failed_codes(self) -> int:
-        """Remove códigos que falharam na sincronização"""
-        failed_codes = [c for c in self.pending_codes if c.get('status') == 'failed']
+        """Remove códigos que falharam na sincronização
         
-        for failed_code in failed_codes:
-            self.pending_codes.remove(failed_code)
+        As falhas ficam só no armazenamento e são procuradas nele bloco a
+        bloco, inclusive as do backlog ainda não lido.
+        """
+        self._open_store()
+        self.store.flush()
+        removed = 0
+        batch = []
+        for record in self._iter_failed_in_store():
+            batch.append(record['id'])
+            if len(batch) >= self.load_chunk_size:
+                self.store.remove(batch)
+                removed += len(batch)
+                batch = []
+        if batch:
+            self.store.remove(batch)
+            removed += len(batch)
         
-        # Reescrever arquivo CSV
-        if self.pending_codes:
-            fieldnames = list(self.pending_codes[0].keys())
-            save_csv(self.pending_codes, PENDING_FILE, fieldnames)
-        else:
-            if PENDING_FILE.exists():
-                PENDING_FILE.unlink()
+        # Falhas do backlog não lido saem também da contagem de não lidos
+        self.unloaded_count = max(0, self.unloaded_count - max(0, removed - self.failed_count))
+        self.failed_count = 0
+        self._compact_store()
         
-        self.logger.info(f"Removidos {len(failed_codes)} códigos falhados")
-        return len(failed_codes)
+        self.logger.info(f"Removidos {removed} códigos falhados")
+        return removed
     
-    def export_pending_data(self, file_path: str) -> bool:
-        """Exporta dados pendentes para arquivo"""
+    def export_data(self, file_path, statuses: Optional[List[str]] = None,
+                    start: Optional[datetime] = None, end: Optional[datetime] = None,
+                    include_history: bool = False, progress=None) -> Tuple[bool, int]:
+        """Exporta leituras direto do armazenamento (CSV/JSONL, opcionalmente .gz)
+        
+        Não carrega o backlog na memória: os registros saem do armazenamento
+        bloco a bloco. Retorna (sucesso, quantidade exportada).
+        """
         try:
-            if not self.pending_codes:
-                return False
-            
-            fieldnames = list(self.pending_codes[0].keys())
-            return save_csv(self.pending_codes, file_path, fieldnames)
-            
+            self.store.flush()
+            exporter = ScanExporter(self.store)
+            return exporter.export(file_path, statuses=statuses, start=start, end=end,
+                                   include_history=include_history, progress=progress)
         except Exception as e:
             self.logger.error(f"Erro ao exportar dados: {e}")
-            return False 
\ No newline at end of file
+            return False, 0
+    
+    def export_pending_data(self, file_path: str) -> bool:
+        """Exporta dados pendentes para arquivo"""
+        success, count = self.export_data(file_path, statuses=['pending', 'failed'])
+        return success and count > 0
\ No newline at end of file
@@ -4,6 +4,7 @@ Módulo de utilitários para o sistema de scanner
 
 import json
 import csv
+import hashlib
 import logging
 import logging.handlers
 from datetime import datetime
@@ -141,6 +142,16 @@ def format_timestamp(timestamp: Optional[datetime] = None) -> str:
     return timestamp.strftime("%d/%m/%Y %H:%M:%S")
 
 
+def make_idempotency_key(device_id: str, sequence: int, code: str, timestamp: str) -> str:
+    """Gera chave de idempotência determinística para uma leitura
+    
+    Formato: <device_id>-<sequência>-<hash do código e timestamp>. O hash
+    distingue leituras mesmo que a sequência local seja reiniciada.
+    """
+    digest = hashlib.sha256(f"{code}|{timestamp}".encode('utf-8')).hexdigest()[:16]
+    return f"{device_id}-{sequence}-{digest}"
+
+
 def is_raspberry_pi() -> bool:
     """Verifica se está rodando em Raspberry Pi"""
     try:
@@ -177,4 +188,4 @@ def ensure_directory(path: Path) -> bool:
         return True
     except Exception as e:
         logging.error(f"Erro ao criar diretório {path}: {e}")
-        return False 
\ No newline at end of file
+        return False
\ No newline at end of file